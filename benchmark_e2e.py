@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout du chatbot et des serveurs MCP, sans accès réseau
+
+Deux mesures sont faites dans un répertoire temporaire:
+- protocole: MCPClient appelle les outils des trois serveurs stdio,
+  séquentiellement puis avec plusieurs requêtes simultanées;
+- chatbot: ChatbotWithTools est piloté par un modèle factice déterministe qui
+  remplace AzureChatOpenAI, avec une latence configurable et des appels
+  d'outils scénarisés.
+
+Les résultats (appels/s, latences p50/p99, pics mémoire) sont écrits dans un
+fichier JSON comparable d'une exécution à l'autre avec --baseline.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmark_employees import peak_rss_mb
+from generate_employees import generate_employees
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVERS = {
+    "calculator": os.path.join(ROOT, "calculator_server.py"),
+    "filesystem": os.path.join(ROOT, "file_server.py"),
+    "employees": os.path.join(ROOT, "employee_server.py"),
+}
+TEXT_FILE = "bench.txt"
+TEXT_LINES = 10_000
+
+# Appels mesurés au niveau du protocole, par serveur
+PROTOCOL_CASES: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    "calculator": [
+        ("add", {"a": 5, "b": 3}),
+        ("evaluate", {"expression": "(15 * 8 + 3) / sqrt(49)"}),
+        ("factorial", {"n": 500, "format": "digits"}),
+        ("array_statistics", {"values": list(range(1000))}),
+    ],
+    "filesystem": [
+        ("read_file", {"path": TEXT_FILE, "start_line": 5000, "end_line": 5050}),
+        ("get_file_info", {"path": TEXT_FILE}),
+        ("list_files", {"directory": "."}),
+        ("search_files", {"pattern": "ligne 42", "directory": "."}),
+    ],
+    "employees": [
+        ("get_employee", {"employee_id": 42}),
+        ("list_employees", {"limit": 50}),
+        ("search_employees", {"term": "martin"}),
+        ("get_department_stats", {}),
+    ],
+}
+
+# Conversations scénarisées: message, appels d'outils planifiés, réponse finale
+SCENARIOS: List[Dict[str, Any]] = [
+    {
+        "message": "Calcule 15 * 8",
+        "tool_calls": [{"tool": "calculator.multiply", "arguments": {"a": 15, "b": 8}}],
+        "answer": "Le résultat de 15 * 8 est 120.",
+    },
+    {
+        "message": "Quelles sont les statistiques du département IT ?",
+        "tool_calls": [{"tool": "employees.get_department_stats", "arguments": {"departement": "IT"}}],
+        "answer": "Voici les statistiques du département IT.",
+    },
+    {
+        "message": "Montre les lignes 100 à 120 de bench.txt",
+        "tool_calls": [{"tool": "filesystem.read_file", "arguments": {"path": TEXT_FILE, "start_line": 100, "end_line": 120}}],
+        "answer": "Voici les lignes demandées.",
+    },
+    {
+        "message": "Cherche les Martin et calcule la moyenne de 40000, 52000 et 61000",
+        "tool_calls": [
+            {"tool": "employees.search_employees", "arguments": {"term": "martin"}},
+            {"tool": "calculator.array_statistics", "arguments": {"values": [40000, 52000, 61000]}},
+        ],
+        "answer": "J'ai trouvé les Martin; la moyenne est de 51000.",
+    },
+    {
+        "message": "Bonjour !",
+        "tool_calls": [],
+        "answer": "Bonjour ! Comment puis-je vous aider ?",
+    },
+]
+
+FINAL_PROMPT_PREFIX = "Basé sur les résultats des outils"
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière du nombre de tokens (environ 4 caractères par token)"""
+    return max(1, len(text) // 4)
+
+class FakeChatModel:
+    """Remplaçant déterministe d'AzureChatOpenAI
+
+    La réponse de planification contient les <tool_call> du scénario associé au
+    dernier message utilisateur; la demande de réponse finale reçoit la réponse
+    du scénario. La latence simulée est fixe, plus un délai par token produit,
+    avec une variation tirée d'une graine fixe.
+    """
+
+    def __init__(self, scenarios: List[Dict[str, Any]], latency_ms: float = 0,
+                 per_token_ms: float = 0, jitter: float = 0, seed: int = 42):
+        from langchain.schema import AIMessage
+
+        self.message_class = AIMessage
+        self.scenarios = {scenario["message"]: scenario for scenario in scenarios}
+        self.latency_ms = latency_ms
+        self.per_token_ms = per_token_ms
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def respond(self, messages: List[Any]) -> str:
+        last = messages[-1].content
+        if last.startswith(FINAL_PROMPT_PREFIX):
+            user_messages = [m.content for m in messages if m.type == "human" and m.content in self.scenarios]
+            return self.scenarios[user_messages[-1]]["answer"] if user_messages else "Terminé."
+
+        scenario = self.scenarios.get(last)
+        if scenario is None:
+            return "Je ne sais pas répondre à cette demande."
+        if not scenario["tool_calls"]:
+            return scenario["answer"]
+        return "\n".join(
+            f"<tool_call>\n{json.dumps(call, ensure_ascii=False)}\n</tool_call>"
+            for call in scenario["tool_calls"]
+        )
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        self.calls += 1
+        content = self.respond(messages)
+        input_tokens = sum(estimate_tokens(m.content) for m in messages)
+        output_tokens = estimate_tokens(content)
+
+        delay = self.latency_ms + self.per_token_ms * output_tokens
+        if self.jitter:
+            delay *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        return self.message_class(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile par rang le plus proche"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def summarize(durations: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """Débit et latences en millisecondes d'une série d'appels"""
+    return {
+        "appels": len(durations),
+        "erreurs": errors,
+        "appels_par_s": round(len(durations) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+    }
+
+def server_peak_rss_mb(pid: int) -> Optional[float]:
+    """Pic de mémoire résidente d'un serveur (Linux uniquement)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+def prepare_workspace(employees: int, seed: int) -> None:
+    """Crée les données des serveurs dans le répertoire courant"""
+    with open("employees.json", 'w', encoding='utf-8') as f:
+        json.dump(generate_employees(employees, seed), f, ensure_ascii=False)
+    with open(TEXT_FILE, 'w', encoding='utf-8') as f:
+        for n in range(TEXT_LINES):
+            f.write(f"ligne {n}: contenu de test pour le benchmark\n")
+
+async def timed_call(client, server: str, tool: str, arguments: Dict[str, Any]) -> Tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        await client.call_tool(server, tool, arguments)
+        ok = True
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+async def run_protocol(repeat: int, concurrency: int) -> Dict[str, Any]:
+    """Mesure MCPClient sur chaque outil, puis en charge concurrente par serveur"""
+    from mcp_client import MCPClient
+
+    client = MCPClient()
+    results: Dict[str, Any] = {"connexion_ms": {}, "outils": {}, "concurrent": {}, "pic_rss_serveurs_mb": {}}
+    try:
+        for server, script in SERVERS.items():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                connected = await client.connect_to_server(server, script)
+            if not connected:
+                raise RuntimeError(f"Connexion au serveur '{server}' impossible")
+            results["connexion_ms"][server] = round((time.perf_counter() - start) * 1000, 1)
+
+        for server, cases in PROTOCOL_CASES.items():
+            # Premier appel hors mesure: chargement des données et des index
+            for tool, arguments in cases:
+                await timed_call(client, server, tool, arguments)
+
+            for tool, arguments in cases:
+                durations, errors = [], 0
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    duration, ok = await timed_call(client, server, tool, arguments)
+                    durations.append(duration)
+                    errors += not ok
+                results["outils"][f"{server}.{tool}"] = summarize(durations, time.perf_counter() - start, errors)
+
+            # Plusieurs requêtes en vol sur la même connexion stdio
+            calls = [cases[i % len(cases)] for i in range(repeat * len(cases))]
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited(tool: str, arguments: Dict[str, Any]) -> Tuple[float, bool]:
+                async with semaphore:
+                    return await timed_call(client, server, tool, arguments)
+
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(limited(tool, arguments) for tool, arguments in calls))
+            results["concurrent"][server] = summarize(
+                [duration for duration, _ in outcomes], time.perf_counter() - start,
+                sum(not ok for _, ok in outcomes)
+            )
+
+        for server, process in client.servers.items():
+            results["pic_rss_serveurs_mb"][server] = server_peak_rss_mb(process.pid)
+        return results
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.close()
+
+async def run_chatbot(turns: int, args) -> Dict[str, Any]:
+    """Mesure des tours de conversation complets avec le modèle factice"""
+    from chatbot import ChatbotWithTools
+
+    llm = FakeChatModel(SCENARIOS, args.llm_latency, args.llm_token_latency, args.llm_jitter, args.seed)
+    chatbot = ChatbotWithTools(llm=llm)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await chatbot.initialize()
+
+        durations: Dict[str, List[float]] = {scenario["message"]: [] for scenario in SCENARIOS}
+        errors = 0
+        start = time.perf_counter()
+        for turn in range(turns):
+            scenario = SCENARIOS[turn % len(SCENARIOS)]
+            turn_start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = await chatbot.process_message(scenario["message"])
+            durations[scenario["message"]].append(time.perf_counter() - turn_start)
+            errors += response != scenario["answer"]
+        elapsed = time.perf_counter() - start
+
+        all_durations = [duration for values in durations.values() for duration in values]
+        result = summarize(all_durations, elapsed, errors)
+        result["tours_par_s"] = result.pop("appels_par_s")
+        result["appels_llm"] = llm.calls
+        result["scenarios"] = {
+            message: summarize(values, sum(values)) for message, values in durations.items() if values
+        }
+        return result
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await chatbot.cleanup()
+
+def git_revision() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=ROOT)
+        return completed.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Affiche l'évolution des latences p50 par rapport à une exécution précédente"""
+    print(f"\n📈 Comparaison avec {baseline.get('revision') or 'la référence'} (p50, ms)")
+    sections = [("protocole", "outils"), ("protocole", "concurrent")]
+    for section, group in sections:
+        before = baseline.get(section, {}).get(group, {})
+        for name, stats in results.get(section, {}).get(group, {}).items():
+            if name in before:
+                ratio = stats["p50_ms"] / before[name]["p50_ms"] if before[name]["p50_ms"] else float("inf")
+                flag = "⚠️ " if ratio > 1.2 else "  "
+                print(f" {flag}{group}/{name:<38}{before[name]['p50_ms']:>10}{stats['p50_ms']:>10}  x{ratio:.2f}")
+    if "chatbot" in results and "chatbot" in baseline:
+        before, after = baseline["chatbot"]["p50_ms"], results["chatbot"]["p50_ms"]
+        print(f"   chatbot (tour complet){'':<25}{before:>10}{after:>10}  x{after / before:.2f}")
+
+def print_report(results: Dict[str, Any]) -> None:
+    protocol = results.get("protocole")
+    if protocol:
+        print("\n📊 Protocole MCP (stdio)")
+        print(f"   {'Appel':<42}{'appels/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, stats in protocol["outils"].items():
+            print(f"   {name:<42}{stats['appels_par_s']:>10}{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+        for server, stats in protocol["concurrent"].items():
+            label = f"{server} (x{results['parametres']['concurrency']} simultanés)"
+            print(f"   {label:<42}{stats['appels_par_s']:>10}{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+        print(f"   Pic mémoire des serveurs: {protocol['pic_rss_serveurs_mb']}")
+
+    chatbot = results.get("chatbot")
+    if chatbot:
+        print("\n🤖 Chatbot avec modèle factice")
+        print(f"   {chatbot['appels']} tours, {chatbot['tours_par_s']} tours/s, "
+              f"p50 {chatbot['p50_ms']} ms, p99 {chatbot['p99_ms']} ms, erreurs {chatbot['erreurs']}")
+    print(f"\n   Pic mémoire du client: {results['pic_rss_client_mb']} Mo")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du chatbot et des serveurs MCP")
+    parser.add_argument("--repeat", type=int, default=50, help="Appels par outil")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requêtes simultanées par serveur")
+    parser.add_argument("--turns", type=int, default=20, help="Tours de conversation du chatbot")
+    parser.add_argument("--employees", type=int, default=10_000, help="Taille du jeu d'employés")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    parser.add_argument("--llm-latency", type=float, default=0, help="Latence simulée par appel au modèle (ms)")
+    parser.add_argument("--llm-token-latency", type=float, default=0, help="Latence simulée par token produit (ms)")
+    parser.add_argument("--llm-jitter", type=float, default=0, help="Variation relative de la latence (0 à 1)")
+    parser.add_argument("--no-protocol", action="store_true", help="Ne mesure pas le protocole")
+    parser.add_argument("--no-chatbot", action="store_true", help="Ne mesure pas le chatbot")
+    parser.add_argument("--output", default="bench_e2e.json", help="Fichier de résultats JSON")
+    parser.add_argument("--baseline", help="Résultats d'une exécution précédente à comparer")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Any] = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "parametres": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bench-e2e-") as directory:
+        os.chdir(directory)
+        try:
+            prepare_workspace(args.employees, args.seed)
+            if not args.no_protocol:
+                print("⏱️  Benchmark du protocole MCP...")
+                results["protocole"] = asyncio.run(run_protocol(args.repeat, args.concurrency))
+            if not args.no_chatbot:
+                print("⏱️  Benchmark du chatbot avec modèle factice...")
+                results["chatbot"] = asyncio.run(run_chatbot(args.turns, args))
+        finally:
+            os.chdir(ROOT)
+
+    results["pic_rss_client_mb"] = round(peak_rss_mb(), 1)
+    print_report(results)
+    if baseline:
+        compare(results, baseline)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Résultats enregistrés dans '{output}'")
+
+if __name__ == "__main__":
+    main()
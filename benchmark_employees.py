@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark de montée en charge du serveur d'employés
+
+Chaque taille de jeu de données est mesurée dans un processus séparé afin que
+les mesures mémoire ne se cumulent pas. Les outils sont appelés directement
+puis via le client JSON-RPC (stdio), comme le ferait le chatbot.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from generate_employees import generate_employees
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(ROOT, "employee_server.py")
+IMPORT_ROWS = 1000
+BATCH_SIZE = 100
+
+def current_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Mémoire résidente actuelle d'un processus (Linux uniquement)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus courant"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def benchmark_cases(size: int, import_path: str) -> List[Tuple[str, Callable[[int], Dict[str, Any]]]]:
+    """Outils à mesurer et arguments de chaque répétition"""
+    def new_employee(tag: str) -> Dict[str, Any]:
+        return {
+            "prenom": "Bench", "nom": "Test", "email": f"bench.{tag}@entreprise.fr",
+            "poste": "Testeur", "departement": "QA", "salaire": 40000,
+            "date_embauche": "2024-01-15"
+        }
+
+    return [
+        ("get_employee", lambda i: {"employee_id": size // 2 + i}),
+        ("list_employees", lambda i: {"limit": 50}),
+        ("list_employees[departement,tsv]", lambda i: {"departement": "RH", "sort_by": "salaire", "format": "tsv"}),
+        ("search_employees", lambda i: {"term": "martin"}),
+        ("fuzzy_search_employees", lambda i: {"term": "Lefevbre"}),
+        ("get_department_stats", lambda i: {}),
+        ("get_salary_percentiles", lambda i: {"departement": "IT"}),
+        ("get_headcount_history", lambda i: {"periode": "month"}),
+        ("salary_analytics", lambda i: {"group_by": "poste", "histogram_bins": 10}),
+        ("create_employee", lambda i: new_employee(f"create.{i}")),
+        ("update_employee", lambda i: {"employee_id": 1 + i, "salaire": 45000 + i}),
+        ("delete_employee", lambda i: {"employee_id": 2 + i}),
+        ("reactivate_employee", lambda i: {"employee_id": 2 + i}),
+        ("bulk_create_employees", lambda i: {
+            "employees": [new_employee(f"bulk.{i}.{n}") for n in range(BATCH_SIZE)]
+        }),
+        ("bulk_update_employees", lambda i: {
+            "updates": [{"employee_id": 100 + n, "poste": f"Testeur {i}"} for n in range(BATCH_SIZE)]
+        }),
+        ("import_employees", lambda i: {"path": import_path.format(i)}),
+        ("get_cache_stats", lambda i: {}),
+    ]
+
+def write_import_files(directory: str, repeat: int) -> str:
+    """Écrit un fichier CSV à importer par répétition (emails uniques)"""
+    pattern = os.path.join(directory, "import_{}.csv")
+    fields = ["prenom", "nom", "email", "poste", "departement", "salaire", "date_embauche"]
+    for run in range(repeat * 2):
+        with open(pattern.format(run), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for n in range(IMPORT_ROWS):
+                writer.writerow({
+                    "prenom": "Import", "nom": "Test", "email": f"import.{run}.{n}@entreprise.fr",
+                    "poste": "Comptable", "departement": "Finance", "salaire": 38000,
+                    "date_embauche": "2023-09-01"
+                })
+    return pattern
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """Statistiques de latence en millisecondes"""
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+    }
+
+def run_direct(cases, repeat: int) -> Dict[str, Any]:
+    """Appelle les outils directement dans le processus courant"""
+    import employee_server
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    employee_server.get_indexes()
+    load_time = time.perf_counter() - start
+
+    results = {
+        "chargement_ms": round(load_time * 1000, 3),
+        "rss_chargement_mb": round(current_rss_mb() - rss_before, 1) if rss_before else None,
+        "outils": {}
+    }
+
+    for name, make_args in cases:
+        tool = getattr(employee_server, name.split("[")[0])
+        durations = []
+        for i in range(repeat):
+            args = make_args(i)
+            start = time.perf_counter()
+            tool(**args)
+            durations.append(time.perf_counter() - start)
+        results["outils"][name] = summarize(durations)
+
+    rss = current_rss_mb()
+    results["rss_mb"] = round(rss, 1) if rss else None
+    results["pic_rss_mb"] = round(peak_rss_mb(), 1)
+    return results
+
+async def run_stdio(cases, repeat: int, offset: int) -> Dict[str, Any]:
+    """Appelle les outils via le client JSON-RPC et un serveur stdio"""
+    from mcp_client import MCPClient
+
+    client = MCPClient()
+    try:
+        start = time.perf_counter()
+        if not await client.connect_to_server("employees", SERVER_SCRIPT):
+            raise RuntimeError("Connexion au serveur d'employés impossible")
+        results = {"connexion_ms": round((time.perf_counter() - start) * 1000, 3), "outils": {}}
+
+        # Le premier appel charge le fichier et construit les index côté serveur
+        start = time.perf_counter()
+        await client.call_tool("employees", "get_cache_stats", {})
+        await client.call_tool("employees", "search_employees", {"term": "martin"})
+        results["chargement_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        for name, make_args in cases:
+            tool_name = name.split("[")[0]
+            durations = []
+            for i in range(repeat):
+                args = make_args(offset + i)
+                start = time.perf_counter()
+                await client.call_tool("employees", tool_name, args)
+                durations.append(time.perf_counter() - start)
+            results["outils"][name] = summarize(durations)
+
+        server_rss = current_rss_mb(client.servers["employees"].pid)
+        results["rss_serveur_mb"] = round(server_rss, 1) if server_rss else None
+        return results
+    finally:
+        await client.close()
+
+def run_worker(size: int, args) -> Dict[str, Any]:
+    """Mesure une taille de jeu de données dans un répertoire temporaire"""
+    with tempfile.TemporaryDirectory(prefix="bench-employees-") as directory:
+        os.chdir(directory)
+
+        start = time.perf_counter()
+        employees = generate_employees(size, args.seed, args.skew, args.active_ratio)
+        with open("employees.json", 'w', encoding='utf-8') as f:
+            json.dump(employees, f, indent=2, ensure_ascii=False)
+        generation_time = time.perf_counter() - start
+        del employees
+
+        import_path = write_import_files(directory, args.repeat)
+        cases = benchmark_cases(size, import_path)
+
+        result = {
+            "taille": size,
+            "generation_s": round(generation_time, 3),
+            "fichier_mb": round(os.path.getsize("employees.json") / (1024 * 1024), 2),
+            "direct": run_direct(cases, args.repeat),
+        }
+        if not args.no_stdio:
+            # Les répétitions stdio utilisent d'autres emails et d'autres fichiers d'import
+            result["stdio"] = asyncio.run(run_stdio(cases, args.repeat, args.repeat))
+        result["fichier_final_mb"] = round(os.path.getsize("employees.json") / (1024 * 1024), 2)
+        os.chdir(ROOT)
+        return result
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """Affiche un tableau de latences médianes par taille"""
+    print("\n📊 Résultats (latence médiane en ms)")
+    print("=" * 80)
+    for result in results:
+        direct = result["direct"]
+        print(f"\n👥 {result['taille']} employés | fichier {result['fichier_mb']} Mo | "
+              f"chargement {direct['chargement_ms']} ms | pic RSS {direct['pic_rss_mb']} Mo")
+        stdio = result.get("stdio", {}).get("outils", {})
+        print(f"   {'Outil':<34}{'direct':>12}{'stdio':>12}")
+        for name, stats in direct["outils"].items():
+            via_stdio = stdio.get(name, {}).get("median_ms", "-")
+            print(f"   {name:<34}{stats['median_ms']:>12}{via_stdio:>12}")
+        if "stdio" in result:
+            print(f"   Mémoire du serveur stdio: {result['stdio']['rss_serveur_mb']} Mo")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge du serveur d'employés")
+    parser.add_argument("sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000],
+                        help="Tailles des jeux de données")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions par outil")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    parser.add_argument("--skew", type=float, default=1.0, help="Déséquilibre des départements (Zipf)")
+    parser.add_argument("--active-ratio", type=float, default=0.9, help="Proportion d'employés actifs")
+    parser.add_argument("--no-stdio", action="store_true", help="Ne mesure que les appels directs")
+    parser.add_argument("--output", default="bench_output.json", help="Fichier de résultats JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Processus fils: une seule taille, résultat JSON sur la dernière ligne
+        result = run_worker(args.sizes[0], args)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for size in args.sizes:
+        print(f"⏱️  Benchmark avec {size} employés...")
+        command = [sys.executable, os.path.abspath(__file__), str(size), "--worker",
+                   "--repeat", str(args.repeat), "--seed", str(args.seed),
+                   "--skew", str(args.skew), "--active-ratio", str(args.active_ratio)]
+        if args.no_stdio:
+            command.append("--no-stdio")
+
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+        if completed.returncode != 0:
+            print(f"❌ Échec pour {size} employés:\n{completed.stderr}")
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print_report(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Résultats enregistrés dans '{args.output}'")
+
+if __name__ == "__main__":
+    main()
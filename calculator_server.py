@@ -3,12 +3,202 @@
 Serveur MCP Calculator - Version FastMCP avec décorateurs
 """
 
+import os
+import ast
+import csv
+import sys
+import json
 import math
+import asyncio
+import operator
+import multiprocessing
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
 from mcp.server.fastmcp import FastMCP
 
 # Création du serveur FastMCP
 mcp = FastMCP("Calculator Service")
 
+# Limites de coût des calculs sur les grands entiers
+MAX_RESULT_DIGITS = int(os.getenv("CALCULATOR_MAX_DIGITS", "1000000"))
+INLINE_RESULT_DIGITS = int(os.getenv("CALCULATOR_INLINE_DIGITS", "2000"))
+MAX_OUTPUT_DIGITS = int(os.getenv("CALCULATOR_OUTPUT_DIGITS", "1000"))
+COMPUTE_TIMEOUT = float(os.getenv("CALCULATOR_TIMEOUT", "10"))
+COMPUTE_WORKERS = int(os.getenv("CALCULATOR_WORKERS", "2"))
+RESULT_CACHE_SIZE = 32
+SCIENTIFIC_DIGITS = 15
+RESULT_FORMATS = ("auto", "full", "scientific", "digits")
+
+# La protection de l'interpréteur contre les conversions entier <-> texte
+# coûteuses reste active dans le serveur: les résultats convertis sur la
+# boucle d'événements restent sous cette limite. Seuls les processus de
+# calcul, dont les résultats sont bornés à MAX_RESULT_DIGITS, la lèvent.
+INT_STR_DIGITS = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+if INT_STR_DIGITS:
+    INLINE_RESULT_DIGITS = min(INLINE_RESULT_DIGITS, INT_STR_DIGITS)
+    MAX_OUTPUT_DIGITS = min(MAX_OUTPUT_DIGITS, INT_STR_DIGITS)
+
+class ResultTooLarge(ValueError):
+    """Le résultat dépasserait la limite de chiffres en vigueur"""
+
+# Limite appliquée au calcul en cours: réduite sur la boucle d'événements,
+# complète dans les processus de calcul
+_digit_limit: ContextVar[int] = ContextVar("digit_limit", default=INLINE_RESULT_DIGITS)
+
+def check_digits(digits: float) -> None:
+    """Refuse un calcul dont le résultat estimé dépasse la limite en vigueur"""
+    limit = _digit_limit.get()
+    if digits > limit:
+        if limit < MAX_RESULT_DIGITS and digits <= MAX_RESULT_DIGITS:
+            raise ResultTooLarge(f"Résultat de plus de {limit} chiffres")
+        raise ValueError(f"Résultat trop grand: plus de {MAX_RESULT_DIGITS} chiffres")
+
+def count_digits(value: int) -> int:
+    """Nombre exact de chiffres d'un entier, sans conversion en texte"""
+    value = abs(value)
+    if value < 10:
+        return 1
+    estimate = int((value.bit_length() - 1) * math.log10(2))
+    return estimate + 1 + (value >= 10 ** (estimate + 1))
+
+def format_result(value: Any, format: str) -> Any:
+    """Présente un résultat entier selon le format demandé
+    
+    auto: entier complet jusqu'à MAX_OUTPUT_DIGITS chiffres, notation scientifique au-delà;
+    full: entier complet (en texte au-delà de MAX_OUTPUT_DIGITS chiffres);
+    scientific: notation scientifique; digits: nombre de chiffres seulement.
+    """
+    if not isinstance(value, int) or isinstance(value, bool):
+        return value
+    
+    digits = count_digits(value)
+    if format == "digits":
+        return digits
+    if format == "full" or (format == "auto" and digits <= MAX_OUTPUT_DIGITS):
+        return value if digits <= MAX_OUTPUT_DIGITS else str(value)
+    
+    # Les premiers chiffres s'obtiennent par une division au quotient court
+    leading = str(abs(value) // 10 ** max(digits - SCIENTIFIC_DIGITS, 0))
+    mantissa = f"{leading[0]}.{leading[1:]}".rstrip("0").rstrip(".")
+    sign = "-" if value < 0 else ""
+    return f"{sign}{mantissa}e+{digits - 1}"
+
+def check_format(format: str) -> None:
+    if format not in RESULT_FORMATS:
+        raise ValueError(f"Format inconnu. Disponibles: {', '.join(RESULT_FORMATS)}")
+
+# Processus de calcul des opérations coûteuses: la boucle d'événements reste
+# libre pour les autres requêtes pendant qu'un grand calcul s'exécute
+_idle_workers: List["ComputeWorker"] = []
+_worker_slots: Optional[asyncio.Semaphore] = None
+_result_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+def _worker_loop(connection: Any) -> None:
+    """Boucle d'un processus de calcul: exécute les tâches reçues jusqu'à fermeture du canal"""
+    # Les résultats des calculs sont déjà bornés à MAX_RESULT_DIGITS chiffres
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+    # Signale la fin du démarrage (imports compris), qui n'entre pas dans le délai des calculs
+    connection.send(None)
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, function(*args))
+        except Exception as e:
+            reply = (False, e)
+        connection.send(reply)
+
+class ComputeWorker:
+    """Processus de calcul dédié, réutilisé d'un calcul à l'autre
+    
+    Chaque calcul occupe seul son processus: un calcul trop long est
+    interrompu en arrêtant ce processus, sans toucher aux autres calculs.
+    """
+
+    def __init__(self):
+        # spawn: le serveur a déjà des threads, un fork pourrait hériter d'un verrou pris
+        context = multiprocessing.get_context("spawn")
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    async def receive(self) -> Any:
+        # La réception bloque un thread, pas la boucle d'événements
+        return await asyncio.get_running_loop().run_in_executor(None, self.connection.recv)
+
+    async def start(self) -> None:
+        """Attend que le processus soit prêt à calculer"""
+        if not self.ready:
+            await self.receive()
+            self.ready = True
+
+    async def run(self, function: Callable[..., Any], args: Tuple) -> Tuple[bool, Any]:
+        self.connection.send((function, args))
+        return await self.receive()
+
+    def stop(self) -> None:
+        """Arrête le processus; la réception en attente se termine sur EOFError"""
+        self.process.terminate()
+
+async def run_heavy(key: Tuple, function: Callable[..., Any], *args: Any) -> Any:
+    """Exécute un calcul dans un processus de calcul, avec délai maximal et mémoïsation
+    
+    Au plus COMPUTE_WORKERS calculs s'exécutent en même temps; le délai ne
+    compte que l'exécution, pas l'attente d'un processus libre.
+    """
+    global _worker_slots
+    if key in _result_cache:
+        _result_cache.move_to_end(key)
+        return _result_cache[key]
+    
+    if _worker_slots is None:
+        _worker_slots = asyncio.Semaphore(COMPUTE_WORKERS)
+    
+    async with _worker_slots:
+        while _idle_workers and not _idle_workers[-1].process.is_alive():
+            _idle_workers.pop()
+        worker = _idle_workers.pop() if _idle_workers else ComputeWorker()
+        try:
+            await worker.start()
+            succeeded, result = await asyncio.wait_for(worker.run(function, args), COMPUTE_TIMEOUT)
+        except asyncio.TimeoutError:
+            worker.stop()
+            raise ValueError(f"Calcul interrompu: plus de {COMPUTE_TIMEOUT:g} secondes")
+        except (EOFError, OSError):
+            worker.stop()
+            raise ValueError("Calcul interrompu: processus de calcul arrêté")
+        except BaseException:
+            # Annulation de la requête: l'état du processus est inconnu
+            worker.stop()
+            raise
+        _idle_workers.append(worker)
+    
+    if not succeeded:
+        raise result
+    
+    _result_cache[key] = result
+    if len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+    return result
+
+def _factorial_worker(n: int, format: str) -> Any:
+    return format_result(math.factorial(n), format)
+
+def _power_worker(base: int, exponent: int, format: str) -> Any:
+    return format_result(base ** exponent, format)
+
+def _evaluate_worker(expression: str, variables: Dict[str, float], format: str) -> Any:
+    _digit_limit.set(MAX_RESULT_DIGITS)
+    return format_result(evaluate_compiled(compile_expression(expression), variables), format)
+
 @mcp.tool()
 def add(a: float, b: float) -> float:
     """Addition de deux nombres"""
@@ -31,10 +221,36 @@ def divide(a: float, b: float) -> float:
         raise ValueError("Division par zéro impossible")
     return a / b
 
+def _is_integer(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
 @mcp.tool()
-def power(base: float, exponent: float) -> float:
-    """Élévation à la puissance"""
-    return base ** exponent
+async def power(base: Union[int, float], exponent: Union[int, float], format: str = "auto") -> Union[int, float, str]:
+    """Élévation à la puissance
+    
+    Avec deux entiers (et un exposant positif), le résultat est exact; les
+    grands résultats sont calculés hors de la boucle d'événements et présentés
+    selon format ('auto', 'full', 'scientific' ou 'digits'). Dès qu'un argument
+    est un nombre à virgule (2.0 compris), le calcul reste en virgule flottante.
+    """
+    check_format(format)
+    if _is_integer(base) and _is_integer(exponent) and exponent >= 0:
+        digits = exponent * _digits(base) if base not in (0, 1, -1) else 1
+        if digits > MAX_RESULT_DIGITS:
+            raise ValueError(f"Résultat trop grand: plus de {MAX_RESULT_DIGITS} chiffres")
+        if digits <= INLINE_RESULT_DIGITS:
+            return format_result(base ** exponent, format)
+        return await run_heavy(("power", base, exponent, format), _power_worker, base, exponent, format)
+    
+    try:
+        result = base ** exponent
+    except OverflowError:
+        raise ValueError("Résultat trop grand pour un nombre à virgule flottante")
+    except ZeroDivisionError:
+        raise ValueError("Division par zéro impossible")
+    if isinstance(result, complex):
+        raise ValueError("Le résultat n'est pas un nombre réel")
+    return result
 
 @mcp.tool()
 def square_root(number: float) -> float:
@@ -44,11 +260,420 @@ def square_root(number: float) -> float:
     return math.sqrt(number)
 
 @mcp.tool()
-def factorial(n: int) -> int:
-    """Factorielle d'un nombre entier"""
+async def factorial(n: int, format: str = "auto") -> Union[int, str]:
+    """Factorielle d'un nombre entier
+    
+    Les grandes factorielles sont calculées hors de la boucle d'événements,
+    mémorisées, et présentées selon format ('auto', 'full', 'scientific' ou 'digits').
+    """
+    check_format(format)
     if n < 0:
         raise ValueError("Factorielle d'un nombre négatif impossible")
+    digits = math.lgamma(n + 1) / math.log(10) if n > 1 else 1
+    if digits > MAX_RESULT_DIGITS:
+        raise ValueError(f"Résultat trop grand: plus de {MAX_RESULT_DIGITS} chiffres")
+    if digits <= INLINE_RESULT_DIGITS:
+        return format_result(math.factorial(n), format)
+    return await run_heavy(("factorial", n, format), _factorial_worker, n, format)
+
+# Limites de l'évaluateur d'expressions
+MAX_EXPRESSION_LENGTH = 1000
+MAX_EXPRESSION_NODES = 200
+EXPRESSION_CACHE_SIZE = 512
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+def _log(x: float, base: Optional[float] = None) -> float:
+    return math.log(x) if base is None else math.log(x, base)
+
+def _checked_factorial(n: Any) -> int:
+    if not float(n).is_integer() or n < 0:
+        raise ValueError("Factorielle définie seulement pour les entiers positifs")
+    n = int(n)
+    if n > 1:
+        check_digits(math.lgamma(n + 1) / math.log(10))
     return math.factorial(n)
 
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "sqrt": math.sqrt, "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "exp": math.exp, "log": _log, "ln": math.log, "log10": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "degrees": math.degrees, "radians": math.radians, "hypot": math.hypot,
+    "abs": abs, "round": round, "floor": math.floor, "ceil": math.ceil, "trunc": math.trunc,
+    "min": min, "max": max, "factorial": _checked_factorial, "gcd": math.gcd,
+}
+
+def _digits(value: Any) -> float:
+    """Nombre approximatif de chiffres de la partie entière d'un nombre"""
+    value = abs(value)
+    # math.log10 accepte les entiers de taille quelconque
+    return math.log10(value) if value >= 1 else 0
+
+def _checked_power(base: Any, exponent: Any) -> Any:
+    """Puissance dont la taille du résultat est estimée avant le calcul"""
+    if base not in (0, 1, -1) and exponent > 0:
+        check_digits(exponent * _digits(base))
+    return operator.pow(base, exponent)
+
+def _checked_multiply(a: Any, b: Any) -> Any:
+    if isinstance(a, int) and isinstance(b, int):
+        check_digits(_digits(a) + _digits(b))
+    return a * b
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _checked_multiply,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _checked_power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+def _compile_node(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    """Transforme un nœud de l'arbre syntaxique en fonction de l'environnement des variables
+    
+    Seuls les nombres, les opérateurs arithmétiques, les noms et les appels des
+    fonctions autorisées sont acceptés: aucun attribut, indice ni code arbitraire.
+    """
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return lambda env: value
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        function = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda env: function(left(env), right(env))
+    
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        function = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda env: function(operand(env))
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda env: value
+        
+        def variable(env: Dict[str, Any]) -> Any:
+            if name not in env:
+                raise ValueError(f"Variable inconnue: '{name}'")
+            return env[name]
+        return variable
+    
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in FUNCTIONS:
+            raise ValueError(f"Fonction inconnue: '{node.func.id}'. Disponibles: {', '.join(sorted(FUNCTIONS))}")
+        function = FUNCTIONS[node.func.id]
+        arguments = [_compile_node(argument) for argument in node.args]
+        return lambda env: function(*[argument(env) for argument in arguments])
+    
+    raise ValueError(f"Élément non autorisé dans l'expression: '{ast.unparse(node)}'")
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> Callable[[Dict[str, Any]], Any]:
+    """Analyse et compile une expression; le résultat est mis en cache par texte d'expression"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression trop longue (maximum {MAX_EXPRESSION_LENGTH} caractères)")
+    
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Expression invalide: {e.msg}")
+    
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ValueError(f"Expression trop complexe (maximum {MAX_EXPRESSION_NODES} éléments)")
+    return _compile_node(tree.body)
+
+def evaluate_compiled(compiled: Callable[[Dict[str, Any]], Any], variables: Dict[str, float]) -> Union[int, float]:
+    """Calcule une expression compilée et traduit les erreurs de calcul"""
+    try:
+        result = compiled(variables)
+    except ZeroDivisionError:
+        raise ValueError("Division par zéro impossible")
+    except OverflowError:
+        raise ValueError("Résultat trop grand pour un nombre à virgule flottante")
+    except TypeError as e:
+        raise ValueError(f"Appel de fonction invalide: {e}")
+    except ValueError as e:
+        if str(e) == "math domain error":
+            raise ValueError("Valeur hors du domaine de la fonction")
+        raise
+    
+    if isinstance(result, complex):
+        raise ValueError("Le résultat n'est pas un nombre réel")
+    if isinstance(result, float) and not math.isfinite(result):
+        raise ValueError("Résultat trop grand pour un nombre à virgule flottante")
+    return result
+
+@mcp.tool()
+async def evaluate(
+    expression: str,
+    variables: Optional[Dict[str, float]] = None,
+    format: str = "auto"
+) -> Union[int, float, str]:
+    """Évalue une expression mathématique complète en un seul appel
+    
+    Exemple: "(15 * 8 + 3) / sqrt(49)" ou "prix * (1 + tva)" avec des variables.
+    Opérateurs: + - * / // % ** (ou ^). Constantes: pi, e, tau.
+    
+    Args:
+        expression: Expression à évaluer
+        variables: Valeurs des variables utilisées dans l'expression
+        format: Présentation des grands entiers: 'auto', 'full', 'scientific' ou 'digits'
+    """
+    check_format(format)
+    variables = variables or {}
+    for name in variables:
+        if not name.isidentifier() or name in CONSTANTS or name in FUNCTIONS:
+            raise ValueError(f"Nom de variable invalide: '{name}'")
+    
+    expression = expression.strip()
+    compiled = compile_expression(expression)
+    try:
+        return format_result(evaluate_compiled(compiled, variables), format)
+    except ResultTooLarge:
+        # Trop grand pour la boucle d'événements: le calcul reprend dans le pool
+        key = ("evaluate", expression, tuple(sorted(variables.items())), format)
+        return await run_heavy(key, _evaluate_worker, expression, variables, format)
+
+# Outils sur des tableaux de nombres
+MAX_ARRAY_SIZE = 10_000_000
+MAX_RETURNED_VALUES = 1000
+# Seul répertoire où output_path peut écrire
+ARRAY_OUTPUT_DIR = os.getenv("CALCULATOR_OUTPUT_DIR", "calculator_output")
+NUMBER_SEPARATORS = str.maketrans(",;", "  ")
+
+ELEMENTWISE_OPERATIONS = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "power": np.power,
+    "add_percent": lambda values, pct: values * (1 + pct / 100),
+    "round": lambda values, decimals: np.round(values, int(decimals)),
+}
+UNARY_ARRAY_OPERATIONS = {
+    "sqrt": np.sqrt, "abs": np.abs, "exp": np.exp, "log": np.log, "log10": np.log10, "negate": np.negative,
+}
+CUMULATIVE_OPERATIONS = {
+    "cumsum": np.cumsum, "cumprod": np.cumprod, "diff": np.diff,
+}
+
+def load_numbers(values: Optional[List[float]], path: str, column: str = "") -> np.ndarray:
+    """Charge un tableau de nombres depuis une liste ou un fichier
+    
+    Fichiers acceptés: .npy, CSV avec en-tête (colonne choisie par nom ou par
+    numéro), ou texte libre (nombres séparés par des espaces, virgules ou
+    points-virgules).
+    """
+    if (values is None) == (not path):
+        raise ValueError("Indiquez soit values, soit path")
+    
+    if values is not None:
+        array = np.asarray(values, dtype=float)
+    else:
+        try:
+            if path.lower().endswith(".npy"):
+                array = np.load(path, allow_pickle=False).astype(float).ravel()
+            elif column:
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    reader = csv.reader(f)
+                    header = next(reader, [])
+                    index = int(column) if column.isdigit() else header.index(column)
+                    array = np.array([row[index] for row in reader if len(row) > index and row[index].strip()], dtype=float)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    array = np.array(f.read().translate(NUMBER_SEPARATORS).split(), dtype=float)
+        except FileNotFoundError:
+            raise ValueError(f"Fichier '{path}' non trouvé")
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"Impossible de lire les nombres de '{path}': {e}")
+    
+    if array.size == 0:
+        raise ValueError("Aucune valeur à traiter")
+    if array.size > MAX_ARRAY_SIZE:
+        raise ValueError(f"Trop de valeurs (maximum {MAX_ARRAY_SIZE})")
+    if not np.isfinite(array).all():
+        raise ValueError("Les valeurs doivent être des nombres finis")
+    return array
+
+def _number(value: Any) -> Union[int, float]:
+    """Convertit un scalaire NumPy en nombre JSON"""
+    value = value.item() if hasattr(value, "item") else value
+    return int(value) if isinstance(value, float) and value.is_integer() and abs(value) < 2 ** 53 else value
+
+def resolve_output_path(output_path: str) -> str:
+    """Chemin d'écriture d'un résultat, obligatoirement dans ARRAY_OUTPUT_DIR"""
+    base = os.path.realpath(ARRAY_OUTPUT_DIR)
+    target = os.path.realpath(os.path.join(base, output_path))
+    if os.path.isabs(output_path) or target == base or os.path.commonpath([base, target]) != base:
+        raise ValueError(f"output_path doit être un chemin relatif dans le répertoire de sortie '{ARRAY_OUTPUT_DIR}'")
+    return target
+
+def array_response(result: np.ndarray, summary_only: bool, max_values: int, output_path: str) -> str:
+    """Réponse JSON d'un résultat tableau: résumé, valeurs (tronquées) et fichier de sortie"""
+    if max_values < 0:
+        raise ValueError("max_values doit être positif ou nul")
+    if output_path:
+        output_path = resolve_output_path(output_path)
+    if not np.isfinite(result).all():
+        raise ValueError("Le résultat contient des valeurs non finies (division par zéro, domaine...)")
+    
+    response = {
+        "count": int(result.size),
+        "summary": {
+            "sum": _number(result.sum()),
+            "min": _number(result.min()) if result.size else None,
+            "max": _number(result.max()) if result.size else None,
+            "mean": _number(result.mean()) if result.size else None,
+        }
+    }
+    if output_path:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(map(repr, result.tolist())) + "\n")
+        response["output_path"] = output_path
+    if not summary_only:
+        response["values"] = [_number(value) for value in result[:max_values]]
+        response["truncated"] = bool(result.size > max_values)
+    return json.dumps(response, ensure_ascii=False)
+
+@mcp.tool()
+def array_operation(
+    operation: str,
+    values: Optional[List[float]] = None,
+    path: str = "",
+    column: str = "",
+    operand: Optional[float] = None,
+    other: Optional[List[float]] = None,
+    summary_only: bool = False,
+    max_values: int = MAX_RETURNED_VALUES,
+    output_path: str = ""
+) -> str:
+    """Applique une opération à chaque valeur d'un tableau (calcul vectorisé)
+    
+    Exemple: ajouter 7% de TVA à 10 000 prix avec operation='add_percent', operand=7.
+    
+    Args:
+        operation: add, subtract, multiply, divide, power, add_percent, round (avec operand
+            ou other), ou sqrt, abs, exp, log, log10, negate
+        values: Liste de nombres
+        path: Ou bien un fichier de nombres (.npy, CSV avec column, ou texte)
+        column: Colonne CSV (nom ou numéro)
+        operand: Nombre appliqué à chaque valeur
+        other: Tableau de même taille, combiné valeur par valeur
+        summary_only: Ne renvoie que le résumé (count, sum, min, max, mean)
+        max_values: Nombre maximum de valeurs renvoyées
+        output_path: Écrit toutes les valeurs du résultat dans ce fichier (une par ligne),
+            chemin relatif au répertoire de sortie (CALCULATOR_OUTPUT_DIR)
+    """
+    array = load_numbers(values, path, column)
+    
+    if operation in UNARY_ARRAY_OPERATIONS:
+        function = UNARY_ARRAY_OPERATIONS[operation]
+        with np.errstate(all="ignore"):
+            result = function(array)
+    elif operation in ELEMENTWISE_OPERATIONS:
+        if (operand is None) == (other is None):
+            raise ValueError(f"L'opération '{operation}' demande soit operand, soit other")
+        if operation == "round" and (other is not None or not float(operand).is_integer()):
+            raise ValueError("L'opération 'round' demande un nombre entier de décimales dans operand")
+        argument = operand if other is None else np.asarray(other, dtype=float)
+        if other is not None and argument.shape != array.shape:
+            raise ValueError(f"other doit contenir {array.size} valeurs (reçu {argument.size})")
+        with np.errstate(all="ignore"):
+            result = ELEMENTWISE_OPERATIONS[operation](array, argument)
+    else:
+        available = sorted(ELEMENTWISE_OPERATIONS) + sorted(UNARY_ARRAY_OPERATIONS)
+        raise ValueError(f"Opération inconnue. Disponibles: {', '.join(available)}")
+    
+    return array_response(result, summary_only, max_values, output_path)
+
+@mcp.tool()
+def array_cumulative(
+    operation: str,
+    values: Optional[List[float]] = None,
+    path: str = "",
+    column: str = "",
+    summary_only: bool = False,
+    max_values: int = MAX_RETURNED_VALUES,
+    output_path: str = ""
+) -> str:
+    """Calcule une série cumulative: somme cumulée, produit cumulé ou différences successives
+    
+    Args:
+        operation: 'cumsum', 'cumprod' ou 'diff'
+        values: Liste de nombres
+        path: Ou bien un fichier de nombres (.npy, CSV avec column, ou texte)
+        column: Colonne CSV (nom ou numéro)
+        summary_only: Ne renvoie que le résumé (count, sum, min, max, mean)
+        max_values: Nombre maximum de valeurs renvoyées
+        output_path: Écrit toutes les valeurs du résultat dans ce fichier (une par ligne),
+            chemin relatif au répertoire de sortie (CALCULATOR_OUTPUT_DIR)
+    """
+    if operation not in CUMULATIVE_OPERATIONS:
+        raise ValueError(f"Opération inconnue. Disponibles: {', '.join(CUMULATIVE_OPERATIONS)}")
+    array = load_numbers(values, path, column)
+    with np.errstate(all="ignore"):
+        result = CUMULATIVE_OPERATIONS[operation](array)
+    return array_response(result, summary_only, max_values, output_path)
+
+@mcp.tool()
+def array_statistics(
+    values: Optional[List[float]] = None,
+    path: str = "",
+    column: str = "",
+    percentiles: Optional[List[float]] = None
+) -> str:
+    """Statistiques descriptives d'un tableau de nombres
+    
+    Renvoie count, sum, mean, median, std, var (population et échantillon),
+    min, max, étendue, produit et les percentiles demandés.
+    
+    Args:
+        values: Liste de nombres
+        path: Ou bien un fichier de nombres (.npy, CSV avec column, ou texte)
+        column: Colonne CSV (nom ou numéro)
+        percentiles: Percentiles à calculer, entre 0 et 100 (par défaut 25, 50, 75)
+    """
+    percentiles = percentiles if percentiles is not None else [25, 50, 75]
+    if any(not 0 <= pct <= 100 for pct in percentiles):
+        raise ValueError("Les percentiles doivent être compris entre 0 et 100")
+    array = load_numbers(values, path, column)
+    
+    with np.errstate(all="ignore"):
+        product = np.prod(array)
+    stats = {
+        "count": int(array.size),
+        "sum": _number(array.sum()),
+        "mean": _number(array.mean()),
+        "median": _number(np.median(array)),
+        "std": _number(array.std()),
+        "var": _number(array.var()),
+        "sample_std": _number(array.std(ddof=1)) if array.size > 1 else None,
+        "sample_var": _number(array.var(ddof=1)) if array.size > 1 else None,
+        "min": _number(array.min()),
+        "max": _number(array.max()),
+        "range": _number(np.ptp(array)),
+        "product": _number(product) if np.isfinite(product) else None,
+        "percentiles": {
+            f"p{pct:g}": _number(value) for pct, value in zip(percentiles, np.percentile(array, percentiles))
+        } if percentiles else {},
+    }
+    return json.dumps(stats, ensure_ascii=False)
+
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
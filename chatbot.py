@@ -3,18 +3,31 @@
 Chatbot avec outils FastMCP utilisant JSON-RPC
 """
 
+import os
 import asyncio
 import json
 import re
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 from langchain_openai import AzureChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from mcp_client import MCPClient
+from conversation_trace import TraceRecorder
+from profiling import Profiler, span
 from config import Config
 
+# Serveurs FastMCP, lancés depuis le répertoire du projet quel que soit le répertoire courant
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SERVERS = {
+    "calculator": os.path.join(ROOT, "calculator_server.py"),
+    "filesystem": os.path.join(ROOT, "file_server.py"),
+    "employees": os.path.join(ROOT, "employee_server.py"),
+}
+
 class ChatbotWithTools:
-    def __init__(self):
-        self.llm = AzureChatOpenAI(
+    def __init__(self, llm=None, trace_path: Optional[str] = None, profiler: Optional[Profiler] = None):
+        # Un modèle peut être injecté (benchmarks, tests); par défaut Azure OpenAI
+        self.llm = llm or AzureChatOpenAI(
             azure_endpoint=Config.AZURE_ENDPOINT,
             openai_api_version=Config.AZURE_API_VERSION,
             azure_deployment=Config.AZURE_DEPLOYMENT,
@@ -22,8 +35,12 @@ class ChatbotWithTools:
             temperature=0.1,  # ← Plus déterministe comme dans le test
             max_tokens=Config.MAX_TOKENS
         )
-        self.mcp_client = MCPClient()
+        self.mcp_client = MCPClient(max_message_size=Config.MCP_MAX_MESSAGE_SIZE)
         self.conversation_history = []
+        # Enregistrement optionnel des tours (rejouables avec conversation_trace.py)
+        self.recorder = TraceRecorder(trace_path) if trace_path is not None else None
+        # Profilage par spans des tours (désactivé sans fichier de sortie)
+        self.profiler = profiler or Profiler()
         
     async def initialize(self):
         """Initialise le chatbot et connecte aux serveurs FastMCP"""
@@ -31,17 +48,12 @@ class ChatbotWithTools:
         
         # Connexion aux serveurs FastMCP
         try:
-            success1 = await self.mcp_client.connect_to_server(
-                "calculator", "calculator_server.py"
-            )
-            success2 = await self.mcp_client.connect_to_server(
-                "filesystem", "file_server.py"
-            )
-            success3 = await self.mcp_client.connect_to_server(
-                "employees", "employee_server.py"
-            )
+            results = [
+                await self.mcp_client.connect_to_server(server_name, script_path)
+                for server_name, script_path in SERVERS.items()
+            ]
             
-            if success1 and success2 and success3:
+            if all(results):
                 print("✅ Chatbot FastMCP avec JSON-RPC initialisé avec succès!")
             else:
                 print("⚠️  Certains serveurs FastMCP n'ont pas pu être connectés")
@@ -111,11 +123,33 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
         pattern = r'<tool_call>.*?</tool_call>'
         return re.sub(pattern, '', response, flags=re.DOTALL).strip()
     
+    def _record_tool_call(self, tool_call: Dict[str, Any], result: str, start: float, error: bool = False) -> None:
+        if self.recorder:
+            self.recorder.tool_call(
+                str(tool_call.get("tool")), tool_call.get("arguments"), result,
+                time.perf_counter() - start, error
+            )
+    
+    async def _invoke_llm(self, messages: List[Any], phase: str) -> str:
+        """Appelle le modèle et enregistre sa sortie dans la trace"""
+        start = time.perf_counter()
+        with span(f"llm.{phase}", messages=len(messages)) as llm_span:
+            response = await self.llm.ainvoke(messages)
+            usage = getattr(response, "usage_metadata", None)
+            if llm_span and usage:
+                llm_span.set(input_tokens=usage.get("input_tokens", 0), output_tokens=usage.get("output_tokens", 0))
+                llm_span.trace.root.add("input_tokens", usage.get("input_tokens", 0))
+                llm_span.trace.root.add("output_tokens", usage.get("output_tokens", 0))
+        if self.recorder:
+            self.recorder.llm_output(phase, response.content, time.perf_counter() - start, usage)
+        return response.content
+    
     async def execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[str]:
         """Exécute les appels d'outils FastMCP via JSON-RPC"""
         results = []
         
         for tool_call in tool_calls:
+            start = time.perf_counter()
             try:
                 tool_name = tool_call["tool"]
                 arguments = tool_call["arguments"]
@@ -126,6 +160,7 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
                 else:
                     print(f"⚠️  Format d'outil invalide: {tool_name}")
                     results.append(f"Erreur: Format d'outil invalide")
+                    self._record_tool_call(tool_call, results[-1], start, error=True)
                     continue
                 
                 print(f"🔧 Exécution JSON-RPC: {server_name}.{tool_name} avec {arguments}")
@@ -133,16 +168,29 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
                 # Appelle l'outil FastMCP via JSON-RPC
                 result = await self.mcp_client.call_tool(server_name, tool_name, arguments)
                 results.append(str(result))
+                self._record_tool_call(tool_call, results[-1], start)
                 
             except Exception as e:
                 error_msg = f"Erreur lors de l'exécution de l'outil JSON-RPC: {str(e)}"
                 print(f"❌ {error_msg}")
                 results.append(error_msg)
+                self._record_tool_call(tool_call, error_msg, start, error=True)
         
         return results
     
     async def process_message(self, user_message: str) -> str:
         """Traite un message utilisateur avec FastMCP via JSON-RPC"""
+        if self.recorder:
+            self.recorder.start_turn(user_message)
+        with self.profiler.trace("process_message", user_chars=len(user_message)) as turn:
+            response = await self._process_message(user_message)
+            if turn:
+                turn.set(response_chars=len(response), history=len(self.conversation_history))
+        if self.recorder:
+            self.recorder.end_turn(response)
+        return response
+    
+    async def _process_message(self, user_message: str) -> str:
         try:
             # Ajoute le message à l'historique
             self.conversation_history.append(HumanMessage(content=user_message))
@@ -151,20 +199,23 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
             messages = [SystemMessage(content=self.build_system_prompt())] + self.conversation_history
             
             # Première réponse de l'LLM
-            response = await self.llm.ainvoke(messages)
-            llm_response = response.content
+            llm_response = await self._invoke_llm(messages, "plan")
             
             # Debug: affiche la réponse brute de l'LLM
             print(f"🔍 Réponse LLM: {llm_response[:200]}...")
             
             # Vérifie s'il y a des appels d'outils
-            tool_calls = self.extract_tool_calls(llm_response)
+            with span("extract_tool_calls") as extract_span:
+                tool_calls = self.extract_tool_calls(llm_response)
+                if extract_span:
+                    extract_span.set(tool_calls=len(tool_calls))
             
             if tool_calls:
                 print(f"🔧 {len(tool_calls)} appel(s) d'outil détecté(s)")
                 
                 # Exécute les outils FastMCP via JSON-RPC
-                tool_results = await self.execute_tool_calls(tool_calls)
+                with span("execute_tool_calls", tool_calls=len(tool_calls)):
+                    tool_results = await self.execute_tool_calls(tool_calls)
                 
                 # Supprime les appels d'outils de la réponse
                 clean_response = self.remove_tool_calls_from_response(llm_response)
@@ -186,8 +237,7 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
                     HumanMessage(content="Basé sur les résultats des outils JSON-RPC, donnez une réponse finale complète à l'utilisateur.")
                 ]
                 
-                final_response = await self.llm.ainvoke(final_messages)
-                final_answer = final_response.content
+                final_answer = await self._invoke_llm(final_messages, "final")
                 
                 self.conversation_history.append(SystemMessage(content=final_answer))
                 
@@ -232,7 +282,10 @@ RÈGLE ABSOLUE: Répondez TOUJOURS avec un <tool_call>. Sinon c'est une ERREUR."
 
 async def main():
     # Initialise le chatbot FastMCP avec JSON-RPC
-    chatbot = ChatbotWithTools()
+    profiler = Profiler(
+        Config.CHATBOT_PROFILE_FILE, Config.CHATBOT_PROFILE_FORMAT, Config.CHATBOT_PROFILE_SAMPLE_RATE
+    )
+    chatbot = ChatbotWithTools(trace_path=Config.CHATBOT_TRACE_FILE, profiler=profiler)
     
     try:
         await chatbot.initialize()
@@ -20,6 +20,17 @@ class Config:
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
     
+    # Taille maximale d'un message JSON-RPC reçu des serveurs MCP (octets)
+    MCP_MAX_MESSAGE_SIZE = int(os.getenv("MCP_MAX_MESSAGE_SIZE", str(64 * 1024 * 1024)))
+    
+    # Trace JSONL des conversations (désactivée si vide)
+    CHATBOT_TRACE_FILE = os.getenv("CHATBOT_TRACE_FILE") or None
+    
+    # Profilage par spans des tours: fichier (désactivé si vide), format chrome ou otlp, taux d'échantillonnage
+    CHATBOT_PROFILE_FILE = os.getenv("CHATBOT_PROFILE_FILE") or None
+    CHATBOT_PROFILE_FORMAT = os.getenv("CHATBOT_PROFILE_FORMAT", "chrome")
+    CHATBOT_PROFILE_SAMPLE_RATE = float(os.getenv("CHATBOT_PROFILE_SAMPLE_RATE", "1.0"))
+    
     @classmethod
     def validate(cls):
         """Valide la configuration"""
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Enregistrement et rejeu des conversations du chatbot
+
+Chaque tour est écrit sur une ligne JSON: message utilisateur, sorties du
+modèle, appels d'outils avec leurs résultats et leurs durées. Le rejeu relance
+les mêmes tours contre les vrais serveurs MCP en substituant au modèle ses
+sorties enregistrées, puis compare la latence des outils entre les deux
+exécutions.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Taille maximale d'un résultat d'outil conservé dans la trace
+TRACE_MAX_RESULT_CHARS = 10_000
+REGRESSION_THRESHOLD = 1.2
+
+class TraceRecorder:
+    """Écrit les tours de conversation dans un fichier JSONL
+
+    Chaque tour est écrit et vidé dès qu'il se termine: une session
+    interrompue garde ses tours précédents. Sans fichier, les tours sont
+    seulement conservés en mémoire (rejeu).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_result_chars: int = TRACE_MAX_RESULT_CHARS):
+        self.path = path
+        self.max_result_chars = max_result_chars
+        self.session = uuid.uuid4().hex[:12]
+        self.turns: List[Dict[str, Any]] = []
+        self.current: Optional[Dict[str, Any]] = None
+        self.turn_start = 0.0
+
+    def start_turn(self, user_message: str) -> None:
+        self.turn_start = time.perf_counter()
+        self.current = {
+            "session": self.session,
+            "turn": len(self.turns) + 1,
+            "timestamp": datetime.now().isoformat(),
+            "user": user_message,
+            "llm": [],
+            "tool_calls": [],
+        }
+
+    def llm_output(self, phase: str, content: str, duration: float, usage: Optional[Dict[str, Any]] = None) -> None:
+        if self.current is None:
+            return
+        entry = {"phase": phase, "content": content, "duration_ms": round(duration * 1000, 3)}
+        if usage:
+            entry["usage"] = usage
+        self.current["llm"].append(entry)
+
+    def tool_call(self, tool: str, arguments: Any, result: str, duration: float, error: bool = False) -> None:
+        if self.current is None:
+            return
+        self.current["tool_calls"].append({
+            "tool": tool,
+            "arguments": arguments,
+            "result": result[:self.max_result_chars],
+            "result_length": len(result),
+            "result_sha1": hashlib.sha1(result.encode("utf-8", "replace")).hexdigest(),
+            "error": error,
+            "duration_ms": round(duration * 1000, 3),
+        })
+
+    def end_turn(self, response: str) -> None:
+        if self.current is None:
+            return
+        turn, self.current = self.current, None
+        turn["response"] = response
+        turn["duration_ms"] = round((time.perf_counter() - self.turn_start) * 1000, 3)
+        self.turns.append(turn)
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Lit les tours d'une trace JSONL (les lignes vides sont ignorées)"""
+    turns = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    turns.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Ligne {number} invalide dans '{path}': {e}")
+    return turns
+
+class ReplayChatModel:
+    """Modèle qui rejoue, dans l'ordre, les sorties enregistrées d'une trace"""
+
+    def __init__(self, turns: List[Dict[str, Any]]):
+        from langchain.schema import AIMessage
+
+        self.message_class = AIMessage
+        self.outputs = [(entry["content"], entry.get("usage")) for turn in turns for entry in turn["llm"]]
+        self.position = 0
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        if self.position >= len(self.outputs):
+            raise RuntimeError("Trace épuisée: plus de sorties enregistrées à rejouer")
+        content, usage = self.outputs[self.position]
+        self.position += 1
+        return self.message_class(content=content, usage_metadata=usage) if usage else self.message_class(content=content)
+
+def compare_runs(recorded: List[Dict[str, Any]], replayed: List[Dict[str, Any]],
+                 threshold: float = REGRESSION_THRESHOLD) -> Dict[str, Any]:
+    """Compare la latence et les résultats des outils entre deux exécutions"""
+    durations: Dict[str, Dict[str, List[float]]] = {}
+    changed = []
+    for before, after in zip(recorded, replayed):
+        for call_before, call_after in zip(before["tool_calls"], after["tool_calls"]):
+            tool = call_before["tool"]
+            durations.setdefault(tool, {"recorded": [], "replayed": []})
+            durations[tool]["recorded"].append(call_before["duration_ms"])
+            durations[tool]["replayed"].append(call_after["duration_ms"])
+            if call_before["result_sha1"] != call_after["result_sha1"]:
+                changed.append({"turn": before["turn"], "tool": tool})
+
+    tools = {}
+    for tool, values in durations.items():
+        recorded_p50 = statistics.median(values["recorded"])
+        replayed_p50 = statistics.median(values["replayed"])
+        ratio = replayed_p50 / recorded_p50 if recorded_p50 else None
+        tools[tool] = {
+            "appels": len(values["recorded"]),
+            "p50_enregistre_ms": round(recorded_p50, 3),
+            "p50_rejoue_ms": round(replayed_p50, 3),
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "regression": ratio is not None and ratio > threshold,
+        }
+
+    return {
+        "tours": len(replayed),
+        "temps_outils_enregistre_ms": round(sum(c["duration_ms"] for t in recorded for c in t["tool_calls"]), 3),
+        "temps_outils_rejoue_ms": round(sum(c["duration_ms"] for t in replayed for c in t["tool_calls"]), 3),
+        "outils": tools,
+        "resultats_differents": changed,
+    }
+
+async def replay_trace(path: str, output: Optional[str] = None, threshold: float = REGRESSION_THRESHOLD) -> Dict[str, Any]:
+    """Rejoue une trace contre les serveurs MCP et compare la latence des outils"""
+    from chatbot import ChatbotWithTools
+
+    recorded = load_trace(path)
+    if not recorded:
+        raise ValueError(f"Trace vide: '{path}'")
+
+    chatbot = ChatbotWithTools(llm=ReplayChatModel(recorded))
+    # Les tours rejoués restent en mémoire pour la comparaison, et dans output si demandé
+    chatbot.recorder = TraceRecorder(output)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await chatbot.initialize()
+            for turn in recorded:
+                await chatbot.process_message(turn["user"])
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await chatbot.cleanup()
+
+    return compare_runs(recorded, chatbot.recorder.turns, threshold)
+
+def print_comparison(report: Dict[str, Any]) -> None:
+    print(f"\n🔁 {report['tours']} tours rejoués | temps des outils: "
+          f"{report['temps_outils_enregistre_ms']} ms enregistrés, {report['temps_outils_rejoue_ms']} ms rejoués")
+    print(f"   {'Outil':<40}{'appels':>8}{'avant ms':>12}{'après ms':>12}{'ratio':>8}")
+    for tool, stats in sorted(report["outils"].items()):
+        flag = "⚠️ " if stats["regression"] else "  "
+        print(f" {flag}{tool:<40}{stats['appels']:>8}{stats['p50_enregistre_ms']:>12}"
+              f"{stats['p50_rejoue_ms']:>12}{stats['ratio'] if stats['ratio'] is not None else '-':>8}")
+    if report["resultats_differents"]:
+        print(f"\n⚠️  {len(report['resultats_differents'])} résultat(s) d'outil différent(s) de la trace:")
+        for change in report["resultats_differents"]:
+            print(f"   • tour {change['turn']}: {change['tool']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue une trace de conversation contre les serveurs MCP")
+    parser.add_argument("trace", help="Trace JSONL enregistrée par le chatbot (CHATBOT_TRACE_FILE)")
+    parser.add_argument("--output", help="Trace JSONL du rejeu")
+    parser.add_argument("--report", help="Rapport de comparaison JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Ratio de latence p50 au-delà duquel un outil est signalé")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay_trace(args.trace, args.output, args.threshold))
+    print_comparison(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Rapport enregistré dans '{args.report}'")
+
+if __name__ == "__main__":
+    main()
@@ -3,42 +3,990 @@
 Serveur MCP Employee Management - Version FastMCP avec décorateurs
 """
 
+import base64
+import bisect
+import csv
+import functools
+import heapq
 import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import tempfile
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, date
+from urllib.parse import quote, unquote
+
+import numpy as np
 from mcp.server.fastmcp import FastMCP
+from pydantic import AnyUrl
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Préfixes des ressources MCP exposant les employés
+EMPLOYEE_RESOURCE_PREFIX = "employees://"
+DEPARTMENT_RESOURCE_PREFIX = "employees://departement/"
+
+def employee_resource_uri(employee_id: int) -> str:
+    """URI de la ressource d'un employé"""
+    return f"{EMPLOYEE_RESOURCE_PREFIX}{employee_id}"
+
+def department_resource_uri(departement: str) -> str:
+    """URI canonique de la ressource d'un département (insensible à la casse)"""
+    return DEPARTMENT_RESOURCE_PREFIX + quote(departement.lower(), safe='')
+
+def canonical_resource_uri(uri: str) -> str:
+    """Forme canonique d'une URI de ressource, pour comparer abonnements et modifications"""
+    if uri.startswith(DEPARTMENT_RESOURCE_PREFIX):
+        return department_resource_uri(unquote(uri[len(DEPARTMENT_RESOURCE_PREFIX):]))
+    return uri
+
+class EmployeeMCP(FastMCP):
+    """Serveur FastMCP notifiant les abonnés des ressources employés modifiées
+    
+    Les outils d'écriture signalent les ressources modifiées; les notifications
+    resources/updated sont envoyées aux abonnés à la fin de l'appel, avant la
+    réponse de l'outil, pour qu'un client invalide son cache avant de la lire.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.subscriptions: Set[str] = set()
+        self.pending_updates: Set[str] = set()
+        self.all_updated = False
+        self._mcp_server.subscribe_resource()(self.subscribe_resource)
+        self._mcp_server.unsubscribe_resource()(self.unsubscribe_resource)
+
+    async def subscribe_resource(self, uri: AnyUrl) -> None:
+        self.subscriptions.add(str(uri))
+
+    async def unsubscribe_resource(self, uri: AnyUrl) -> None:
+        self.subscriptions.discard(str(uri))
+
+    def resources_updated(self, uris: Set[str]) -> None:
+        """Signale des ressources modifiées (URIs canoniques)
+        
+        Seules les ressources ayant un abonné sont retenues: l'ensemble en
+        attente reste borné par les abonnements, même quand les outils sont
+        appelés directement, hors requête MCP.
+        """
+        if not self.subscriptions:
+            return
+        subscribed = {canonical_resource_uri(uri) for uri in self.subscriptions}
+        self.pending_updates |= uris & subscribed
+
+    def all_resources_updated(self) -> None:
+        """Signale une modification externe: toutes les ressources sont à relire"""
+        self.all_updated = True
+
+    async def notify_resource_updates(self) -> None:
+        """Envoie les notifications resources/updated en attente aux abonnés"""
+        if self.all_updated:
+            uris = set(self.subscriptions)
+        else:
+            uris = {uri for uri in self.subscriptions if canonical_resource_uri(uri) in self.pending_updates}
+        self.pending_updates.clear()
+        self.all_updated = False
+        
+        if not uris:
+            return
+        
+        try:
+            session = self.get_context().session
+        except ValueError:
+            # Appel hors requête MCP: personne à notifier
+            return
+        
+        for uri in sorted(uris):
+            await session.send_resource_updated(AnyUrl(uri))
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        try:
+            return await super().call_tool(name, arguments)
+        finally:
+            await self.notify_resource_updates()
+
+    async def read_resource(self, uri: Any) -> Any:
+        try:
+            return await super().read_resource(uri)
+        finally:
+            await self.notify_resource_updates()
 
 # Création du serveur FastMCP
-mcp = FastMCP("Employee Management Service")
+mcp = EmployeeMCP("Employee Management Service")
 
 # Fichier de stockage des employés
 EMPLOYEES_FILE = "employees.json"
 
+# Verrou inter-processus protégeant les écritures du fichier des employés
+EMPLOYEES_LOCK_FILE = EMPLOYEES_FILE + ".lock"
+LOCK_TIMEOUT = float(os.getenv("EMPLOYEES_LOCK_TIMEOUT", "10"))
+
+def read_employees_file() -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, int, int]]]:
+    """Lit le fichier JSON et retourne les employés avec la signature du fichier lu"""
+    try:
+        with open(EMPLOYEES_FILE, 'r', encoding='utf-8') as f:
+            # La signature est prise sur le descripteur ouvert: elle correspond
+            # exactement au contenu lu, même si le fichier est remplacé entre-temps
+            stat = os.fstat(f.fileno())
+            return json.load(f), (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except FileNotFoundError:
+        return [], None
+    except json.JSONDecodeError as e:
+        # Ne jamais retourner une liste vide: la prochaine écriture effacerait les données
+        raise ValueError(f"Fichier des employés corrompu ({EMPLOYEES_FILE}): {e}")
+
 def load_employees() -> List[Dict[str, Any]]:
     """Charge les employés depuis le fichier JSON"""
-    if not os.path.exists(EMPLOYEES_FILE):
-        return []
+    return read_employees_file()[0]
+
+def save_employees(employees: List[Dict[str, Any]]) -> None:
+    """Sauvegarde les employés dans le fichier JSON
     
+    L'écriture se fait dans un fichier temporaire du même répertoire, puis le
+    fichier est remplacé atomiquement: un lecteur ou un crash ne voit jamais
+    de fichier partiellement écrit.
+    """
+    directory = os.path.dirname(os.path.abspath(EMPLOYEES_FILE))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".employees-", suffix=".tmp")
     try:
-        with open(EMPLOYEES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(employees, f, indent=2, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, EMPLOYEES_FILE)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
 
-def save_employees(employees: List[Dict[str, Any]]) -> None:
-    """Sauvegarde les employés dans le fichier JSON"""
-    with open(EMPLOYEES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(employees, f, indent=2, ensure_ascii=False, default=str)
+@contextmanager
+def employees_lock(timeout: float = LOCK_TIMEOUT):
+    """Verrou exclusif inter-processus sur le fichier des employés
+    
+    Les lectures n'en ont pas besoin (le remplacement est atomique), seules les
+    séquences lecture-modification-écriture sont sérialisées.
+    """
+    deadline = time.monotonic() + timeout
+    with open(EMPLOYEES_LOCK_FILE, 'a+b') as lock_file:
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise ValueError("Le fichier des employés est verrouillé par un autre processus, réessayez")
+                time.sleep(0.01)
+        
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def exclusive_write(func):
+    """Décorateur exécutant un outil de modification sous le verrou des employés"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with employees_lock():
+            return func(*args, **kwargs)
+    return wrapper
+
+def check_version(employee: Dict[str, Any], expected_version: Optional[int]) -> None:
+    """Vérification optimiste: échoue si l'employé a été modifié entre-temps"""
+    if expected_version is not None and employee.get('version', 1) != expected_version:
+        raise ValueError(
+            f"Conflit de version pour l'employé {employee.get('id')}: "
+            f"version attendue {expected_version}, version actuelle {employee.get('version', 1)}"
+        )
+
+def touch_employee(employee: Dict[str, Any]) -> None:
+    """Met à jour la date de modification et incrémente la version d'un employé"""
+    employee['date_modification'] = datetime.now().isoformat()
+    employee['version'] = employee.get('version', 1) + 1
+
+def file_signature() -> Optional[Tuple[int, int, int]]:
+    """Retourne la signature (mtime, taille, inode) du fichier des employés"""
+    try:
+        stat = os.stat(EMPLOYEES_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+# Champs indexés pour la recherche et leur poids dans le classement
+SEARCH_FIELD_WEIGHTS = {
+    'nom': 3.0,
+    'prenom': 3.0,
+    'email': 2.0,
+    'poste': 1.5,
+    'departement': 1.0
+}
+
+def normalize_text(text: str) -> str:
+    """Normalise un texte pour la recherche (minuscules, sans accents)"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def trigrams(text: str) -> Set[str]:
+    """Découpe un texte normalisé en trigrammes"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """Index trigramme des champs de recherche des employés
+
+    Chaque trigramme pointe vers les IDs des employés dont un champ indexé le
+    contient; les champs de moins de 3 caractères sont indexés tels quels.
+    Une recherche intersecte les listes des trigrammes du terme puis vérifie
+    les candidats, sans parcourir l'ensemble des employés. Un terme de moins
+    de 3 caractères parcourt les clés de l'index (les trigrammes distincts,
+    quelques milliers) plutôt que les employés. L'index ne conserve que des
+    IDs: les enregistrements sont lus dans le dictionnaire partagé by_id.
+    """
+
+    def __init__(self, employees: Dict[int, Dict[str, Any]]):
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.employees = employees
+
+    @staticmethod
+    def fields(employee: Dict[str, Any]) -> Dict[str, str]:
+        """Champs de recherche normalisés d'un employé"""
+        return {field: normalize_text(str(employee.get(field) or '')) for field in SEARCH_FIELD_WEIGHTS}
+
+    @classmethod
+    def keys(cls, employee: Dict[str, Any]) -> Set[str]:
+        """Clés indexées: trigrammes des champs, ou le champ entier s'il est plus court"""
+        keys = set()
+        for value in cls.fields(employee).values():
+            keys |= trigrams(value) if len(value) >= 3 else ({value} if value else set())
+        return keys
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        """Ajoute un employé dans l'index (à retirer d'abord s'il y figure déjà)"""
+        emp_id = employee.get('id')
+        for key in self.keys(employee):
+            self.postings[key].add(emp_id)
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        """Retire un employé de l'index"""
+        emp_id = employee.get('id')
+        for key in self.keys(employee):
+            ids = self.postings.get(key)
+            if ids is not None:
+                ids.discard(emp_id)
+                if not ids:
+                    del self.postings[key]
+
+    def search(self, term: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Recherche un terme (sous-chaîne) et retourne les meilleurs résultats et le nombre total"""
+        needle = normalize_text(term.strip())
+        
+        if len(needle) >= 3:
+            posting_lists = sorted((self.postings.get(gram, set()) for gram in trigrams(needle)), key=len)
+            candidates = posting_lists[0].intersection(*posting_lists[1:])
+        else:
+            # Terme trop court pour les trigrammes: toute clé qui le contient
+            candidates = set()
+            for key, ids in self.postings.items():
+                if needle in key:
+                    candidates |= ids
+        
+        scored = []
+        for emp_id in candidates:
+            score = self._score(self.fields(self.employees[emp_id]), needle)
+            if score:
+                scored.append((score, emp_id))
+        
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [self.employees[emp_id] for _, emp_id in best], len(scored)
+
+    @staticmethod
+    def _score(fields: Dict[str, str], needle: str) -> float:
+        """Calcule la pertinence d'un employé pour un terme normalisé"""
+        score = 0.0
+        for field, value in fields.items():
+            position = value.find(needle)
+            if position < 0:
+                continue
+            weight = SEARCH_FIELD_WEIGHTS[field]
+            if value == needle:
+                score += weight * 3
+            elif position == 0 or not value[position - 1].isalnum():
+                score += weight * 2
+            else:
+                score += weight
+        return score
+
+def levenshtein(a: str, b: str, cutoff: Optional[int] = None) -> int:
+    """Distance d'édition (insertion, suppression, substitution) entre deux chaînes
+    
+    Si cutoff est fourni, le calcul s'arrête dès que la distance le dépasse
+    forcément et retourne cutoff + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if cutoff is not None and len(a) - len(b) > cutoff:
+        return cutoff + 1
+    
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if cutoff is not None and min(current) > cutoff:
+            return cutoff + 1
+        previous = current
+    return previous[-1]
+
+# Distance d'édition maximale de la recherche approchée et longueur de préfixe indexée
+MAX_FUZZY_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 7
+
+def deletion_variants(word: str, max_distance: int) -> Set[str]:
+    """Retourne les variantes d'un mot obtenues en supprimant jusqu'à max_distance caractères"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+class NameIndex:
+    """Index tolérant aux fautes sur les mots des prénoms, noms et emails
+    
+    Index par suppressions symétriques: chaque mot est enregistré sous toutes
+    ses variantes à MAX_FUZZY_DISTANCE suppressions près (sur un préfixe borné).
+    Deux mots à distance d'édition k partagent une variante obtenue par au plus
+    k suppressions de chaque côté: une recherche se limite donc à quelques
+    dizaines d'accès au dictionnaire, suivis d'une vérification par distance
+    d'édition. L'index porte sur les mots distincts, qui se répètent beaucoup
+    d'un employé à l'autre.
+    """
+
+    def __init__(self):
+        self.terms: Dict[str, Set[int]] = {}
+        self.variants: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def tokens(text: str) -> List[str]:
+        """Découpe un texte normalisé en mots (lettres uniquement)"""
+        return re.findall(r'[^\W\d_]+', normalize_text(text))
+
+    @classmethod
+    def keys(cls, employee: Dict[str, Any]) -> Set[str]:
+        """Mots indexés pour un employé: prénom, nom et partie locale de l'email"""
+        email = str(employee.get('email') or '').split('@')[0]
+        return set(cls.tokens(f"{employee.get('prenom') or ''} {employee.get('nom') or ''} {email}"))
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        emp_id = employee.get('id')
+        for term in self.keys(employee):
+            ids = self.terms.get(term)
+            if ids is None:
+                self.terms[term] = {emp_id}
+                for variant in deletion_variants(term[:FUZZY_PREFIX_LENGTH], MAX_FUZZY_DISTANCE):
+                    self.variants.setdefault(variant, set()).add(term)
+            else:
+                ids.add(emp_id)
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        emp_id = employee.get('id')
+        for term in self.keys(employee):
+            ids = self.terms.get(term)
+            if ids is None:
+                continue
+            
+            ids.discard(emp_id)
+            if not ids:
+                del self.terms[term]
+                for variant in deletion_variants(term[:FUZZY_PREFIX_LENGTH], MAX_FUZZY_DISTANCE):
+                    terms = self.variants.get(variant)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self.variants[variant]
+
+    def search_terms(self, query: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Retourne les mots indexés à distance au plus max_distance d'un mot"""
+        candidates: Set[str] = set()
+        for variant in deletion_variants(query[:FUZZY_PREFIX_LENGTH], max_distance):
+            candidates |= self.variants.get(variant, set())
+        
+        results = []
+        for term in candidates:
+            distance = levenshtein(query, term, max_distance)
+            if distance <= max_distance:
+                results.append((term, distance))
+        return results
+
+    def search(self, text: str, max_distance: int) -> Dict[int, Tuple[int, str]]:
+        """Retourne, pour chaque employé correspondant à tous les mots, la distance totale et les mots trouvés"""
+        # Le domaine d'un email n'est pas indexé
+        matches: Optional[Dict[int, Tuple[int, str]]] = None
+        for query in dict.fromkeys(self.tokens(text.split('@')[0])):
+            # Meilleure distance de ce mot pour chaque employé
+            best: Dict[int, Tuple[int, str]] = {}
+            for term, distance in self.search_terms(query, max_distance):
+                for emp_id in self.terms[term]:
+                    if emp_id not in best or distance < best[emp_id][0]:
+                        best[emp_id] = (distance, term)
+            
+            if matches is None:
+                matches = best
+            else:
+                # Tous les mots de la requête doivent correspondre, dans la limite totale
+                matches = {
+                    emp_id: (matches[emp_id][0] + distance, f"{matches[emp_id][1]} {term}")
+                    for emp_id, (distance, term) in best.items()
+                    if emp_id in matches and matches[emp_id][0] + distance <= max_distance
+                }
+            if not matches:
+                return {}
+        
+        return matches or {}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Calcule un percentile (interpolation linéaire) sur une liste triée"""
+    if not sorted_values:
+        raise ValueError("Aucune valeur disponible")
+    if not 0 <= pct <= 100:
+        raise ValueError("Le percentile doit être compris entre 0 et 100")
+    
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+class DepartmentAggregate:
+    """Agrégats maintenus en continu pour un département
+    
+    Les salaires et dates d'embauche sont conservés dans des listes triées
+    (multiensembles) pour obtenir minimum, maximum, médiane et percentiles
+    sans parcourir les employés. Les dates d'embauche invalides sont ignorées.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.total = 0
+        self.actifs = 0
+        self.salary_cents = 0
+        self.ids: Set[int] = set()
+        self.salaries: List[float] = []
+        self.hire_dates: List[str] = []
+        self.active_hire_dates: List[str] = []
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        """Comptabilise un employé dans le département"""
+        hire_date = _iso_date(employee.get('date_embauche', ''))
+        self.total += 1
+        self.ids.add(employee.get('id'))
+        if hire_date:
+            bisect.insort(self.hire_dates, hire_date)
+        
+        if employee.get('actif', True):
+            salary = float(employee.get('salaire', 0))
+            self.actifs += 1
+            self.salary_cents += round(salary * 100)
+            bisect.insort(self.salaries, salary)
+            if hire_date:
+                bisect.insort(self.active_hire_dates, hire_date)
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        """Retire un employé des agrégats du département"""
+        hire_date = _iso_date(employee.get('date_embauche', ''))
+        self.total -= 1
+        self.ids.discard(employee.get('id'))
+        if hire_date:
+            _remove_sorted(self.hire_dates, hire_date)
+        
+        if employee.get('actif', True):
+            salary = float(employee.get('salaire', 0))
+            self.actifs -= 1
+            self.salary_cents -= round(salary * 100)
+            _remove_sorted(self.salaries, salary)
+            if hire_date:
+                _remove_sorted(self.active_hire_dates, hire_date)
+
+    @property
+    def salary_total(self) -> float:
+        return self.salary_cents / 100
+
+    @classmethod
+    def merge(cls, name: str, aggregates: List["DepartmentAggregate"]) -> "DepartmentAggregate":
+        """Fusionne plusieurs agrégats (ex: même département avec une casse différente)"""
+        if len(aggregates) == 1:
+            return aggregates[0]
+        
+        merged = cls(name)
+        for agg in aggregates:
+            merged.total += agg.total
+            merged.actifs += agg.actifs
+            merged.salary_cents += agg.salary_cents
+            merged.ids |= agg.ids
+        merged.salaries = list(heapq.merge(*(agg.salaries for agg in aggregates)))
+        merged.hire_dates = list(heapq.merge(*(agg.hire_dates for agg in aggregates)))
+        merged.active_hire_dates = list(heapq.merge(*(agg.active_hire_dates for agg in aggregates)))
+        return merged
+
+def _remove_sorted(values: List[Any], value: Any) -> None:
+    """Retire une occurrence d'une valeur d'une liste triée"""
+    position = bisect.bisect_left(values, value)
+    if position < len(values) and values[position] == value:
+        values.pop(position)
+
+class DepartmentIndex:
+    """Agrégats par département, et pour toute l'entreprise, maintenus à chaque mutation"""
+
+    def __init__(self):
+        self.departments: Dict[str, DepartmentAggregate] = {}
+        self.total = DepartmentAggregate("Entreprise")
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        name = employee.get('departement', 'Non défini')
+        if name not in self.departments:
+            self.departments[name] = DepartmentAggregate(name)
+        self.departments[name].add(employee)
+        self.total.add(employee)
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        name = employee.get('departement', 'Non défini')
+        aggregate = self.departments.get(name)
+        if aggregate is None:
+            return
+        
+        aggregate.remove(employee)
+        self.total.remove(employee)
+        if aggregate.total <= 0:
+            del self.departments[name]
+
+    def find(self, departement: str) -> Optional[DepartmentAggregate]:
+        """Retourne les agrégats d'un département (comparaison insensible à la casse)"""
+        matching = [agg for name, agg in self.departments.items() if name.lower() == departement.lower()]
+        if not matching:
+            return None
+        return DepartmentAggregate.merge(departement, matching)
+
+    def company(self) -> DepartmentAggregate:
+        """Retourne les agrégats de toute l'entreprise (ne pas modifier)"""
+        return self.total
 
-def generate_employee_id() -> int:
+def _date_ordinal(value: Any) -> int:
+    """Convertit une date YYYY-MM-DD en ordinal (0 si invalide)"""
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').toordinal()
+    except ValueError:
+        return 0
+
+def _iso_date(value: Any) -> str:
+    """Normalise une date YYYY-MM-DD (chaîne vide si invalide)"""
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return ""
+
+class ColumnarView:
+    """Vue colonnaire des champs numériques et catégoriels des employés
+    
+    Chaque colonne est un tableau compact (module array) copié en bloc vers
+    NumPy au moment des requêtes. Les catégories (département, poste) sont
+    encodées par des entiers. Une suppression déplace la dernière ligne à la
+    place de la ligne supprimée pour garder les colonnes denses.
+    """
+
+    CATEGORIES = ('departement', 'poste')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.salaries = array('d')
+        self.hire_ordinals = array('q')
+        self.active = array('b')
+        self.codes = {field: array('q') for field in self.CATEGORIES}
+        self.labels: Dict[str, List[str]] = {field: [] for field in self.CATEGORIES}
+        self.label_codes: Dict[str, Dict[str, int]] = {field: {} for field in self.CATEGORIES}
+        self.rows: Dict[int, int] = {}
+
+    def _code(self, field: str, label: str) -> int:
+        """Retourne le code entier d'une catégorie, créé si nécessaire"""
+        codes = self.label_codes[field]
+        if label not in codes:
+            codes[label] = len(self.labels[field])
+            self.labels[field].append(label)
+        return codes[label]
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        emp_id = employee.get('id')
+        self.rows[emp_id] = len(self.ids)
+        self.ids.append(emp_id)
+        self.salaries.append(float(employee.get('salaire', 0)))
+        self.hire_ordinals.append(_date_ordinal(employee.get('date_embauche', '')))
+        self.active.append(1 if employee.get('actif', True) else 0)
+        for field in self.CATEGORIES:
+            self.codes[field].append(self._code(field, str(employee.get(field, 'Non défini'))))
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        row = self.rows.pop(employee.get('id'), None)
+        if row is None:
+            return
+        
+        last = len(self.ids) - 1
+        columns = [self.ids, self.salaries, self.hire_ordinals, self.active] + list(self.codes.values())
+        if row != last:
+            for column in columns:
+                column[row] = column[last]
+            self.rows[self.ids[row]] = row
+        for column in columns:
+            column.pop()
+
+    def column(self, name: str) -> np.ndarray:
+        """Retourne une copie d'une colonne sous forme de tableau NumPy
+        
+        La copie libère immédiatement le tampon: un tableau array exporté ne
+        peut plus être agrandi par les mutations suivantes.
+        """
+        values = self.codes[name] if name in self.codes else getattr(self, name)
+        return np.array(values, dtype=np.dtype(values.typecode))
+
+def _sort_value(employee: Dict[str, Any], sort_by: str) -> Any:
+    """Retourne la valeur de tri d'un employé"""
+    value = employee.get(sort_by)
+    if sort_by in ('id', 'salaire'):
+        return value if value is not None else 0
+    return normalize_text(str(value or ''))
+
+class SortIndex:
+    """Clés de tri (valeur normalisée, id) maintenues triées pour list_employees
+    
+    Une vue est construite au premier tri sur un champ (et pour un département
+    donné, le cas échéant), puis maintenue par insertion dichotomique à chaque
+    mutation: une page se lit par bisection sur la position du curseur.
+    """
+
+    def __init__(self):
+        self.views: Dict[Tuple[str, str], List[Tuple[Any, int]]] = {}
+
+    def view(self, sort_by: str, departement: str, employees: Any) -> List[Tuple[Any, int]]:
+        """Retourne la vue triée d'un champ, construite à partir des employés si besoin"""
+        key = (sort_by, departement.lower())
+        if key not in self.views:
+            self.views[key] = sorted((_sort_value(emp, sort_by), emp.get('id')) for emp in employees)
+        return self.views[key]
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        departement = str(employee.get('departement', 'Non défini')).lower()
+        for (sort_by, scope), keys in self.views.items():
+            if not scope or scope == departement:
+                bisect.insort(keys, (_sort_value(employee, sort_by), employee.get('id')))
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        departement = str(employee.get('departement', 'Non défini')).lower()
+        for (sort_by, scope), keys in self.views.items():
+            if not scope or scope == departement:
+                _remove_sorted(keys, (_sort_value(employee, sort_by), employee.get('id')))
+
+class EmployeeIndexes:
+    """Ensemble des index maintenus en mémoire sur les employés"""
+
+    def __init__(self, employees: List[Dict[str, Any]]):
+        self.by_id: Dict[int, Dict[str, Any]] = {}
+        self.search = TrigramIndex(self.by_id)
+        self.departments = DepartmentIndex()
+        self.columns = ColumnarView()
+        self.names = NameIndex()
+        self.sorted = SortIndex()
+        for emp in employees:
+            self.add(emp)
+
+    def add(self, employee: Dict[str, Any]) -> None:
+        self.by_id[employee.get('id')] = employee
+        self.search.add(employee)
+        self.departments.add(employee)
+        self.columns.add(employee)
+        self.names.add(employee)
+        self.sorted.add(employee)
+
+    def remove(self, employee: Dict[str, Any]) -> None:
+        self.by_id.pop(employee.get('id'), None)
+        self.search.remove(employee)
+        self.departments.remove(employee)
+        self.columns.remove(employee)
+        self.names.remove(employee)
+        self.sorted.remove(employee)
+
+class EmployeeCache:
+    """Cache en mémoire du fichier des employés et de ses index
+    
+    Le cache est validé à chaque accès par la signature (mtime, taille, inode)
+    du fichier: une modification sur disque, y compris par un autre processus,
+    provoque un rechargement. Les écritures de ce serveur mettent à jour le
+    cache et les index de manière incrémentale, sans relire le fichier.
+    """
+
+    def __init__(self, on_external_change: Optional[Any] = None):
+        self.on_external_change = on_external_change
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self.employees: Optional[List[Dict[str, Any]]] = None
+        self.indexes: Optional[EmployeeIndexes] = None
+        self.hits = 0
+        self.reloads = 0
+        self.incremental_updates = 0
+
+    def _validate(self) -> None:
+        """Recharge le fichier s'il a changé depuis la dernière lecture"""
+        if self.employees is not None and file_signature() == self.signature:
+            self.hits += 1
+            return
+        
+        if self.employees is not None and self.on_external_change is not None:
+            self.on_external_change()
+        
+        self.employees, self.signature = read_employees_file()
+        self.indexes = None
+        self.reloads += 1
+
+    def get_employees(self) -> List[Dict[str, Any]]:
+        """Retourne les employés en cache (ne pas modifier)"""
+        self._validate()
+        return self.employees
+
+    def get_employees_for_update(self) -> List[Dict[str, Any]]:
+        """Retourne une copie de la liste des employés pour les outils d'écriture
+        
+        Les enregistrements sont partagés avec le cache: un outil d'écriture doit
+        remplacer un employé par une copie modifiée, jamais le modifier en place.
+        """
+        return list(self.get_employees())
+
+    def get_indexes(self) -> EmployeeIndexes:
+        """Retourne les index, construits à la demande sur les données en cache"""
+        self._validate()
+        if self.indexes is None:
+            self.indexes = EmployeeIndexes(self.employees)
+        return self.indexes
+
+    def commit(
+        self,
+        employees: List[Dict[str, Any]],
+        changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Sauvegarde les employés et met à jour le cache et les index"""
+        # Le cache n'est mis à jour que s'il reflète le fichier avant écriture
+        up_to_date = self.employees is not None and self.signature == file_signature()
+        save_employees(employees)
+        
+        if not up_to_date:
+            self.employees = None
+            self.indexes = None
+            if self.on_external_change is not None:
+                self.on_external_change()
+            return
+        
+        if self.indexes is not None:
+            for before, after in changes:
+                if before is not None:
+                    self.indexes.remove(before)
+                if after is not None:
+                    self.indexes.add(after)
+        
+        self.employees = employees
+        self.signature = file_signature()
+        self.incremental_updates += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache"""
+        lookups = self.hits + self.reloads
+        return {
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "incremental_updates": self.incremental_updates,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cached_employees": len(self.employees) if self.employees is not None else 0,
+            "indexes_built": self.indexes is not None
+        }
+
+# Cache partagé par tous les outils du serveur
+_cache = EmployeeCache(on_external_change=mcp.all_resources_updated)
+
+def get_indexes() -> EmployeeIndexes:
+    """Retourne les index, reconstruits si le fichier a changé sur disque"""
+    return _cache.get_indexes()
+
+def commit_employees(
+    employees: List[Dict[str, Any]],
+    changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+) -> None:
+    """Sauvegarde les employés et met à jour les index de manière incrémentale
+    
+    Args:
+        employees: Liste complète des employés à sauvegarder
+        changes: Couples (avant, après) des employés modifiés.
+            avant = None pour une création, après = None pour une suppression
+    """
+    _cache.commit(employees, changes)
+    
+    # Ressources MCP à notifier: les employés et leurs départements (avant et après)
+    uris = set()
+    for before, after in changes:
+        for emp in (before, after):
+            if emp is not None:
+                uris.add(employee_resource_uri(emp.get('id')))
+                uris.add(department_resource_uri(str(emp.get('departement', 'Non défini'))))
+    mcp.resources_updated(uris)
+
+def generate_employee_id(employees: Optional[List[Dict[str, Any]]] = None) -> int:
     """Génère un nouvel ID d'employé"""
-    employees = load_employees()
+    if employees is None:
+        employees = _cache.get_employees()
     if not employees:
         return 1
     return max(emp.get('id', 0) for emp in employees) + 1
 
+# Champs obligatoires à la création et champs modifiables
+EMPLOYEE_REQUIRED_FIELDS = ('prenom', 'nom', 'email', 'poste', 'departement', 'salaire', 'date_embauche')
+EMPLOYEE_UPDATABLE_FIELDS = ('prenom', 'nom', 'email', 'poste', 'departement', 'salaire', 'telephone', 'adresse')
+
+def _parse_salary(value: Any) -> float:
+    """Convertit et valide un salaire"""
+    try:
+        salaire = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Salaire invalide: '{value}'")
+    
+    if salaire < 0:
+        raise ValueError("Le salaire ne peut pas être négatif")
+    return salaire
+
+def build_employee(data: Dict[str, Any], employee_id: int, emails: Set[str]) -> Dict[str, Any]:
+    """Valide les données d'un nouvel employé et construit son enregistrement
+    
+    Args:
+        data: Champs de l'employé (mêmes noms que create_employee)
+        employee_id: ID à attribuer
+        emails: Emails déjà utilisés (en minuscules)
+    """
+    missing = [field for field in EMPLOYEE_REQUIRED_FIELDS if data.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Champs obligatoires manquants: {', '.join(missing)}")
+    
+    email = str(data['email']).strip().lower()
+    
+    # Vérification de l'unicité de l'email
+    if email in emails:
+        raise ValueError(f"Un employé avec l'email '{data['email']}' existe déjà")
+    
+    # Validation de la date
+    date_embauche = str(data['date_embauche']).strip()
+    try:
+        datetime.strptime(date_embauche, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError("Format de date invalide. Utilisez YYYY-MM-DD")
+    
+    # Validation du salaire
+    salaire = _parse_salary(data['salaire'])
+    
+    now = datetime.now().isoformat()
+    return {
+        "id": employee_id,
+        "prenom": str(data['prenom']).strip(),
+        "nom": str(data['nom']).strip(),
+        "email": email,
+        "poste": str(data['poste']).strip(),
+        "departement": str(data['departement']).strip(),
+        "salaire": salaire,
+        "date_embauche": date_embauche,
+        "telephone": str(data.get('telephone') or '').strip(),
+        "adresse": str(data.get('adresse') or '').strip(),
+        "date_creation": now,
+        "date_modification": now,
+        "actif": True,
+        "version": 1
+    }
+
+def apply_employee_updates(employee: Dict[str, Any], changes: Dict[str, Any], emails: Set[str]) -> List[str]:
+    """Valide et applique des modifications à un employé
+    
+    Args:
+        employee: Enregistrement à modifier (modifié en place si tout est valide)
+        changes: Nouvelles valeurs (None = pas de modification)
+        emails: Emails déjà utilisés (en minuscules), mis à jour si l'email change
+    
+    Returns:
+        Liste lisible des modifications effectuées
+    """
+    unknown = [field for field in changes if field not in EMPLOYEE_UPDATABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs non modifiables: {', '.join(unknown)}")
+    
+    changes = {field: value for field, value in changes.items() if value is not None}
+    
+    # Vérification de l'unicité de l'email si modifié
+    if 'email' in changes:
+        email = str(changes['email']).strip().lower()
+        if not email:
+            raise ValueError("L'email ne peut pas être vide")
+        if email != employee.get('email') and email in emails:
+            raise ValueError(f"Un employé avec l'email '{changes['email']}' existe déjà")
+        changes['email'] = email
+    
+    if 'salaire' in changes:
+        changes['salaire'] = _parse_salary(changes['salaire'])
+    
+    # Mise à jour des champs modifiés
+    modifications = []
+    labels = {
+        'prenom': "Prénom",
+        'nom': "Nom",
+        'email': "Email",
+        'poste': "Poste",
+        'departement': "Département",
+        'telephone': "Téléphone",
+        'adresse': "Adresse"
+    }
+    
+    for field in EMPLOYEE_UPDATABLE_FIELDS:
+        if field not in changes:
+            continue
+        
+        value = changes[field]
+        if field == 'salaire':
+            employee['salaire'] = value
+            modifications.append(f"Salaire: {value:,.2f} €")
+        elif field == 'email':
+            emails.discard(employee.get('email'))
+            employee['email'] = value
+            emails.add(value)
+            modifications.append(f"Email: {value}")
+        else:
+            employee[field] = str(value).strip()
+            modifications.append(f"{labels[field]}: {value}")
+    
+    if modifications:
+        # Met à jour la date de modification et la version
+        touch_employee(employee)
+    
+    return modifications
+
 @mcp.tool()
+@exclusive_write
 def create_employee(
     prenom: str,
     nom: str,
@@ -63,92 +1011,180 @@ def create_employee(
         telephone: Numéro de téléphone (optionnel)
         adresse: Adresse postale (optionnelle)
     """
-    employees = load_employees()
+    employees = _cache.get_employees_for_update()
+    emails = {emp.get('email', '').lower() for emp in employees}
     
-    # Vérification de l'unicité de l'email
-    if any(emp.get('email') == email for emp in employees):
-        raise ValueError(f"Un employé avec l'email '{email}' existe déjà")
-    
-    # Validation de la date
-    try:
-        datetime.strptime(date_embauche, '%Y-%m-%d')
-    except ValueError:
-        raise ValueError("Format de date invalide. Utilisez YYYY-MM-DD")
-    
-    # Validation du salaire
-    if salaire < 0:
-        raise ValueError("Le salaire ne peut pas être négatif")
-    
-    # Création du nouvel employé
-    nouvel_employe = {
-        "id": generate_employee_id(),
-        "prenom": prenom.strip(),
-        "nom": nom.strip(),
-        "email": email.strip().lower(),
-        "poste": poste.strip(),
-        "departement": departement.strip(),
-        "salaire": float(salaire),
+    nouvel_employe = build_employee({
+        "prenom": prenom,
+        "nom": nom,
+        "email": email,
+        "poste": poste,
+        "departement": departement,
+        "salaire": salaire,
         "date_embauche": date_embauche,
-        "telephone": telephone.strip(),
-        "adresse": adresse.strip(),
-        "date_creation": datetime.now().isoformat(),
-        "date_modification": datetime.now().isoformat(),
-        "actif": True
-    }
+        "telephone": telephone,
+        "adresse": adresse
+    }, generate_employee_id(employees), emails)
     
     employees.append(nouvel_employe)
-    save_employees(employees)
+    commit_employees(employees, [(None, nouvel_employe)])
     
     return f"✅ Employé créé avec succès!\nID: {nouvel_employe['id']}\nNom: {prenom} {nom}\nPoste: {poste}\nDépartement: {departement}"
 
 @mcp.tool()
 def get_employee(employee_id: int) -> str:
     """Récupère les informations d'un employé par son ID"""
-    employees = load_employees()
-    
-    employee = next((emp for emp in employees if emp.get('id') == employee_id), None)
+    employee = get_indexes().by_id.get(employee_id)
     if not employee:
         raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
     
     return json.dumps(employee, indent=2, ensure_ascii=False)
 
+# Clés de tri et champs disponibles pour list_employees
+LIST_SORT_KEYS = ('id', 'prenom', 'nom', 'email', 'poste', 'departement', 'salaire', 'date_embauche')
+LIST_DEFAULT_FIELDS = ['id', 'prenom', 'nom', 'email', 'poste', 'departement', 'salaire', 'date_embauche', 'actif']
+LIST_FIELDS = LIST_DEFAULT_FIELDS + ['telephone', 'adresse', 'date_creation', 'date_modification']
+
+def encode_cursor(sort_by: str, descending: bool, last_key: Any, last_id: int) -> str:
+    """Encode la position de la dernière ligne d'une page dans un curseur opaque"""
+    payload = json.dumps([sort_by, descending, last_key, last_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple[Any, int]:
+    """Décode un curseur et vérifie qu'il correspond au tri demandé"""
+    try:
+        cursor_sort, cursor_desc, last_key, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+    
+    if cursor_sort != sort_by or cursor_desc != descending:
+        raise ValueError("Le curseur ne correspond pas au tri demandé")
+    
+    return last_key, last_id
+
+def _compact_value(value: Any) -> str:
+    """Formate une valeur pour une cellule TSV"""
+    if value is None:
+        return ""
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
 @mcp.tool()
-def list_employees(departement: str = "", actif_seulement: bool = True) -> str:
-    """Liste tous les employés avec filtres optionnels
+def list_employees(
+    departement: str = "",
+    actif_seulement: bool = True,
+    limit: int = 50,
+    cursor: str = "",
+    sort_by: str = "id",
+    descending: bool = False,
+    fields: Optional[List[str]] = None,
+    format: str = "text"
+) -> str:
+    """Liste les employés avec filtres, tri et pagination par curseur
     
     Args:
         departement: Filtrer par département (optionnel)
         actif_seulement: Afficher seulement les employés actifs
+        limit: Nombre maximum d'employés par page
+        cursor: Curseur de la page suivante (retourné par l'appel précédent)
+        sort_by: Champ de tri (id, prenom, nom, email, poste, departement, salaire, date_embauche)
+        descending: Tri décroissant
+        fields: Champs à inclure dans les formats compacts (optionnel)
+        format: Format de sortie ('text', 'tsv' ou 'jsonl')
     """
-    employees = load_employees()
+    if limit < 1:
+        raise ValueError("La limite doit être supérieure ou égale à 1")
     
-    # Filtres
-    if actif_seulement:
-        employees = [emp for emp in employees if emp.get('actif', True)]
+    if sort_by not in LIST_SORT_KEYS:
+        raise ValueError(f"Tri invalide. Valeurs possibles: {', '.join(LIST_SORT_KEYS)}")
+    
+    if format not in ("text", "tsv", "jsonl"):
+        raise ValueError("Format invalide. Utilisez 'text', 'tsv' ou 'jsonl'")
+    
+    fields = fields or LIST_DEFAULT_FIELDS
+    unknown = [field for field in fields if field not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
     
+    indexes = get_indexes()
+    
+    # Vue triée du département (ou de toute l'entreprise) et nombre de lignes filtrées
     if departement:
-        employees = [emp for emp in employees if emp.get('departement', '').lower() == departement.lower()]
+        stats = indexes.departments.find(departement)
+        if stats is None:
+            keys, total = [], 0
+        else:
+            members = (indexes.by_id[emp_id] for emp_id in stats.ids)
+            keys = indexes.sorted.view(sort_by, departement, members)
+            total = stats.actifs if actif_seulement else stats.total
+    else:
+        keys = indexes.sorted.view(sort_by, "", indexes.by_id.values())
+        company = indexes.departments.company()
+        total = company.actifs if actif_seulement else company.total
+    
+    # Pagination par clé: bisection sur la position du curseur, puis lecture de la page
+    if cursor:
+        position = tuple(decode_cursor(cursor, sort_by, descending))
+        try:
+            start = bisect.bisect_left(keys, position) - 1 if descending else bisect.bisect_right(keys, position)
+        except TypeError:
+            raise ValueError("Curseur invalide")
+    else:
+        start = len(keys) - 1 if descending else 0
+    
+    positions = range(start, -1, -1) if descending else range(start, len(keys))
+    page = []
+    for index in positions:
+        employee = indexes.by_id[keys[index][1]]
+        if actif_seulement and not employee.get('actif', True):
+            continue
+        page.append((keys[index], employee))
+        if len(page) > limit:
+            break
+    
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    next_cursor = ""
+    if has_more:
+        last_key, last_id = page[-1][0]
+        next_cursor = encode_cursor(sort_by, descending, last_key, last_id)
+    
+    employees = [emp for _, emp in page]
+    
+    if format == "tsv":
+        lines = [f"# total={total} returned={len(employees)} next_cursor={next_cursor}", "\t".join(fields)]
+        lines.extend("\t".join(_compact_value(emp.get(field)) for field in fields) for emp in employees)
+        return "\n".join(lines)
+    
+    if format == "jsonl":
+        lines = [f"# total={total} returned={len(employees)} next_cursor={next_cursor}"]
+        lines.extend(json.dumps({field: emp.get(field) for field in fields}, ensure_ascii=False) for emp in employees)
+        return "\n".join(lines)
     
     if not employees:
         return "Aucun employé trouvé avec les critères spécifiés"
     
     # Formatage de la liste
-    result = f"📋 Liste des employés ({len(employees)} trouvé(s)):\n\n"
+    lines = [f"📋 Liste des employés ({total} trouvé(s)):\n"]
     
     for emp in employees:
         status = "🟢 Actif" if emp.get('actif', True) else "🔴 Inactif"
-        result += f"ID: {emp.get('id')}\n"
-        result += f"👤 {emp.get('prenom')} {emp.get('nom')}\n"
-        result += f"📧 {emp.get('email')}\n"
-        result += f"💼 {emp.get('poste')} - {emp.get('departement')}\n"
-        result += f"💰 {emp.get('salaire'):,.2f} €\n"
-        result += f"📅 Embauché le: {emp.get('date_embauche')}\n"
-        result += f"Status: {status}\n"
-        result += "-" * 40 + "\n"
+        lines.append(f"ID: {emp.get('id')}")
+        lines.append(f"👤 {emp.get('prenom')} {emp.get('nom')}")
+        lines.append(f"📧 {emp.get('email')}")
+        lines.append(f"💼 {emp.get('poste')} - {emp.get('departement')}")
+        lines.append(f"💰 {emp.get('salaire'):,.2f} €")
+        lines.append(f"📅 Embauché le: {emp.get('date_embauche')}")
+        lines.append(f"Status: {status}")
+        lines.append("-" * 40)
     
-    return result
+    if next_cursor:
+        lines.append(f"➡️ {len(employees)} affiché(s) sur {total}. Page suivante: cursor=\"{next_cursor}\"")
+    
+    return "\n".join(lines) + "\n"
 
 @mcp.tool()
+@exclusive_write
 def update_employee(
     employee_id: int,
     prenom: str = None,
@@ -158,163 +1194,387 @@ def update_employee(
     departement: str = None,
     salaire: float = None,
     telephone: str = None,
-    adresse: str = None
+    adresse: str = None,
+    expected_version: Optional[int] = None
 ) -> str:
     """Met à jour les informations d'un employé
     
     Args:
         employee_id: ID de l'employé à modifier
         Autres paramètres: Nouveaux valeurs (None = pas de modification)
+        expected_version: Version lue par l'appelant; échoue si l'employé a changé depuis
     """
-    employees = load_employees()
+    employees = _cache.get_employees_for_update()
     
     # Trouve l'employé
     employee_index = next((i for i, emp in enumerate(employees) if emp.get('id') == employee_id), None)
     if employee_index is None:
         raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
     
-    employee = employees[employee_index]
-    
-    # Vérification de l'unicité de l'email si modifié
-    if email and email != employee.get('email'):
-        if any(emp.get('email') == email.lower() for emp in employees):
-            raise ValueError(f"Un employé avec l'email '{email}' existe déjà")
-    
-    # Mise à jour des champs modifiés
-    modifications = []
-    
-    if prenom is not None:
-        employee['prenom'] = prenom.strip()
-        modifications.append(f"Prénom: {prenom}")
-    
-    if nom is not None:
-        employee['nom'] = nom.strip()
-        modifications.append(f"Nom: {nom}")
-    
-    if email is not None:
-        employee['email'] = email.strip().lower()
-        modifications.append(f"Email: {email}")
-    
-    if poste is not None:
-        employee['poste'] = poste.strip()
-        modifications.append(f"Poste: {poste}")
-    
-    if departement is not None:
-        employee['departement'] = departement.strip()
-        modifications.append(f"Département: {departement}")
-    
-    if salaire is not None:
-        if salaire < 0:
-            raise ValueError("Le salaire ne peut pas être négatif")
-        employee['salaire'] = float(salaire)
-        modifications.append(f"Salaire: {salaire:,.2f} €")
-    
-    if telephone is not None:
-        employee['telephone'] = telephone.strip()
-        modifications.append(f"Téléphone: {telephone}")
+    before = employees[employee_index]
+    check_version(before, expected_version)
+    employee = dict(before)
+    emails = {emp.get('email', '').lower() for emp in employees}
     
-    if adresse is not None:
-        employee['adresse'] = adresse.strip()
-        modifications.append(f"Adresse: {adresse}")
+    modifications = apply_employee_updates(employee, {
+        'prenom': prenom,
+        'nom': nom,
+        'email': email,
+        'poste': poste,
+        'departement': departement,
+        'salaire': salaire,
+        'telephone': telephone,
+        'adresse': adresse
+    }, emails)
     
     if not modifications:
         return "Aucune modification effectuée"
     
-    # Met à jour la date de modification
-    employee['date_modification'] = datetime.now().isoformat()
-    
     # Sauvegarde
     employees[employee_index] = employee
-    save_employees(employees)
+    commit_employees(employees, [(before, employee)])
     
     return f"✅ Employé {employee_id} mis à jour avec succès!\nModifications:\n" + "\n".join(f"• {mod}" for mod in modifications)
 
 @mcp.tool()
-def delete_employee(employee_id: int, permanent: bool = False) -> str:
+@exclusive_write
+def delete_employee(employee_id: int, permanent: bool = False, expected_version: Optional[int] = None) -> str:
     """Supprime ou désactive un employé
     
     Args:
         employee_id: ID de l'employé
         permanent: Si True, suppression définitive. Si False, désactivation
+        expected_version: Version lue par l'appelant; échoue si l'employé a changé depuis
     """
-    employees = load_employees()
+    employees = _cache.get_employees_for_update()
     
     employee_index = next((i for i, emp in enumerate(employees) if emp.get('id') == employee_id), None)
     if employee_index is None:
         raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
     
-    employee = employees[employee_index]
+    before = employees[employee_index]
+    check_version(before, expected_version)
+    employee = dict(before)
     
     if permanent:
         # Suppression définitive
         employees.pop(employee_index)
-        save_employees(employees)
+        commit_employees(employees, [(before, None)])
         return f"🗑️ Employé {employee_id} ({employee.get('prenom')} {employee.get('nom')}) supprimé définitivement"
     else:
         # Désactivation
         employee['actif'] = False
-        employee['date_modification'] = datetime.now().isoformat()
+        touch_employee(employee)
         employees[employee_index] = employee
-        save_employees(employees)
+        commit_employees(employees, [(before, employee)])
         return f"⏸️ Employé {employee_id} ({employee.get('prenom')} {employee.get('nom')}) désactivé"
 
 @mcp.tool()
-def reactivate_employee(employee_id: int) -> str:
-    """Réactive un employé désactivé"""
-    employees = load_employees()
+@exclusive_write
+def reactivate_employee(employee_id: int, expected_version: Optional[int] = None) -> str:
+    """Réactive un employé désactivé
+    
+    Args:
+        employee_id: ID de l'employé
+        expected_version: Version lue par l'appelant; échoue si l'employé a changé depuis
+    """
+    employees = _cache.get_employees_for_update()
     
     employee_index = next((i for i, emp in enumerate(employees) if emp.get('id') == employee_id), None)
     if employee_index is None:
         raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
     
-    employee = employees[employee_index]
+    before = employees[employee_index]
+    check_version(before, expected_version)
     
-    if employee.get('actif', True):
+    if before.get('actif', True):
         return f"L'employé {employee_id} est déjà actif"
     
+    employee = dict(before)
     employee['actif'] = True
-    employee['date_modification'] = datetime.now().isoformat()
+    touch_employee(employee)
     employees[employee_index] = employee
-    save_employees(employees)
+    commit_employees(employees, [(before, employee)])
     
     return f"▶️ Employé {employee_id} ({employee.get('prenom')} {employee.get('nom')}) réactivé avec succès"
 
+# Nombre maximum d'erreurs détaillées dans les rapports des outils par lot
+MAX_REPORTED_ERRORS = 20
+
+def _format_errors(errors: List[str]) -> str:
+    """Formate la liste des erreurs d'un traitement par lot"""
+    lines = [f"   • {error}" for error in errors[:MAX_REPORTED_ERRORS]]
+    if len(errors) > MAX_REPORTED_ERRORS:
+        lines.append(f"   … et {len(errors) - MAX_REPORTED_ERRORS} autre(s) erreur(s)")
+    return "\n".join(lines)
+
+def _create_batch(
+    employees: List[Dict[str, Any]],
+    rows: Any,
+    continue_on_error: bool
+) -> Tuple[List[Dict[str, Any]], List[str], int]:
+    """Valide et crée une série d'employés en mémoire
+    
+    Args:
+        employees: Employés existants (complétés en place)
+        rows: Itérable de couples (numéro de ligne, données)
+        continue_on_error: Ignorer les lignes invalides au lieu d'échouer
+    
+    Returns:
+        Employés créés, erreurs rencontrées et nombre de lignes lues
+    """
+    emails = {emp.get('email', '').lower() for emp in employees}
+    next_id = generate_employee_id(employees)
+    created = []
+    errors = []
+    count = 0
+    
+    for line, data in rows:
+        count += 1
+        try:
+            if isinstance(data, str):
+                raise ValueError(data)
+            if not isinstance(data, dict):
+                raise ValueError("Chaque employé doit être un objet")
+            employee = build_employee(data, next_id, emails)
+        except ValueError as e:
+            errors.append(f"Ligne {line}: {e}")
+            if not continue_on_error:
+                break
+            continue
+        
+        emails.add(employee['email'])
+        created.append(employee)
+        next_id += 1
+    
+    if errors and not continue_on_error:
+        return [], errors, count
+    
+    employees.extend(created)
+    return created, errors, count
+
+@mcp.tool()
+@exclusive_write
+def bulk_create_employees(employees: List[Dict[str, Any]], continue_on_error: bool = False) -> str:
+    """Crée plusieurs employés en une seule sauvegarde
+    
+    Args:
+        employees: Liste d'employés (mêmes champs que create_employee)
+        continue_on_error: Si False, aucun employé n'est créé en cas d'erreur.
+            Si True, les employés invalides sont ignorés et signalés
+    """
+    if not employees:
+        raise ValueError("La liste des employés est vide")
+    
+    all_employees = _cache.get_employees_for_update()
+    created, errors, _ = _create_batch(all_employees, enumerate(employees, 1), continue_on_error)
+    
+    if errors and not continue_on_error:
+        raise ValueError("Aucun employé créé, données invalides:\n" + _format_errors(errors))
+    
+    if created:
+        commit_employees(all_employees, [(None, emp) for emp in created])
+    
+    result = f"✅ {len(created)} employé(s) créé(s) avec succès!"
+    if created:
+        result += f"\nIDs: {created[0]['id']} à {created[-1]['id']}"
+    if errors:
+        result += f"\n⚠️ {len(errors)} employé(s) ignoré(s):\n" + _format_errors(errors)
+    return result
+
+@mcp.tool()
+@exclusive_write
+def bulk_update_employees(updates: List[Dict[str, Any]], continue_on_error: bool = False) -> str:
+    """Met à jour plusieurs employés en une seule sauvegarde
+    
+    Args:
+        updates: Liste de modifications contenant 'employee_id', les champs à modifier
+            et optionnellement 'expected_version'
+        continue_on_error: Si False, aucune modification n'est appliquée en cas d'erreur.
+            Si True, les modifications invalides sont ignorées et signalées
+    """
+    if not updates:
+        raise ValueError("La liste des modifications est vide")
+    
+    employees = _cache.get_employees_for_update()
+    positions = {emp.get('id'): i for i, emp in enumerate(employees)}
+    emails = {emp.get('email', '').lower() for emp in employees}
+    changes = []
+    errors = []
+    
+    for line, update in enumerate(updates, 1):
+        try:
+            if not isinstance(update, dict) or 'employee_id' not in update:
+                raise ValueError("Chaque modification doit contenir 'employee_id'")
+            
+            fields = dict(update)
+            employee_id = fields.pop('employee_id')
+            expected_version = fields.pop('expected_version', None)
+            position = positions.get(employee_id)
+            if position is None:
+                raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
+            
+            before = employees[position]
+            check_version(before, expected_version)
+            employee = dict(before)
+            if apply_employee_updates(employee, fields, emails):
+                employees[position] = employee
+                changes.append((before, employee))
+        except ValueError as e:
+            errors.append(f"Ligne {line}: {e}")
+            if not continue_on_error:
+                raise ValueError("Aucune modification appliquée, données invalides:\n" + _format_errors(errors))
+    
+    if changes:
+        commit_employees(employees, changes)
+    
+    result = f"✅ {len(changes)} employé(s) mis à jour avec succès!"
+    if errors:
+        result += f"\n⚠️ {len(errors)} modification(s) ignorée(s):\n" + _format_errors(errors)
+    return result
+
+def _read_import_rows(path: str, format: str) -> Any:
+    """Lit un fichier CSV ou JSON-lines ligne par ligne
+    
+    Yields:
+        Couples (numéro de ligne, données ou message d'erreur)
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, f"JSON invalide ({e.msg})"
+
 @mcp.tool()
-def search_employees(term: str) -> str:
+@exclusive_write
+def import_employees(path: str, format: str = "auto", continue_on_error: bool = False) -> str:
+    """Importe des employés depuis un fichier CSV ou JSON-lines
+    
+    Args:
+        path: Chemin du fichier à importer
+        format: 'csv', 'jsonl' ou 'auto' (détection par l'extension)
+        continue_on_error: Si False, rien n'est importé en cas d'erreur.
+            Si True, les lignes invalides sont ignorées et signalées
+    """
+    if format == "auto":
+        format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    
+    if format not in ("csv", "jsonl"):
+        raise ValueError("Format invalide. Utilisez 'csv', 'jsonl' ou 'auto'")
+    
+    if not os.path.isfile(path):
+        raise ValueError(f"Fichier '{path}' non trouvé")
+    
+    employees = _cache.get_employees_for_update()
+    created, errors, count = _create_batch(employees, _read_import_rows(path, format), continue_on_error)
+    
+    if errors and not continue_on_error:
+        raise ValueError("Import annulé, aucun employé créé:\n" + _format_errors(errors))
+    
+    if created:
+        commit_employees(employees, [(None, emp) for emp in created])
+    
+    result = f"📥 Import terminé: {len(created)} employé(s) créé(s) sur {count} ligne(s)"
+    if errors:
+        result += f"\n⚠️ {len(errors)} ligne(s) ignorée(s):\n" + _format_errors(errors)
+    return result
+
+@mcp.tool()
+def search_employees(term: str, limit: int = 20) -> str:
     """Recherche des employés par nom, email, poste ou département
     
+    La recherche ignore les accents et la casse, et les résultats sont classés
+    par pertinence (correspondance exacte, début de mot, puis sous-chaîne).
+    Un terme de 2 caractères n'a pas de trigramme: il est comparé aux clés
+    de l'index, ce qui reste rapide mais retourne souvent beaucoup de résultats.
+    
     Args:
         term: Terme de recherche (minimum 2 caractères)
+        limit: Nombre maximum de résultats retournés
     """
     if len(term.strip()) < 2:
         raise ValueError("Le terme de recherche doit contenir au moins 2 caractères")
     
-    employees = load_employees()
-    term_lower = term.lower().strip()
+    if limit < 1:
+        raise ValueError("La limite doit être supérieure ou égale à 1")
     
-    # Recherche dans les champs pertinents
-    matching_employees = []
-    for emp in employees:
-        if (term_lower in emp.get('prenom', '').lower() or
-            term_lower in emp.get('nom', '').lower() or
-            term_lower in emp.get('email', '').lower() or
-            term_lower in emp.get('poste', '').lower() or
-            term_lower in emp.get('departement', '').lower()):
-            matching_employees.append(emp)
+    indexes = get_indexes()
+    matching_employees, total = indexes.search.search(term, limit)
     
     if not matching_employees:
-        return f"Aucun employé trouvé pour le terme '{term}'"
+        # Suggestions tolérantes aux fautes pour éviter un nouvel aller-retour
+        suggestions = fuzzy_matches(indexes, term, max_distance=2, limit=5)
+        if not suggestions:
+            return f"Aucun employé trouvé pour le terme '{term}'"
+        
+        lines = [f"Aucun employé trouvé pour le terme '{term}'. Vouliez-vous dire:"]
+        for emp, distance, _ in suggestions:
+            lines.append(f"   • ID: {emp.get('id')} - {emp.get('prenom')} {emp.get('nom')} ({emp.get('email')})")
+        return "\n".join(lines)
     
-    result = f"🔍 Résultats de recherche pour '{term}' ({len(matching_employees)} trouvé(s)):\n\n"
+    lines = [f"🔍 Résultats de recherche pour '{term}' ({total} trouvé(s)):\n"]
+    if total > len(matching_employees):
+        lines.append(f"(affichage des {len(matching_employees)} plus pertinents)\n")
     
     for emp in matching_employees:
         status = "🟢" if emp.get('actif', True) else "🔴"
-        result += f"{status} ID: {emp.get('id')} - {emp.get('prenom')} {emp.get('nom')}\n"
-        result += f"   📧 {emp.get('email')}\n"
-        result += f"   💼 {emp.get('poste')} - {emp.get('departement')}\n"
-        result += f"   💰 {emp.get('salaire'):,.2f} €\n\n"
+        lines.append(f"{status} ID: {emp.get('id')} - {emp.get('prenom')} {emp.get('nom')}")
+        lines.append(f"   📧 {emp.get('email')}")
+        lines.append(f"   💼 {emp.get('poste')} - {emp.get('departement')}")
+        lines.append(f"   💰 {emp.get('salaire'):,.2f} €\n")
     
-    return result
+    return "\n".join(lines) + "\n"
+
+def fuzzy_matches(
+    indexes: EmployeeIndexes,
+    term: str,
+    max_distance: int,
+    limit: int
+) -> List[Tuple[Dict[str, Any], int, str]]:
+    """Retourne les employés proches d'un terme, classés par distance d'édition"""
+    matches = indexes.names.search(term, max_distance)
+    best = heapq.nsmallest(limit, matches.items(), key=lambda item: (item[1][0], item[0]))
+    return [(indexes.by_id[emp_id], distance, matched) for emp_id, (distance, matched) in best]
+
+@mcp.tool()
+def fuzzy_search_employees(term: str, max_distance: int = 2, limit: int = 10) -> str:
+    """Recherche tolérante aux fautes de frappe sur le prénom, le nom et l'email
+    
+    Args:
+        term: Prénom, nom, nom complet ou email approximatif (tous les mots doivent correspondre)
+        max_distance: Nombre maximum de fautes (distance d'édition, 0 à 2)
+        limit: Nombre maximum de résultats retournés
+    """
+    if len(term.strip()) < 2:
+        raise ValueError("Le terme de recherche doit contenir au moins 2 caractères")
+    
+    if not 0 <= max_distance <= MAX_FUZZY_DISTANCE:
+        raise ValueError(f"La distance maximale doit être comprise entre 0 et {MAX_FUZZY_DISTANCE}")
+    
+    if limit < 1:
+        raise ValueError("La limite doit être supérieure ou égale à 1")
+    
+    results = fuzzy_matches(get_indexes(), term, max_distance, limit)
+    
+    if not results:
+        return f"Aucun employé proche de '{term}' (distance maximale {max_distance})"
+    
+    lines = [f"🔍 Employés proches de '{term}' ({len(results)} résultat(s)):\n"]
+    for emp, distance, matched in results:
+        status = "🟢" if emp.get('actif', True) else "🔴"
+        lines.append(f"{status} ID: {emp.get('id')} - {emp.get('prenom')} {emp.get('nom')} (distance {distance}: '{matched}')")
+        lines.append(f"   📧 {emp.get('email')}")
+        lines.append(f"   💼 {emp.get('poste')} - {emp.get('departement')}\n")
+    
+    return "\n".join(lines) + "\n"
 
 @mcp.tool()
 def get_department_stats(departement: str = "") -> str:
@@ -323,69 +1583,292 @@ def get_department_stats(departement: str = "") -> str:
     Args:
         departement: Nom du département (vide = tous les départements)
     """
-    employees = load_employees()
+    departments = get_indexes().departments
     
     if departement:
         # Statistiques d'un département spécifique
-        dept_employees = [emp for emp in employees if emp.get('departement', '').lower() == departement.lower()]
-        if not dept_employees:
+        stats = departments.find(departement)
+        if stats is None:
             return f"Aucun employé trouvé dans le département '{departement}'"
         
-        actifs = [emp for emp in dept_employees if emp.get('actif', True)]
-        salaires = [emp.get('salaire', 0) for emp in actifs]
-        
         result = f"📊 Statistiques du département '{departement}':\n\n"
-        result += f"👥 Nombre total d'employés: {len(dept_employees)}\n"
-        result += f"🟢 Employés actifs: {len(actifs)}\n"
-        result += f"🔴 Employés inactifs: {len(dept_employees) - len(actifs)}\n"
+        result += f"👥 Nombre total d'employés: {stats.total}\n"
+        result += f"🟢 Employés actifs: {stats.actifs}\n"
+        result += f"🔴 Employés inactifs: {stats.total - stats.actifs}\n"
         
-        if salaires:
-            result += f"💰 Salaire moyen: {sum(salaires) / len(salaires):,.2f} €\n"
-            result += f"💰 Salaire minimum: {min(salaires):,.2f} €\n"
-            result += f"💰 Salaire maximum: {max(salaires):,.2f} €\n"
-            result += f"💰 Masse salariale totale: {sum(salaires):,.2f} €\n"
+        if stats.salaries:
+            result += f"💰 Salaire moyen: {stats.salary_total / stats.actifs:,.2f} €\n"
+            result += f"💰 Salaire médian: {percentile(stats.salaries, 50):,.2f} €\n"
+            result += f"💰 Salaire minimum: {stats.salaries[0]:,.2f} €\n"
+            result += f"💰 Salaire maximum: {stats.salaries[-1]:,.2f} €\n"
+            result += f"💰 Masse salariale totale: {stats.salary_total:,.2f} €\n"
         
         return result
     else:
         # Statistiques globales par département
-        from collections import defaultdict
+        lines = ["📊 Statistiques par département:\n"]
+        total_employees = 0
+        active_employees = 0
+        total_cents = 0
         
-        dept_stats = defaultdict(lambda: {'total': 0, 'actifs': 0, 'salaires': []})
-        
-        for emp in employees:
-            dept = emp.get('departement', 'Non défini')
-            dept_stats[dept]['total'] += 1
+        for dept, stats in sorted(departments.departments.items()):
+            total_employees += stats.total
+            active_employees += stats.actifs
+            total_cents += stats.salary_cents
             
-            if emp.get('actif', True):
-                dept_stats[dept]['actifs'] += 1
-                dept_stats[dept]['salaires'].append(emp.get('salaire', 0))
-        
-        result = "📊 Statistiques par département:\n\n"
-        
-        for dept, stats in sorted(dept_stats.items()):
-            result += f"🏢 {dept}:\n"
-            result += f"   👥 Total: {stats['total']} employés\n"
-            result += f"   🟢 Actifs: {stats['actifs']}\n"
+            lines.append(f"🏢 {dept}:")
+            lines.append(f"   👥 Total: {stats.total} employés")
+            lines.append(f"   🟢 Actifs: {stats.actifs}")
             
-            if stats['salaires']:
-                avg_salary = sum(stats['salaires']) / len(stats['salaires'])
-                total_salary = sum(stats['salaires'])
-                result += f"   💰 Salaire moyen: {avg_salary:,.2f} €\n"
-                result += f"   💰 Masse salariale: {total_salary:,.2f} €\n"
+            if stats.salaries:
+                lines.append(f"   💰 Salaire moyen: {stats.salary_total / stats.actifs:,.2f} €")
+                lines.append(f"   💰 Masse salariale: {stats.salary_total:,.2f} €")
             
-            result += "\n"
+            lines.append("")
         
         # Statistiques globales
-        total_employees = len(employees)
-        active_employees = len([emp for emp in employees if emp.get('actif', True)])
-        total_salaries = sum(emp.get('salaire', 0) for emp in employees if emp.get('actif', True))
-        
-        result += f"🌐 TOTAL ENTREPRISE:\n"
-        result += f"   👥 {total_employees} employés au total\n"
-        result += f"   🟢 {active_employees} employés actifs\n"
-        result += f"   💰 Masse salariale totale: {total_salaries:,.2f} €\n"
+        lines.append(f"🌐 TOTAL ENTREPRISE:")
+        lines.append(f"   👥 {total_employees} employés au total")
+        lines.append(f"   🟢 {active_employees} employés actifs")
+        lines.append(f"   💰 Masse salariale totale: {total_cents / 100:,.2f} €")
         
-        return result
+        return "\n".join(lines) + "\n"
+
+@mcp.tool()
+def get_salary_percentiles(departement: str = "", percentiles: Optional[List[float]] = None) -> str:
+    """Obtient les percentiles de salaire des employés actifs
+    
+    Args:
+        departement: Nom du département (vide = toute l'entreprise)
+        percentiles: Percentiles à calculer (entre 0 et 100, défaut: 10, 25, 50, 75, 90)
+    """
+    if percentiles is None:
+        percentiles = [10, 25, 50, 75, 90]
+    
+    departments = get_indexes().departments
+    stats = departments.find(departement) if departement else departments.company()
+    scope = f"du département '{departement}'" if departement else "de l'entreprise"
+    
+    if stats is None or not stats.salaries:
+        return f"Aucun employé actif trouvé {scope}"
+    
+    lines = [f"📈 Percentiles de salaire {scope} ({stats.actifs} employé(s) actif(s)):\n"]
+    for pct in percentiles:
+        lines.append(f"   P{pct:g}: {percentile(stats.salaries, pct):,.2f} €")
+    
+    return "\n".join(lines) + "\n"
+
+# Nombre maximum de périodes retournées par get_headcount_history
+HEADCOUNT_MAX_PERIODS = 240
+
+@mcp.tool()
+def get_headcount_history(
+    departement: str = "",
+    periode: str = "year",
+    actif_seulement: bool = True,
+    depuis: str = ""
+) -> str:
+    """Obtient l'évolution des effectifs dans le temps selon les dates d'embauche
+    
+    L'effectif d'une période est le nombre d'embauches jusqu'à sa fin: aucune
+    date de départ n'est enregistrée, donc avec actif_seulement=False les
+    employés partis sont comptés comme présents depuis leur embauche. Les
+    dates d'embauche invalides sont ignorées. Au plus HEADCOUNT_MAX_PERIODS
+    périodes (les plus récentes) sont retournées.
+    
+    Args:
+        departement: Nom du département (vide = toute l'entreprise)
+        periode: Granularité de l'historique ('year' ou 'month')
+        actif_seulement: Ne compter que les employés actuellement actifs
+        depuis: Première période affichée (YYYY ou YYYY-MM, optionnel)
+    """
+    if periode not in ("year", "month"):
+        raise ValueError("La période doit être 'year' ou 'month'")
+    
+    start = None
+    if depuis:
+        try:
+            start = datetime.strptime(depuis.strip(), '%Y-%m' if '-' in depuis else '%Y').date()
+        except ValueError:
+            raise ValueError("Format de 'depuis' invalide. Utilisez YYYY ou YYYY-MM")
+    
+    departments = get_indexes().departments
+    stats = departments.find(departement) if departement else departments.company()
+    scope = f"du département '{departement}'" if departement else "de l'entreprise"
+    hire_dates = (stats.active_hire_dates if actif_seulement else stats.hire_dates) if stats else []
+    
+    if not hire_dates:
+        return f"Aucun employé trouvé {scope}"
+    
+    # Périodes numérotées (année, ou année * 12 + mois) de la première embauche à aujourd'hui
+    def period_number(day: date) -> int:
+        return day.year * 12 + day.month - 1 if periode == "month" else day.year
+    
+    first = period_number(datetime.strptime(hire_dates[0], '%Y-%m-%d').date())
+    last = period_number(date.today())
+    if start is not None:
+        first = max(first, period_number(start))
+    
+    lines = [f"📅 Évolution des effectifs {scope}:\n"]
+    omitted = (last - first + 1) - HEADCOUNT_MAX_PERIODS
+    if omitted > 0:
+        first += omitted
+        lines.append(f"   ... {omitted} période(s) antérieure(s) omise(s), utilisez depuis pour les afficher")
+    
+    # Effectif à la fin de chaque période = nombre d'embauches jusqu'à cette date
+    for number in range(first, last + 1):
+        label = f"{number // 12}-{number % 12 + 1:02d}" if periode == "month" else f"{number}"
+        headcount = bisect.bisect_right(hire_dates, f"{label}-99")
+        lines.append(f"   {label}: {headcount} employé(s)")
+    
+    return "\n".join(lines) + "\n"
+
+def _group_percentiles(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, pct: float) -> np.ndarray:
+    """Calcule un percentile par groupe sur des valeurs triées par groupe (interpolation linéaire)"""
+    position = starts + (counts - 1) * pct / 100
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, starts + counts - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+@mcp.tool()
+def salary_analytics(
+    group_by: str = "departement",
+    departement: str = "",
+    actif_seulement: bool = True,
+    percentiles: Optional[List[float]] = None,
+    histogram_bins: int = 0,
+    tenure_buckets: Optional[List[float]] = None,
+    augmentation_pct: float = 0.0
+) -> str:
+    """Analyse des salaires par groupe: moyennes, percentiles, histogramme et ancienneté
+    
+    Les calculs sont vectorisés sur la vue colonnaire des employés.
+    
+    Args:
+        group_by: Regroupement ('departement', 'poste' ou '' pour aucun)
+        departement: Filtrer sur un département (optionnel)
+        actif_seulement: Ne considérer que les employés actifs
+        percentiles: Percentiles à calculer (défaut: 25, 50, 75)
+        histogram_bins: Nombre de classes de l'histogramme des salaires (0 = aucun)
+        tenure_buckets: Bornes d'ancienneté en années (ex: [1, 3, 5, 10])
+        augmentation_pct: Augmentation (%) pour projeter la masse salariale
+    """
+    if group_by not in ("departement", "poste", ""):
+        raise ValueError("Regroupement invalide. Utilisez 'departement', 'poste' ou ''")
+    
+    if histogram_bins < 0:
+        raise ValueError("Le nombre de classes doit être positif")
+    
+    if percentiles is None:
+        percentiles = [25, 50, 75]
+    if any(not 0 <= pct <= 100 for pct in percentiles):
+        raise ValueError("Les percentiles doivent être compris entre 0 et 100")
+    
+    view = get_indexes().columns
+    salaries = view.column('salaries')
+    mask = np.ones(len(salaries), dtype=bool)
+    
+    if actif_seulement:
+        mask &= view.column('active') == 1
+    
+    if departement:
+        codes = [code for label, code in view.label_codes['departement'].items() if label.lower() == departement.lower()]
+        mask &= np.isin(view.column('departement'), codes)
+    
+    salaries = salaries[mask]
+    if not len(salaries):
+        return "Aucun employé trouvé avec les critères spécifiés"
+    
+    # Regroupement: codes de catégorie ramenés à des indices de groupe contigus
+    if group_by:
+        group_codes, groups = np.unique(view.column(group_by)[mask], return_inverse=True)
+        group_names = [view.labels[group_by][code] for code in group_codes]
+    else:
+        groups = np.zeros(len(salaries), dtype=np.int64)
+        group_names = ["Tous"]
+    
+    counts = np.bincount(groups)
+    sums = np.bincount(groups, weights=salaries)
+    squares = np.bincount(groups, weights=salaries * salaries)
+    means = sums / counts
+    stds = np.sqrt(np.maximum(squares / counts - means * means, 0))
+    
+    # Tri par (groupe, salaire) pour min, max et percentiles en une passe
+    order = np.lexsort((salaries, groups))
+    sorted_salaries = salaries[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    group_percentiles = {pct: _group_percentiles(sorted_salaries, starts, counts, pct) for pct in percentiles}
+    
+    result: Dict[str, Any] = {
+        "group_by": group_by or None,
+        "employes": int(len(salaries)),
+        "groupes": []
+    }
+    
+    if histogram_bins:
+        edges = np.histogram_bin_edges(salaries, bins=histogram_bins)
+        bins = np.clip(np.searchsorted(edges, salaries, side='right') - 1, 0, histogram_bins - 1)
+        histograms = np.bincount(groups * histogram_bins + bins, minlength=len(counts) * histogram_bins)
+        histograms = histograms.reshape(len(counts), histogram_bins)
+        result["histogramme_bornes"] = [round(float(edge), 2) for edge in edges]
+    
+    if tenure_buckets is not None:
+        boundaries = np.array(sorted(tenure_buckets), dtype=float)
+        hire_ordinals = view.column('hire_ordinals')[mask]
+        known = hire_ordinals > 0
+        tenure = (date.today().toordinal() - hire_ordinals) / 365.25
+        buckets = np.searchsorted(boundaries, tenure, side='right')
+        bucket_count = len(boundaries) + 1
+        tenure_counts = np.bincount(
+            (groups * bucket_count + buckets)[known], minlength=len(counts) * bucket_count
+        ).reshape(len(counts), bucket_count)
+        tenure_known = np.bincount(groups[known], minlength=len(counts))
+        tenure_sums = np.bincount(groups[known], weights=tenure[known], minlength=len(counts))
+        edges = [0.0] + [float(b) for b in boundaries]
+        tenure_labels = [f"{edges[i]:g}-{edges[i + 1]:g} ans" for i in range(len(boundaries))] + [f"{edges[-1]:g}+ ans"]
+    
+    for g, name in enumerate(group_names):
+        group = {
+            "groupe": name,
+            "effectif": int(counts[g]),
+            "salaire_moyen": round(float(means[g]), 2),
+            "ecart_type": round(float(stds[g]), 2),
+            "salaire_min": float(sorted_salaries[starts[g]]),
+            "salaire_max": float(sorted_salaries[starts[g] + counts[g] - 1]),
+            "percentiles": {f"P{pct:g}": round(float(values[g]), 2) for pct, values in group_percentiles.items()},
+            "masse_salariale": round(float(sums[g]), 2)
+        }
+        if augmentation_pct:
+            group["masse_salariale_projetee"] = round(float(sums[g]) * (1 + augmentation_pct / 100), 2)
+        if histogram_bins:
+            group["histogramme"] = [int(count) for count in histograms[g]]
+        if tenure_buckets is not None:
+            group["anciennete_moyenne"] = round(float(tenure_sums[g] / tenure_known[g]), 2) if tenure_known[g] else None
+            group["anciennete"] = dict(zip(tenure_labels, (int(count) for count in tenure_counts[g])))
+        result["groupes"].append(group)
+    
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+@mcp.resource("employees://{employee_id}", mime_type="application/json")
+def employee_resource(employee_id: str) -> str:
+    """Fiche d'un employé (ressource abonnable)"""
+    try:
+        return get_employee(int(employee_id))
+    except ValueError:
+        raise ValueError(f"Aucun employé trouvé avec l'ID {employee_id}")
+
+@mcp.resource("employees://departement/{name}", mime_type="application/json")
+def department_resource(name: str) -> str:
+    """Employés d'un département (ressource abonnable)"""
+    indexes = get_indexes()
+    stats = indexes.departments.find(unquote(name))
+    ids = sorted(stats.ids) if stats else []
+    return json.dumps([indexes.by_id[emp_id] for emp_id in ids], indent=2, ensure_ascii=False)
+
+@mcp.tool()
+def get_cache_stats() -> str:
+    """Obtient les statistiques du cache des employés (hits, rechargements)"""
+    return json.dumps(_cache.stats(), indent=2)
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
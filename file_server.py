@@ -4,74 +4,1711 @@ Serveur MCP File System - Version FastMCP avec décorateurs
 """
 
 import os
+import re
+import bz2
+import gzip
 import json
-from typing import Optional
+import lzma
+import mmap
+import base64
+import fnmatch
+import glob
+import stat as stat_module
+import heapq
+import hashlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
 from mcp.server.fastmcp import FastMCP
 
 # Création du serveur FastMCP
 mcp = FastMCP("Filesystem Service")
 
+# Taille maximale renvoyée par défaut, et taille à partir de laquelle le fichier est mappé en mémoire
+DEFAULT_MAX_BYTES = 1024 * 1024
+MMAP_THRESHOLD = 1024 * 1024
+
+@contextmanager
+def open_view(path: str):
+    """Ouvre un fichier en lecture binaire et retourne (contenu, taille)
+    
+    Les gros fichiers sont mappés en mémoire: seules les pages lues sont chargées.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield f.read(), size
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view, size
+
+def char_boundary(view, pos: int, size: int) -> int:
+    """Recule une position d'octet jusqu'au début d'un caractère UTF-8"""
+    limit = max(pos - 3, 0)
+    while limit < pos < size and 0x80 <= view[pos] < 0xC0:
+        pos -= 1
+    return pos
+
+def next_char_boundary(view, pos: int, size: int) -> int:
+    """Avance une position d'octet jusqu'au début du caractère UTF-8 suivant"""
+    limit = min(pos + 3, size)
+    while pos < limit and 0x80 <= view[pos] < 0xC0:
+        pos += 1
+    return pos
+
+def line_start(view, line: int, size: int, pos: int = 0, chunk_size: int = MMAP_THRESHOLD) -> int:
+    """Position du début de la N-ième ligne à partir de pos (numérotée à partir de 1)
+    
+    Les sauts de ligne sont comptés par blocs pour éviter une recherche par ligne.
+    """
+    remaining = line - 1
+    while remaining:
+        chunk = view[pos:pos + chunk_size]
+        count = chunk.count(b"\n")
+        if count < remaining:
+            if pos + len(chunk) >= size:
+                return size
+            remaining -= count
+            pos += len(chunk)
+            continue
+        offset = 0
+        for _ in range(remaining):
+            offset = chunk.find(b"\n", offset) + 1
+        pos += offset
+        remaining = 0
+    return pos
+
+def tail_start(view, lines: int, size: int) -> int:
+    """Position du début des N dernières lignes, en lisant depuis la fin"""
+    end = size - 1 if size and view[size - 1] == 0x0A else size
+    for _ in range(lines):
+        end = view.rfind(b"\n", 0, end)
+        if end == -1:
+            return 0
+    return end + 1
+
+# Formats compressés: signature, extension et fonction d'ouverture (nom de fichier ou objet fichier)
+COMPRESSION_FORMATS = {
+    "gzip": (b"\x1f\x8b", ".gz", gzip.open),
+    "bz2": (b"BZh", ".bz2", bz2.open),
+    "xz": (b"\xfd7zXZ\x00", ".xz", lzma.open),
+}
+# Taille décompressée maximale lue dans un fichier compressé (protection contre les bombes)
+MAX_DECOMPRESSED_BYTES = int(os.getenv("FILE_MAX_DECOMPRESSED_BYTES", str(1024 * 1024 * 1024)))
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+def detect_compression(path: str) -> Optional[str]:
+    """Détecte un fichier compressé par sa signature (quelle que soit son extension)"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for name, (magic, _, _) in COMPRESSION_FORMATS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+def compression_for_output(path: str, compress: str) -> Optional[str]:
+    """Format de compression d'un fichier écrit: 'auto' le déduit de l'extension"""
+    if compress == "none":
+        return None
+    if compress == "auto":
+        return next((name for name, (_, extension, _) in COMPRESSION_FORMATS.items()
+                     if path.lower().endswith(extension)), None)
+    if compress not in COMPRESSION_FORMATS:
+        raise ValueError(f"Compression invalide. Utilisez: auto, none, {', '.join(COMPRESSION_FORMATS)}")
+    return compress
+
+def decompressed_chunks(path: str, compression: str):
+    """Décompresse un fichier par blocs, en respectant MAX_DECOMPRESSED_BYTES au fil de la lecture"""
+    total = 0
+    with COMPRESSION_FORMATS[compression][2](path, 'rb') as f:
+        while True:
+            chunk = f.read(DECOMPRESS_CHUNK_SIZE)
+            if not chunk:
+                return
+            total += len(chunk)
+            if total > MAX_DECOMPRESSED_BYTES:
+                raise ValueError(f"Décompression interrompue: plus de {MAX_DECOMPRESSED_BYTES} octets "
+                                 f"(limite FILE_MAX_DECOMPRESSED_BYTES)")
+            yield chunk
+
+def read_compressed(
+    path: str,
+    compression: str,
+    offset: int,
+    length: Optional[int],
+    start_line: Optional[int],
+    end_line: Optional[int],
+    tail_lines: Optional[int],
+    max_bytes: int
+) -> Tuple[bytes, int, bool, Optional[int]]:
+    """Lit une partie d'un fichier compressé sans le décompresser au-delà du nécessaire
+    
+    Les positions et numéros de ligne portent sur le contenu décompressé.
+    
+    Returns:
+        (octets lus, position de départ, contenu tronqué à max_bytes,
+         fin de la plage demandée ou None si elle va jusqu'à la fin du fichier)
+    """
+    chunks = decompressed_chunks(path, compression)
+    data = bytearray()
+    pos = 0
+    range_end = None
+    
+    if tail_lines is not None:
+        # Seules les dernières lignes sont gardées en mémoire
+        start = 0
+        for chunk in chunks:
+            data += chunk
+            pos += len(chunk)
+            cut = tail_start(data, tail_lines, len(data))
+            if cut:
+                del data[:cut]
+                start += cut
+    elif start_line is not None or end_line is not None:
+        first = start_line or 1
+        last = end_line if end_line is not None else float("inf")
+        line = 1
+        start = None
+        for chunk in chunks:
+            if last < first:
+                break
+            index = 0
+            full = len(data) > max_bytes
+            # Saute rapidement les blocs entièrement avant la première ligne, ou,
+            # une fois max_bytes atteint, ceux qui restent avant la dernière
+            if (start is None or full) and line + chunk.count(b"\n") < (first if start is None else last):
+                line += chunk.count(b"\n")
+                pos += len(chunk)
+                continue
+            while index < len(chunk) and line <= last:
+                newline = chunk.find(b"\n", index)
+                line_end = len(chunk) if newline == -1 else newline + 1
+                if line >= first:
+                    if start is None:
+                        start = pos + index
+                    if len(data) <= max_bytes:
+                        data += chunk[index:line_end]
+                    range_end = pos + line_end
+                if newline == -1:
+                    break
+                line += 1
+                index = line_end
+            pos += len(chunk)
+            if line > last:
+                break
+            if len(data) > max_bytes and end_line is None:
+                # La suite va jusqu'à la fin du fichier: inutile d'en chercher la fin
+                break
+        else:
+            # Fin du fichier atteinte avant end_line
+            range_end = None
+        start = pos if start is None else start
+        if end_line is None or last < first:
+            range_end = None
+    else:
+        start = offset
+        range_end = offset + length if length is not None else None
+        # Jusqu'à 3 octets de plus pour terminer un caractère commencé dans la plage
+        stop = offset + length + 3 if length is not None else float("inf")
+        stop = min(stop, offset + max_bytes + 1)
+        for chunk in chunks:
+            chunk_start = pos
+            pos += len(chunk)
+            if pos > offset:
+                data += chunk[max(0, offset - chunk_start):max(0, int(min(stop, pos)) - chunk_start)]
+            if pos >= stop:
+                break
+        # Un départ au milieu d'un caractère UTF-8 avance jusqu'au caractère suivant
+        skip = next_char_boundary(data, 0, len(data))
+        del data[:skip]
+        start += skip
+        if length is not None:
+            # Un caractère appartient à la page où il commence
+            del data[next_char_boundary(data, min(max(offset + length - start, 0), len(data)), len(data)):]
+    
+    truncated = len(data) > max_bytes
+    end = char_boundary(data, min(len(data), max_bytes), len(data))
+    return bytes(data[:end]), start, truncated, range_end
+
+def read_plain(
+    path: str,
+    offset: int,
+    length: Optional[int],
+    start_line: Optional[int],
+    end_line: Optional[int],
+    tail_lines: Optional[int],
+    max_bytes: int
+) -> Tuple[str, int, int, int, bool, int]:
+    """Lit une partie d'un fichier non compressé (mappé en mémoire s'il est gros)
+    
+    Returns:
+        (contenu, position de départ, position de fin, taille du fichier, contenu tronqué,
+         fin de la plage demandée)
+    """
+    with open_view(path) as (view, size):
+        if tail_lines is not None:
+            start, end = tail_start(view, tail_lines, size), size
+        elif start_line is not None or end_line is not None:
+            start_line = start_line or 1
+            start = line_start(view, start_line, size)
+            end = size
+            if end_line is not None and end_line < start_line:
+                end = start
+            elif end_line is not None:
+                last = line_start(view, end_line - start_line + 1, size, start)
+                end = view.find(b"\n", last, size)
+                end = size if end == -1 else end + 1
+        else:
+            # Un caractère appartient à la page où il commence: le départ et la
+            # fin avancent jusqu'au caractère suivant, comme pour les fichiers
+            # compressés, et deux pages offset/length ne se chevauchent jamais
+            start = next_char_boundary(view, min(offset, size), size)
+            end = size if length is None else min(offset + length, size)
+        
+        range_end = end
+        end = max(next_char_boundary(view, end, size), start)
+        truncated = end - start > max_bytes
+        end = char_boundary(view, min(end, start + max_bytes), size)
+        return view[start:end].decode('utf-8'), start, end, size, truncated, range_end
+
 @mcp.tool()
-def read_file(path: str) -> str:
-    """Lit le contenu d'un fichier"""
+def read_file(
+    path: str,
+    offset: int = 0,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    tail_lines: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> str:
+    """Lit le contenu d'un fichier, en entier ou par morceaux
+    
+    Args:
+        path: Chemin du fichier
+        offset: Position de départ en octets
+        length: Nombre d'octets à lire depuis offset (jusqu'à la fin par défaut)
+        start_line: Première ligne à lire (numérotée à partir de 1)
+        end_line: Dernière ligne à lire (incluse)
+        tail_lines: Lit seulement les N dernières lignes
+        max_bytes: Taille maximale renvoyée; au-delà, le contenu est tronqué et signalé
+    """
+    line_mode = start_line is not None or end_line is not None
+    byte_mode = offset != 0 or length is not None
+    if sum([line_mode, byte_mode, tail_lines is not None]) > 1:
+        raise ValueError("Utilisez soit offset/length, soit start_line/end_line, soit tail_lines")
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset et length doivent être positifs")
+    if (start_line is not None and start_line < 1) or (end_line is not None and end_line < 1):
+        raise ValueError("Les numéros de ligne commencent à 1")
+    if tail_lines is not None and tail_lines < 1:
+        raise ValueError("tail_lines doit être supérieur à 0")
+    if max_bytes < 1:
+        raise ValueError("max_bytes doit être supérieur à 0")
+    
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
+        compression = detect_compression(path)
+        if compression:
+            data, start, truncated, range_end = read_compressed(
+                path, compression, offset, length, start_line, end_line, tail_lines, max_bytes
+            )
+            size, end = None, start + len(data)
+            content = data.decode('utf-8')
+        else:
+            content, start, end, size, truncated, range_end = read_plain(
+                path, offset, length, start_line, end_line, tail_lines, max_bytes
+            )
+            if range_end == size:
+                range_end = None
     except FileNotFoundError:
         raise ValueError(f"Fichier '{path}' non trouvé")
     except Exception as e:
         raise ValueError(f"Erreur lors de la lecture: {str(e)}")
+    
+    if truncated:
+        shown = f"{end - start} octets affichés sur {size}" if size is not None else f"{end - start} octets décompressés affichés"
+        # La suite se lit toujours par octets, même pour une lecture par lignes:
+        # length borne la reprise à la fin de la plage demandée
+        resume = f"offset={end}" if range_end is None else f"offset={end} length={range_end - end}"
+        content += f"\n[... tronqué: {shown} (octets {start} à {end}), reprenez avec {resume} ...]"
+    return content
+
+COPY_CHUNK_SIZE = 1024 * 1024
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+@contextmanager
+def atomic_output(path: str, fsync: bool = False):
+    """Écrit dans un fichier temporaire du même répertoire, puis remplace le fichier
+    
+    Un lecteur ou un crash ne voit jamais de fichier partiellement écrit. Un
+    lien symbolique est résolu: c'est sa cible qui est remplacée. Les
+    permissions, le propriétaire et le groupe du fichier existant sont
+    conservés; si le propriétaire ne peut pas être repris (processus non
+    privilégié) ou si le fichier a plusieurs liens physiques, le contenu est
+    recopié en place à la fin: le fichier garde son inode, mais l'écriture
+    n'est alors plus atomique.
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    try:
+        existing = os.stat(path)
+    except FileNotFoundError:
+        existing = None
+    
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    try:
+        in_place = existing is not None and existing.st_nlink > 1
+        if existing is not None and not in_place and hasattr(os, "chown"):
+            temp_stat = os.fstat(fd)
+            if (temp_stat.st_uid, temp_stat.st_gid) != (existing.st_uid, existing.st_gid):
+                try:
+                    os.chown(temp_path, existing.st_uid, existing.st_gid)
+                except OSError:
+                    in_place = True
+        
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            if fsync and not in_place:
+                os.fsync(f.fileno())
+        
+        if in_place:
+            with open(temp_path, 'rb') as source, open(path, 'r+b') as target:
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                target.truncate()
+                target.flush()
+                if fsync:
+                    os.fsync(target.fileno())
+            os.unlink(temp_path)
+            return
+        
+        os.chmod(temp_path, existing.st_mode & 0o7777 if existing is not None else 0o666 & ~PROCESS_UMASK)
+        os.replace(temp_path, path)
+        if fsync and hasattr(os, "O_DIRECTORY"):
+            # Rend le renommage durable
+            directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory_fd)
+            finally:
+                os.close(directory_fd)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def read_umask() -> int:
+    """Lit le masque de création de fichiers du processus
+    
+    os.umask ne sait que le remplacer: le lire ainsi n'est sûr qu'au
+    chargement du module, avant le démarrage des pools de threads.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Masque lu une seule fois: le modifier pendant que des threads créent des
+# fichiers leur donnerait des permissions trop larges
+PROCESS_UMASK = read_umask()
+
+def copy_range(view, output, start: int, end: int) -> None:
+    """Copie une plage d'octets par blocs, sans la charger entièrement en mémoire"""
+    while start < end:
+        chunk_end = min(start + COPY_CHUNK_SIZE, end)
+        output.write(view[start:chunk_end])
+        start = chunk_end
+
+def count_newlines(view, start: int, end: int) -> int:
+    """Compte les sauts de ligne d'une plage par blocs"""
+    count = 0
+    while start < end:
+        chunk_end = min(start + COPY_CHUNK_SIZE, end)
+        count += view[start:chunk_end].count(b"\n")
+        start = chunk_end
+    return count
+
+METADATA_CACHE_SIZE = int(os.getenv("FILE_METADATA_CACHE_SIZE", "1024"))
+METADATA_STAT_TTL = float(os.getenv("FILE_METADATA_STAT_TTL", "5"))
+# Un répertoire modifié il y a moins longtemps que la résolution de son mtime n'est pas mis en cache
+RACY_WINDOW_NS = 2_000_000_000
+
+class DirectoryEntry:
+    """Contenu d'un répertoire en cache, valable tant que son mtime ne change pas"""
+
+    def __init__(self, mtime_ns: int, names: Optional[List[Tuple[str, bool, bool]]]):
+        self.mtime_ns = mtime_ns
+        self.names = names
+        # Stat des entrées du répertoire: nom -> (instant de lecture, stat)
+        self.stats: Dict[str, Tuple[float, os.stat_result]] = {}
+
+class MetadataCache:
+    """Cache LRU des listes de répertoires et des stat de fichiers
+    
+    Une liste est validée par le mtime de son répertoire: un seul stat au lieu
+    d'un parcours complet. La modification d'un fichier en place ne change pas
+    le mtime de son répertoire: les stat de fichiers expirent donc aussi après
+    METADATA_STAT_TTL secondes. Les écritures de ce serveur invalident les
+    entrées concernées.
+    """
+
+    def __init__(self, max_directories: int = METADATA_CACHE_SIZE):
+        self.max_directories = max_directories
+        self.directories: "OrderedDict[str, DirectoryEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _entry(self, directory: str, directory_stat: os.stat_result) -> Optional[DirectoryEntry]:
+        """Retourne l'entrée d'un répertoire si son mtime est inchangé"""
+        entry = self.directories.get(directory)
+        if entry is None:
+            return None
+        if entry.mtime_ns != directory_stat.st_mtime_ns:
+            del self.directories[directory]
+            return None
+        self.directories.move_to_end(directory)
+        return entry
+
+    def _store(self, directory: str, entry: DirectoryEntry) -> None:
+        if time.time_ns() - entry.mtime_ns < RACY_WINDOW_NS:
+            return
+        self.directories[directory] = entry
+        self.directories.move_to_end(directory)
+        while len(self.directories) > self.max_directories:
+            self.directories.popitem(last=False)
+            self.evictions += 1
+
+    def listing(self, directory: str) -> List[Tuple[str, bool, bool]]:
+        """Liste un répertoire: (nom, est un fichier, est un répertoire)"""
+        directory = os.path.abspath(directory)
+        directory_stat = os.stat(directory)
+        with self.lock:
+            entry = self._entry(directory, directory_stat)
+            if entry is not None and entry.names is not None:
+                self.hits += 1
+                return entry.names
+            self.misses += 1
+        
+        with os.scandir(directory) as entries:
+            names = [(entry.name, entry.is_file(), entry.is_dir()) for entry in entries]
+        with self.lock:
+            entry = self._entry(directory, directory_stat)
+            if entry is None:
+                entry = DirectoryEntry(directory_stat.st_mtime_ns, names)
+                self._store(directory, entry)
+            else:
+                entry.names = names
+        return names
+
+    def stat(self, path: str, directory_stats: Optional[Dict[str, os.stat_result]] = None) -> os.stat_result:
+        """Stat d'un chemin, servi par le cache si son répertoire n'a pas changé
+        
+        Args:
+            directory_stats: stat des répertoires déjà validés pendant l'appel en cours
+        """
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        if directory_stats is not None and directory in directory_stats:
+            directory_stat = directory_stats[directory]
+        else:
+            directory_stat = os.stat(directory)
+            if directory_stats is not None:
+                directory_stats[directory] = directory_stat
+        
+        now = time.monotonic()
+        with self.lock:
+            entry = self._entry(directory, directory_stat)
+            cached = entry.stats.get(name) if entry is not None else None
+            if cached is not None and now - cached[0] < METADATA_STAT_TTL:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        
+        result = os.stat(path)
+        with self.lock:
+            entry = self._entry(directory, directory_stat)
+            if entry is None:
+                entry = DirectoryEntry(directory_stat.st_mtime_ns, None)
+                self._store(directory, entry)
+            entry.stats[name] = (now, result)
+        return result
+
+    def invalidate(self, path: str, ancestors: bool = False) -> None:
+        """Oublie un chemin et son répertoire après une écriture du serveur
+        
+        Args:
+            ancestors: Oublie aussi tous les répertoires parents (création en cascade)
+        """
+        path = os.path.abspath(path)
+        parents = 1
+        with self.lock:
+            while True:
+                if self.directories.pop(path, None) is not None:
+                    self.invalidations += 1
+                parent = os.path.dirname(path)
+                if parent == path or (not ancestors and parents == 0):
+                    break
+                path = parent
+                parents -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les compteurs du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cached_directories": len(self.directories)
+        }
+
+# Cache partagé par tous les outils du serveur
+_metadata_cache = MetadataCache()
 
 @mcp.tool()
-def write_file(path: str, content: str) -> str:
-    """Écrit du contenu dans un fichier"""
+def write_file(
+    path: str,
+    content: str,
+    mode: str = "overwrite",
+    atomic: bool = True,
+    fsync: bool = False,
+    compress: str = "auto"
+) -> str:
+    """Écrit du contenu dans un fichier
+    
+    Args:
+        path: Chemin du fichier
+        content: Contenu à écrire
+        mode: 'overwrite' (remplace le fichier) ou 'append' (ajoute à la fin)
+        atomic: En mode overwrite, écrit dans un fichier temporaire puis le renomme
+        fsync: Force l'écriture sur disque avant de répondre
+        compress: 'auto' (selon l'extension .gz, .bz2 ou .xz), 'none', 'gzip', 'bz2' ou 'xz'
+    """
+    if mode not in ("overwrite", "append"):
+        raise ValueError("Mode invalide. Utilisez 'overwrite' ou 'append'")
+    compression = compression_for_output(path, compress)
+    
+    def write(f) -> None:
+        if compression:
+            # En ajout, un nouveau membre compressé est concaténé: les lecteurs les enchaînent
+            with COMPRESSION_FORMATS[compression][2](f, 'wb') as compressed:
+                compressed.write(data)
+        else:
+            f.write(data)
+        if fsync and (mode == "append" or not atomic):
+            f.flush()
+            os.fsync(f.fileno())
+    
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return f"Fichier '{path}' écrit avec succès"
+        data = content.encode('utf-8')
+        if mode == "append":
+            with open(path, 'ab') as f:
+                write(f)
+            result = f"{len(data)} octets ajoutés au fichier '{path}'"
+        else:
+            if atomic:
+                with atomic_output(path, fsync) as f:
+                    write(f)
+            else:
+                with open(path, 'wb') as f:
+                    write(f)
+            result = f"Fichier '{path}' écrit avec succès"
     except Exception as e:
         raise ValueError(f"Erreur lors de l'écriture: {str(e)}")
+    finally:
+        _metadata_cache.invalidate(path)
+    
+    if compression:
+        result += f" (compression {compression})"
+    return result
+
+def parse_unified_diff(diff: str) -> List[Tuple[int, List[bytes], List[bytes], bool]]:
+    """Découpe un diff unifié en blocs (ligne de départ, anciennes lignes, nouvelles lignes,
+    nouvelle fin de fichier sans saut de ligne)"""
+    hunks = []
+    lines = diff.splitlines()
+    index = 0
+    while index < len(lines):
+        header = HUNK_HEADER.match(lines[index])
+        index += 1
+        if not header:
+            continue
+        
+        old_start = int(header.group(1))
+        old_count = int(header.group(2) if header.group(2) is not None else 1)
+        new_count = int(header.group(4) if header.group(4) is not None else 1)
+        # Un bloc sans ancienne ligne s'insère après la ligne indiquée
+        if old_count == 0:
+            old_start += 1
+        
+        old_lines, new_lines = [], []
+        no_newline = False
+        last_kind = None
+        while index < len(lines) and (len(old_lines) < old_count or len(new_lines) < new_count or lines[index].startswith("\\")):
+            line = lines[index]
+            index += 1
+            kind, text = line[:1], line[1:].encode('utf-8')
+            if kind == "\\":
+                no_newline = no_newline or last_kind in ("+", " ")
+                continue
+            if kind in (" ", ""):
+                old_lines.append(text)
+                new_lines.append(text)
+            elif kind == "-":
+                old_lines.append(text)
+            elif kind == "+":
+                new_lines.append(text)
+            else:
+                raise ValueError(f"Ligne de diff invalide: '{line}'")
+            last_kind = kind or " "
+        
+        if len(old_lines) != old_count or len(new_lines) != new_count:
+            raise ValueError(f"Bloc de diff incomplet: '{header.group(0)}'")
+        hunks.append((old_start, old_lines, new_lines, no_newline))
+    
+    if not hunks:
+        raise ValueError("Aucun bloc '@@ ... @@' trouvé dans le diff")
+    return hunks
+
+@mcp.tool()
+def patch_file(
+    path: str,
+    diff: str = "",
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    content: str = "",
+    fsync: bool = False
+) -> str:
+    """Modifie une partie d'un fichier sans renvoyer tout son contenu
+    
+    Soit un diff unifié est appliqué (les lignes de contexte et supprimées sont
+    vérifiées), soit les lignes start_line à end_line sont remplacées par content.
+    Le fichier est réécrit atomiquement: en cas d'erreur il reste inchangé.
+    
+    Args:
+        path: Chemin du fichier
+        diff: Diff unifié (blocs '@@ -a,b +c,d @@')
+        start_line: Première ligne à remplacer (numérotée à partir de 1)
+        end_line: Dernière ligne à remplacer; start_line - 1 pour une simple insertion
+        content: Nouveau contenu des lignes remplacées
+        fsync: Force l'écriture sur disque avant de répondre
+    """
+    if bool(diff) == (start_line is not None):
+        raise ValueError("Indiquez soit diff, soit start_line/end_line et content")
+    try:
+        if detect_compression(path):
+            raise ValueError("patch_file ne modifie pas les fichiers compressés: utilisez read_file puis write_file")
+    except FileNotFoundError:
+        raise ValueError(f"Fichier '{path}' non trouvé")
+    
+    if diff:
+        hunks = parse_unified_diff(diff)
+    else:
+        end_line = start_line if end_line is None else end_line
+        if start_line < 1 or end_line < start_line - 1:
+            raise ValueError("Plage de lignes invalide")
+        data = content.encode('utf-8')
+        new_lines = data.split(b"\n")
+        no_newline = not data.endswith(b"\n")
+        if not no_newline or not data:
+            new_lines.pop()
+        # None: les anciennes lignes sont remplacées sans vérification
+        hunks = [(start_line, [None] * (end_line - start_line + 1), new_lines, no_newline and bool(data))]
+    
+    removed = added = 0
+    try:
+        with open_view(path) as (view, size), atomic_output(path, fsync) as output:
+            pos = 0
+            line = 1
+            for number, (old_start, old_lines, new_lines, no_newline) in enumerate(hunks, 1):
+                if old_start < line:
+                    raise ValueError(f"Bloc {number}: les blocs doivent être dans l'ordre du fichier")
+                start = line_start(view, old_start - line + 1, size, pos)
+                copy_range(view, output, pos, start)
+                if start == size:
+                    # Insertion en fin de fichier: la ligne doit suivre immédiatement la dernière
+                    partial = size > pos and view[size - 1] != 0x0A
+                    if old_start - line > count_newlines(view, pos, size) + partial:
+                        raise ValueError(f"Bloc {number}: la ligne {old_start} dépasse la fin du fichier")
+                    if partial and new_lines:
+                        output.write(b"\n")
+                
+                pos = start
+                for offset, expected in enumerate(old_lines):
+                    if pos >= size:
+                        raise ValueError(f"Bloc {number}: fin du fichier atteinte à la ligne {old_start + offset}")
+                    end = view.find(b"\n", pos)
+                    end = size if end == -1 else end + 1
+                    actual = view[pos:end].rstrip(b"\n").rstrip(b"\r")
+                    if expected is not None and actual != expected.rstrip(b"\r"):
+                        raise ValueError(
+                            f"Bloc {number}: la ligne {old_start + offset} ne correspond pas "
+                            f"(attendu '{expected.decode('utf-8', errors='replace')}', "
+                            f"trouvé '{actual.decode('utf-8', errors='replace')}')"
+                        )
+                    pos = end
+                
+                at_end = pos >= size
+                for offset, text in enumerate(new_lines):
+                    last = offset == len(new_lines) - 1
+                    output.write(text if last and no_newline and at_end else text + b"\n")
+                removed += len(old_lines)
+                added += len(new_lines)
+                line = old_start + len(old_lines)
+            
+            copy_range(view, output, pos, size)
+    except FileNotFoundError:
+        raise ValueError(f"Fichier '{path}' non trouvé")
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Erreur lors de la modification: {str(e)}")
+    finally:
+        _metadata_cache.invalidate(path)
+    
+    return f"Fichier '{path}' modifié: {len(hunks)} bloc(s), -{removed} +{added} ligne(s)"
 
 @mcp.tool()
 def list_files(directory: str = ".") -> str:
     """Liste les fichiers d'un répertoire"""
     try:
         files = []
-        for item in os.listdir(directory):
-            item_path = os.path.join(directory, item)
-            if os.path.isfile(item_path):
-                files.append(f"📄 {item}")
-            elif os.path.isdir(item_path):
-                files.append(f"📁 {item}/")
+        for name, is_file, is_dir in _metadata_cache.listing(directory):
+            if is_file:
+                files.append(f"📄 {name}")
+            elif is_dir:
+                files.append(f"📁 {name}/")
         return "\n".join(files) if files else "Aucun fichier trouvé"
     except Exception as e:
         raise ValueError(f"Erreur: {str(e)}")
 
+WALK_SORT_KEYS = ("path", "name", "size", "mtime")
+WALK_MAX_LIMIT = 100000
+
+def compile_globs(patterns: Optional[List[str]]) -> Optional[Any]:
+    """Compile une liste de motifs glob en une seule expression régulière"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+def glob_matches(regex: Any, name: str, relative_path: str) -> bool:
+    """Un motif s'applique au nom de l'entrée ou à son chemin relatif"""
+    return bool(regex.match(name) or regex.match(relative_path))
+
+def parse_timestamp(value: str) -> float:
+    """Convertit une date ISO ('2024-01-31' ou '2024-01-31T12:00:00') en timestamp"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Date invalide: '{value}'. Utilisez le format AAAA-MM-JJ")
+
+def encode_walk_cursor(sort_by: str, descending: bool, last_key: Any, last_path: str) -> str:
+    """Encode la position de la dernière entrée d'une page dans un curseur opaque"""
+    payload = json.dumps([sort_by, descending, last_key, last_path], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_walk_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple[Any, str]:
+    """Décode un curseur et vérifie qu'il correspond au tri demandé"""
+    try:
+        cursor_sort, cursor_desc, last_key, last_path = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+    
+    if cursor_sort != sort_by or cursor_desc != descending:
+        raise ValueError("Le curseur ne correspond pas au tri demandé")
+    
+    return last_key, last_path
+
+def scan_tree(directory: str, max_depth: Optional[int], include: Any, exclude: Any, entry_type: str, need_stat: bool):
+    """Parcourt une arborescence avec os.scandir, sans suivre les liens symboliques
+    
+    Le type de chaque entrée vient de d_type: stat n'est appelé que si la taille
+    ou la date sont nécessaires. Le cache des empreintes (et ses fichiers
+    temporaires) n'est jamais produit, même s'il est placé dans l'arborescence.
+    
+    Yields:
+        (chemin relatif, est un répertoire, stat ou None); les répertoires
+        illisibles sont produits avec le chemin et l'exception
+    """
+    stack = [("", 0)]
+    while stack:
+        relative_dir, depth = stack.pop()
+        try:
+            with os.scandir(os.path.join(directory, relative_dir) if relative_dir else directory) as entries:
+                for entry in entries:
+                    relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if exclude is not None and glob_matches(exclude, entry.name, relative_path):
+                        continue
+                    if is_hash_cache_file(entry.name, entry.path):
+                        continue
+                    
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and (max_depth is None or depth < max_depth):
+                        stack.append((relative_path, depth + 1))
+                    
+                    if entry_type != "all" and is_dir != (entry_type == "dir"):
+                        continue
+                    if include is not None and not glob_matches(include, entry.name, relative_path):
+                        continue
+                    yield relative_path, is_dir, entry.stat(follow_symlinks=False) if need_stat else None
+        except OSError as e:
+            yield relative_dir, True, e
+
+@mcp.tool()
+def walk_files(
+    directory: str = ".",
+    max_depth: Optional[int] = None,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    entry_type: str = "file",
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: str = "",
+    modified_before: str = "",
+    sort_by: str = "path",
+    descending: bool = False,
+    limit: int = 1000,
+    cursor: str = "",
+    details: bool = False
+) -> str:
+    """Liste récursivement les fichiers d'une arborescence, avec filtres et pagination
+    
+    La sortie est compacte: une ligne d'en-tête '# total=N returned=k next_cursor=...'
+    puis un chemin relatif par ligne (suivi de la taille et de la date si details=True).
+    Les répertoires se terminent par '/'.
+    
+    Args:
+        directory: Répertoire racine
+        max_depth: Profondeur maximale (0 = seulement le répertoire racine)
+        include: Motifs glob à inclure, sur le nom ou le chemin relatif (ex: ['*.py'])
+        exclude: Motifs glob à exclure; un répertoire exclu n'est pas parcouru (ex: ['.git'])
+        entry_type: 'file', 'dir' ou 'all'
+        min_size: Taille minimale en octets
+        max_size: Taille maximale en octets
+        modified_after: Modifiés après cette date (AAAA-MM-JJ)
+        modified_before: Modifiés avant cette date (AAAA-MM-JJ)
+        sort_by: Tri par 'path', 'name', 'size' ou 'mtime'
+        descending: Tri décroissant
+        limit: Nombre maximum d'entrées par page
+        cursor: Curseur 'next_cursor' de la page précédente
+        details: Ajoute la taille et la date de modification
+    """
+    if sort_by not in WALK_SORT_KEYS:
+        raise ValueError(f"Tri invalide. Utilisez: {', '.join(WALK_SORT_KEYS)}")
+    if entry_type not in ("file", "dir", "all"):
+        raise ValueError("entry_type invalide. Utilisez 'file', 'dir' ou 'all'")
+    if not 1 <= limit <= WALK_MAX_LIMIT:
+        raise ValueError(f"limit doit être compris entre 1 et {WALK_MAX_LIMIT}")
+    if max_depth is not None and max_depth < 0:
+        raise ValueError("max_depth doit être positif")
+    if not os.path.isdir(directory):
+        raise ValueError(f"Répertoire '{directory}' non trouvé")
+    
+    after = parse_timestamp(modified_after) if modified_after else None
+    before = parse_timestamp(modified_before) if modified_before else None
+    last = tuple(decode_walk_cursor(cursor, sort_by, descending)) if cursor else None
+    need_stat = (details or sort_by in ("size", "mtime") or min_size is not None
+                 or max_size is not None or after is not None or before is not None)
+    
+    counts = {"total": 0, "errors": 0}
+    
+    def candidates():
+        for relative_path, is_dir, stat in scan_tree(
+            directory, max_depth, compile_globs(include), compile_globs(exclude), entry_type, need_stat
+        ):
+            if isinstance(stat, OSError):
+                counts["errors"] += 1
+                continue
+            if stat is not None:
+                if min_size is not None and stat.st_size < min_size:
+                    continue
+                if max_size is not None and stat.st_size > max_size:
+                    continue
+                if after is not None and stat.st_mtime < after:
+                    continue
+                if before is not None and stat.st_mtime >= before:
+                    continue
+            
+            counts["total"] += 1
+            if sort_by == "path":
+                sort_value = relative_path
+            elif sort_by == "name":
+                sort_value = relative_path.rsplit("/", 1)[-1]
+            elif sort_by == "size":
+                sort_value = stat.st_size
+            else:
+                sort_value = stat.st_mtime
+            key = (sort_value, relative_path)
+            
+            # Pagination par clé: seules les entrées après le curseur sont candidates
+            if last is not None and (key <= last if not descending else key >= last):
+                continue
+            yield key, is_dir, stat
+    
+    # Sélection en un seul passage; le tas ne garde que limit + 1 entrées
+    select = heapq.nlargest if descending else heapq.nsmallest
+    page = select(limit + 1, candidates(), key=lambda candidate: candidate[0])
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    next_cursor = ""
+    if has_more:
+        (last_key, last_path), _, _ = page[-1]
+        next_cursor = encode_walk_cursor(sort_by, descending, last_key, last_path)
+    
+    header = f"# total={counts['total']} returned={len(page)} next_cursor={next_cursor}"
+    if counts["errors"]:
+        header += f" erreurs={counts['errors']}"
+    lines = [header]
+    for (_, relative_path), is_dir, stat in page:
+        name = relative_path + "/" if is_dir else relative_path
+        if details:
+            modified = datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds')
+            lines.append(f"{name}\t{stat.st_size}\t{modified}")
+        else:
+            lines.append(name)
+    return "\n".join(lines)
+
+SEARCH_MAX_LINE_LENGTH = 500
+BINARY_SNIFF_SIZE = 8192
+
+def is_binary(head: bytes) -> bool:
+    """Un fichier contenant un octet nul dans son début est considéré comme binaire"""
+    return b"\0" in head
+
+def format_line(path: str, number: int, separator: str, line: bytes) -> str:
+    """Formate une ligne à la manière de grep: chemin:numéro:texte"""
+    text = line.rstrip(b"\r\n").decode('utf-8', errors='replace')
+    if len(text) > SEARCH_MAX_LINE_LENGTH:
+        text = text[:SEARCH_MAX_LINE_LENGTH] + "…"
+    return f"{path}{separator}{number}{separator}{text}"
+
+def search_compressed(
+    path: str,
+    compression: str,
+    display_path: str,
+    regex: Any,
+    context_lines: int,
+    max_matches: int,
+    stop: threading.Event
+) -> Tuple[List[Tuple[bool, str]], int, bool]:
+    """Recherche ligne par ligne dans un fichier compressé, décompressé au fil de la lecture"""
+    lines = []
+    matches = 0
+    line_number = 0
+    printed_until = 0
+    after = 0
+    before = deque(maxlen=context_lines)
+    pending = b""
+    first = True
+    exhausted = False
+    
+    for chunk in decompressed_chunks(path, compression):
+        if first:
+            if is_binary(chunk[:BINARY_SNIFF_SIZE]):
+                return [], 0, True
+            first = False
+        if stop.is_set() or (matches >= max_matches and not after):
+            break
+        
+        pending += chunk
+        complete = pending.rfind(b"\n") + 1
+        block, pending = pending[:complete], pending[complete:]
+        for line in block.splitlines(keepends=True):
+            line_number += 1
+            is_match = regex.search(line) is not None
+            if matches >= max_matches and (is_match or not after):
+                # Le contexte final s'arrête avant la première correspondance non renvoyée
+                after = 0
+                break
+            if is_match:
+                if lines and context_lines and line_number - len(before) > printed_until + 1:
+                    lines.append((False, "--"))
+                for offset, text in enumerate(before):
+                    lines.append((False, format_line(display_path, line_number - len(before) + offset, "-", text)))
+                before.clear()
+                lines.append((True, format_line(display_path, line_number, ":", line)))
+                matches += 1
+                printed_until = line_number
+                after = context_lines
+            elif after:
+                lines.append((False, format_line(display_path, line_number, "-", line)))
+                printed_until = line_number
+                after -= 1
+            elif context_lines:
+                before.append(line)
+    else:
+        exhausted = True
+    
+    # Dernière ligne sans saut de ligne final, seulement si le fichier a été lu jusqu'au bout
+    if pending and exhausted:
+        line_number += 1
+        is_match = regex.search(pending) is not None
+        if is_match and matches < max_matches:
+            if lines and context_lines and line_number - len(before) > printed_until + 1:
+                lines.append((False, "--"))
+            for offset, text in enumerate(before):
+                lines.append((False, format_line(display_path, line_number - len(before) + offset, "-", text)))
+            lines.append((True, format_line(display_path, line_number, ":", pending)))
+            matches += 1
+        elif after and not is_match:
+            lines.append((False, format_line(display_path, line_number, "-", pending)))
+    
+    return lines, matches, False
+
+def search_file(
+    path: str,
+    display_path: str,
+    regex: Any,
+    context_lines: int,
+    max_matches: int,
+    stop: threading.Event
+) -> Tuple[List[Tuple[bool, str]], int, bool]:
+    """Recherche un motif dans un fichier
+    
+    Returns:
+        (lignes formatées avec un indicateur de correspondance,
+         nombre de lignes correspondantes, fichier binaire ignoré)
+    """
+    compression = detect_compression(path)
+    if compression:
+        return search_compressed(path, compression, display_path, regex, context_lines, max_matches, stop)
+    
+    with open_view(path) as (view, size):
+        if is_binary(view[:BINARY_SNIFF_SIZE]):
+            return [], 0, True
+        
+        # Lignes correspondantes: (numéro, début, fin), une seule fois par ligne
+        found = []
+        line_number = 1
+        counted_until = 0
+        pos = 0
+        # Début de la première ligne correspondante non renvoyée: le contexte s'arrête avant
+        limit = size
+        while pos < size and not stop.is_set():
+            match = regex.search(view, pos)
+            if match is None:
+                break
+            start = view.rfind(b"\n", 0, match.start()) + 1
+            if len(found) == max_matches:
+                limit = start
+                break
+            end = view.find(b"\n", match.end() - 1 if match.end() > match.start() else match.start())
+            end = size if end == -1 else end + 1
+            line_number += view[counted_until:start].count(b"\n")
+            counted_until = start
+            found.append((line_number, start, end))
+            pos = end
+        
+        lines = []
+        index = 0
+        while index < len(found):
+            # Regroupe les correspondances dont les contextes se touchent
+            first_number, first_start, _ = found[index]
+            group_end = index
+            while (group_end + 1 < len(found)
+                   and found[group_end + 1][0] - found[group_end][0] <= 2 * context_lines + 1):
+                group_end += 1
+            last_number = found[group_end][0]
+            matched = {number for number, _, _ in found[index:group_end + 1]}
+            
+            if lines and context_lines:
+                lines.append((False, "--"))
+            number, offset = first_number, first_start
+            for _ in range(context_lines):
+                if offset == 0:
+                    break
+                offset = view.rfind(b"\n", 0, offset - 1) + 1
+                number -= 1
+            while offset < limit and number <= last_number + context_lines:
+                next_offset = view.find(b"\n", offset)
+                next_offset = size if next_offset == -1 else next_offset + 1
+                is_match = number in matched
+                lines.append((is_match, format_line(display_path, number, ":" if is_match else "-", view[offset:next_offset])))
+                number, offset = number + 1, next_offset
+            index = group_end + 1
+        
+        return lines, len(found), False
+
+@mcp.tool()
+def search_files(
+    pattern: str,
+    directory: str = ".",
+    regex: bool = False,
+    ignore_case: bool = False,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    max_depth: Optional[int] = None,
+    max_matches: int = 200,
+    context_lines: int = 0
+) -> str:
+    """Recherche un texte ou une expression régulière dans les fichiers d'une arborescence
+    
+    Seules les lignes correspondantes sont renvoyées, au format grep
+    'chemin:ligne:texte' (et 'chemin-ligne-texte' pour le contexte).
+    Les fichiers binaires sont ignorés.
+    
+    Args:
+        pattern: Texte ou expression régulière à rechercher
+        directory: Répertoire racine de la recherche
+        regex: Si True, pattern est une expression régulière
+        ignore_case: Ignore la casse (lettres ASCII uniquement)
+        include: Motifs glob des fichiers à inclure (ex: ['*.py'])
+        exclude: Motifs glob à exclure (ex: ['.git', '*.log'])
+        max_depth: Profondeur maximale de parcours
+        max_matches: Nombre maximum de lignes correspondantes
+        context_lines: Nombre de lignes de contexte avant et après chaque correspondance
+    """
+    if not pattern:
+        raise ValueError("Le motif de recherche est vide")
+    if max_matches < 1:
+        raise ValueError("max_matches doit être supérieur à 0")
+    if not 0 <= context_lines <= 20:
+        raise ValueError("context_lines doit être compris entre 0 et 20")
+    if not os.path.isdir(directory):
+        raise ValueError(f"Répertoire '{directory}' non trouvé")
+    
+    try:
+        source = pattern.encode('utf-8')
+        # ^ et $ s'appliquent à chaque ligne, comme avec grep
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        compiled = re.compile(source if regex else re.escape(source), flags)
+    except re.error as e:
+        raise ValueError(f"Expression régulière invalide: {e}")
+    
+    paths = sorted(
+        relative_path for relative_path, _, stat in
+        scan_tree(directory, max_depth, compile_globs(include), compile_globs(exclude), "file", False)
+        if not isinstance(stat, OSError)
+    )
+    
+    # Arrête les recherches restantes dès que les fichiers déjà terminés, pris dans
+    # l'ordre des chemins, atteignent le maximum: un fichier qui précède n'est
+    # jamais interrompu par un fichier suivant terminé plus tôt
+    stop = threading.Event()
+    counts: List[Optional[int]] = [None] * len(paths)
+    prefix = [0, 0]  # (fichiers terminés en tête de liste, correspondances de ces fichiers)
+    found_lock = threading.Lock()
+    
+    def search(index: int):
+        if stop.is_set():
+            return [], 0, False, None
+        relative_path = paths[index]
+        try:
+            lines, matches, binary = search_file(
+                os.path.join(directory, relative_path), relative_path, compiled, context_lines, max_matches, stop
+            )
+            error = None
+        except (OSError, ValueError) as e:
+            lines, matches, binary, error = [], 0, False, str(e)
+        with found_lock:
+            counts[index] = matches
+            while prefix[0] < len(paths) and counts[prefix[0]] is not None:
+                prefix[1] += counts[prefix[0]]
+                prefix[0] += 1
+            if prefix[1] >= max_matches:
+                stop.set()
+        return lines, matches, binary, error
+    
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+        results = list(executor.map(search, range(len(paths))))
+    
+    output = []
+    total = 0
+    files = 0
+    binaries = 0
+    errors = 0
+    for lines, matches, binary, error in results:
+        binaries += binary
+        errors += error is not None
+        if not matches or total >= max_matches:
+            continue
+        if matches > max_matches - total:
+            # Coupe avant la première correspondance en trop
+            remaining = max_matches - total
+            for index, (is_match, _) in enumerate(lines):
+                if is_match:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+            # Garde le contexte après la dernière correspondance, pas celui avant la suivante
+            end = index + 1
+            while (end < len(lines) and end - index <= context_lines
+                   and not lines[end][0] and lines[end][1] != "--"):
+                end += 1
+            lines = lines[:end]
+            matches = max_matches - total
+        if output and context_lines:
+            output.append("--")
+        output.extend(line for _, line in lines)
+        total += matches
+        files += 1
+    
+    header = f"# matches={total} files={files} scanned={len(paths)}"
+    if binaries:
+        header += f" binary_skipped={binaries}"
+    if errors:
+        header += f" erreurs={errors}"
+    if stop.is_set():
+        header += " truncated=true"
+    return "\n".join([header] + output)
+
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "blake2b")
+HASH_CHUNK_SIZE = 1024 * 1024
+PARTIAL_HASH_SIZE = 64 * 1024
+# Par défaut hors des arborescences parcourues: dans le cache de l'utilisateur
+HASH_CACHE_FILE = os.path.expanduser(os.getenv("FILE_HASH_CACHE", "")) or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "mcp-file-server", "file_hashes.json"
+)
+
+class HashCache:
+    """Cache persistant des empreintes de fichiers
+    
+    Une empreinte est réutilisée tant que le chemin, la taille et la date de
+    modification (en nanosecondes) du fichier sont inchangés. Le cache est
+    chargé à la première utilisation et sauvegardé atomiquement après chaque
+    outil qui l'a modifié. Les entrées des fichiers disparus sont retirées
+    quand leur lecture échoue, ou quand un parcours complet de leur
+    répertoire ne les voit plus: une sauvegarde ne relit jamais tout le cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                # Un cache illisible est simplement reconstruit
+                self.entries = {}
+        return self.entries
+
+    def get(self, path: str, stat: os.stat_result, key: str) -> Optional[str]:
+        """Retourne l'empreinte en cache si le fichier n'a pas changé"""
+        with self.lock:
+            entry = self._load().get(os.path.abspath(path))
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns and key in entry:
+                self.hits += 1
+                return entry[key]
+            self.misses += 1
+            return None
+
+    def put(self, path: str, stat: os.stat_result, key: str, digest: str) -> None:
+        """Enregistre une empreinte; les empreintes d'une version précédente sont oubliées"""
+        with self.lock:
+            entries = self._load()
+            path = os.path.abspath(path)
+            entry = entries.get(path)
+            if not entry or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                entry = entries[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            entry[key] = digest
+            self.dirty = True
+
+    def forget(self, path: str) -> None:
+        """Retire l'entrée d'un fichier disparu"""
+        with self.lock:
+            if self._load().pop(os.path.abspath(path), None) is not None:
+                self.dirty = True
+
+    def prune(self, root: str, seen: Set[str]) -> None:
+        """Retire les entrées sous root absentes d'un parcours complet de root
+        
+        Args:
+            root: Répertoire parcouru (sans filtre ni erreur de lecture)
+            seen: Chemins absolus des fichiers trouvés par le parcours
+        """
+        prefix = os.path.join(os.path.abspath(root), "")
+        with self.lock:
+            entries = self._load()
+            stale = [path for path in entries if path.startswith(prefix) and path not in seen]
+            for path in stale:
+                del entries[path]
+            self.dirty = self.dirty or bool(stale)
+
+    def save(self) -> None:
+        """Écrit le cache sur disque s'il a été modifié (fichier temporaire puis remplacement)"""
+        with self.lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".file_hashes-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self.dirty = False
+
+_hash_cache = HashCache(HASH_CACHE_FILE)
+
+def is_hash_cache_file(name: str, path: str) -> bool:
+    """Indique si une entrée est le cache des empreintes ou l'un de ses fichiers temporaires"""
+    cache_name = os.path.basename(_hash_cache.path)
+    if name != cache_name and not (name.startswith(".file_hashes-") and name.endswith(".tmp")):
+        return False
+    return os.path.dirname(os.path.abspath(path)) == os.path.dirname(os.path.abspath(_hash_cache.path))
+
+def hash_file(path: str, algorithm: str, partial: bool = False, use_cache: bool = True) -> str:
+    """Calcule l'empreinte d'un fichier en le lisant par blocs
+    
+    Avec partial=True, seuls les PARTIAL_HASH_SIZE premiers octets sont lus.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        if use_cache:
+            _hash_cache.forget(path)
+        raise
+    key = f"{algorithm}:partial" if partial and stat.st_size > PARTIAL_HASH_SIZE else algorithm
+    if use_cache:
+        cached = _hash_cache.get(path, stat, key)
+        if cached is not None:
+            return cached
+    
+    digest = hashlib.new(algorithm)
+    remaining = PARTIAL_HASH_SIZE if partial else None
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    result = digest.hexdigest()
+    
+    if use_cache:
+        _hash_cache.put(path, stat, key, result)
+    return result
+
+def hash_in_pool(paths: List[str], algorithm: str, partial: bool, use_cache: bool) -> Dict[str, Any]:
+    """Calcule les empreintes de plusieurs fichiers en parallèle
+    
+    Returns:
+        Dictionnaire chemin -> empreinte, ou exception pour les fichiers illisibles
+    """
+    def job(path: str) -> Any:
+        try:
+            return hash_file(path, algorithm, partial, use_cache)
+        except OSError as e:
+            return e
+    
+    # hashlib libère le GIL sur les gros blocs: les threads hachent réellement en parallèle
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+        return dict(zip(paths, executor.map(job, paths)))
+
+def check_algorithm(algorithm: str) -> None:
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Algorithme invalide. Utilisez: {', '.join(HASH_ALGORITHMS)}")
+
+@mcp.tool()
+def hash_files(
+    paths: Optional[List[str]] = None,
+    directory: str = "",
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    algorithm: str = "sha256",
+    use_cache: bool = True
+) -> str:
+    """Calcule l'empreinte de fichiers (format 'empreinte  chemin' comme sha256sum)
+    
+    Args:
+        paths: Liste de fichiers à hacher
+        directory: Ou bien un répertoire à parcourir récursivement
+        include: Motifs glob des fichiers à inclure (avec directory)
+        exclude: Motifs glob à exclure (avec directory)
+        algorithm: 'md5', 'sha1', 'sha256' ou 'blake2b'
+        use_cache: Réutilise les empreintes des fichiers inchangés
+    """
+    check_algorithm(algorithm)
+    if bool(paths) == bool(directory):
+        raise ValueError("Indiquez soit paths, soit directory")
+    if directory:
+        if not os.path.isdir(directory):
+            raise ValueError(f"Répertoire '{directory}' non trouvé")
+        entries = list(scan_tree(directory, None, compile_globs(include), compile_globs(exclude), "file", False))
+        paths = sorted(
+            os.path.join(directory, relative_path) for relative_path, _, stat in entries
+            if not isinstance(stat, OSError)
+        )
+    
+    hits_before = _hash_cache.hits
+    digests = hash_in_pool(paths, algorithm, False, use_cache)
+    if use_cache and directory and not include and not exclude and len(paths) == len(entries):
+        _hash_cache.prune(directory, {os.path.abspath(path) for path in paths})
+    _hash_cache.save()
+    
+    lines = [f"# files={len(paths)} cached={_hash_cache.hits - hits_before if use_cache else 0}"]
+    for path, digest in digests.items():
+        if isinstance(digest, OSError):
+            lines.append(f"❌ {path}: {digest.strerror or digest}")
+        else:
+            lines.append(f"{digest}  {path}")
+    return "\n".join(lines)
+
+@mcp.tool()
+def find_duplicates(
+    directory: str = ".",
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    min_size: int = 1,
+    algorithm: str = "sha256",
+    use_cache: bool = True
+) -> str:
+    """Trouve les fichiers en double d'une arborescence
+    
+    Les candidats sont d'abord regroupés par taille, puis par empreinte des
+    premiers 64 Ko, et seuls les fichiers encore en concurrence sont hachés
+    entièrement.
+    
+    Args:
+        directory: Répertoire racine
+        include: Motifs glob des fichiers à inclure
+        exclude: Motifs glob à exclure (ex: ['.git'])
+        min_size: Taille minimale des fichiers en octets
+        algorithm: 'md5', 'sha1', 'sha256' ou 'blake2b'
+        use_cache: Réutilise les empreintes des fichiers inchangés
+    """
+    check_algorithm(algorithm)
+    if not os.path.isdir(directory):
+        raise ValueError(f"Répertoire '{directory}' non trouvé")
+    
+    by_size = defaultdict(list)
+    scanned = 0
+    seen: Optional[Set[str]] = set() if use_cache and not include and not exclude else None
+    for relative_path, _, stat in scan_tree(
+        directory, None, compile_globs(include), compile_globs(exclude), "file", True
+    ):
+        if isinstance(stat, OSError):
+            # Parcours incomplet: les entrées du cache ne peuvent pas être élaguées
+            seen = None
+            continue
+        if seen is not None:
+            seen.add(os.path.abspath(os.path.join(directory, relative_path)))
+        if stat.st_size < min_size:
+            continue
+        scanned += 1
+        by_size[stat.st_size].append(os.path.join(directory, relative_path))
+    
+    groups = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+    hashed = {}
+    for partial in (True, False):
+        # Pour les petits fichiers, l'empreinte partielle couvre déjà tout le contenu
+        pending = [(size, paths) for size, paths in groups if partial or size > PARTIAL_HASH_SIZE]
+        done = [(size, paths) for size, paths in groups if not partial and size <= PARTIAL_HASH_SIZE]
+        candidates = [path for _, paths in pending for path in paths]
+        hashed["partial" if partial else "full"] = len(candidates)
+        digests = hash_in_pool(candidates, algorithm, partial, use_cache)
+        
+        groups = done
+        for size, paths in pending:
+            by_digest = defaultdict(list)
+            for path in paths:
+                if not isinstance(digests[path], OSError):
+                    by_digest[digests[path]].append(path)
+            groups.extend((size, same) for same in by_digest.values() if len(same) > 1)
+    if seen is not None:
+        _hash_cache.prune(directory, seen)
+    _hash_cache.save()
+    
+    groups.sort(key=lambda group: (-group[0] * (len(group[1]) - 1), group[1][0]))
+    lines = [
+        f"# groups={len(groups)} duplicates={sum(len(paths) - 1 for _, paths in groups)} "
+        f"wasted_bytes={sum(size * (len(paths) - 1) for size, paths in groups)} scanned={scanned} "
+        f"partial_hashed={hashed['partial']} full_hashed={hashed['full']}"
+    ]
+    for size, paths in groups:
+        lines.append(f"{size} octets x{len(paths)}")
+        lines.extend(f"  {path}" for path in sorted(paths))
+    return "\n".join(lines)
+
+def file_info(path: str, stat: os.stat_result) -> Dict[str, Any]:
+    """Informations d'un fichier à partir de son stat"""
+    return {
+        "path": path,
+        "size_bytes": stat.st_size,
+        "size_human": f"{stat.st_size / 1024:.2f} KB" if stat.st_size > 1024 else f"{stat.st_size} bytes",
+        "modified": stat.st_mtime,
+        "is_file": stat_module.S_ISREG(stat.st_mode),
+        "is_directory": stat_module.S_ISDIR(stat.st_mode)
+    }
+
 @mcp.tool()
 def get_file_info(path: str) -> str:
     """Obtient les informations d'un fichier"""
     try:
-        stat = os.stat(path)
-        info = {
-            "path": path,
-            "size_bytes": stat.st_size,
-            "size_human": f"{stat.st_size / 1024:.2f} KB" if stat.st_size > 1024 else f"{stat.st_size} bytes",
-            "modified": stat.st_mtime,
-            "is_file": os.path.isfile(path),
-            "is_directory": os.path.isdir(path)
-        }
-        return json.dumps(info, indent=2)
+        return json.dumps(file_info(path, _metadata_cache.stat(path)), indent=2)
     except Exception as e:
         raise ValueError(f"Erreur: {str(e)}")
 
+BATCH_MAX_FILES = 500
+
+def resolve_paths(paths: Optional[List[str]], pattern: str, max_files: int) -> Tuple[List[str], int]:
+    """Retourne les chemins demandés (liste ou motif glob) et leur nombre total"""
+    if bool(paths) == bool(pattern):
+        raise ValueError("Indiquez soit paths, soit pattern")
+    if not 1 <= max_files <= BATCH_MAX_FILES:
+        raise ValueError(f"max_files doit être compris entre 1 et {BATCH_MAX_FILES}")
+    if pattern:
+        paths = sorted(glob.glob(pattern, recursive=True))
+    return paths[:max_files], len(paths)
+
+def run_in_pool(function, items: List[Any]) -> List[Any]:
+    """Applique une fonction d'entrée/sortie à chaque élément dans un pool de threads"""
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+        return list(executor.map(function, items))
+
+def read_prefix(path: str, limit: int) -> Dict[str, Any]:
+    """Lit au plus limit octets d'un fichier texte, sans couper de caractère"""
+    compression = detect_compression(path)
+    if compression:
+        data, _, truncated, _ = read_compressed(path, compression, 0, None, None, None, None, limit)
+        return {
+            "path": path,
+            "size_bytes": os.stat(path).st_size,
+            "compression": compression,
+            "content": data.decode('utf-8'),
+            "truncated": truncated
+        }
+    
+    with open_view(path) as (view, size):
+        end = char_boundary(view, min(size, limit), size)
+        return {
+            "path": path,
+            "size_bytes": size,
+            "content": view[:end].decode('utf-8'),
+            "truncated": end < size
+        }
+
+@mcp.tool()
+def stat_many(paths: Optional[List[str]] = None, pattern: str = "", max_files: int = 100) -> str:
+    """Obtient les informations de plusieurs fichiers en un seul appel
+    
+    Les erreurs sont signalées fichier par fichier, sans faire échouer le lot.
+    
+    Args:
+        paths: Liste de chemins
+        pattern: Ou bien un motif glob (ex: 'logs/**/*.log')
+        max_files: Nombre maximum de fichiers
+    """
+    paths, total = resolve_paths(paths, pattern, max_files)
+    # Chaque répertoire n'est validé qu'une fois pour tout le lot
+    directory_stats = {}
+    
+    def info(path: str) -> Dict[str, Any]:
+        try:
+            return file_info(path, _metadata_cache.stat(path, directory_stats))
+        except OSError as e:
+            return {"path": path, "error": e.strerror or str(e)}
+    
+    return json.dumps({"total": total, "files": run_in_pool(info, paths)}, indent=2, ensure_ascii=False)
+
+@mcp.tool()
+def read_many(
+    paths: Optional[List[str]] = None,
+    pattern: str = "",
+    max_files: int = 50,
+    max_bytes_per_file: int = 64 * 1024,
+    max_total_bytes: int = DEFAULT_MAX_BYTES
+) -> str:
+    """Lit plusieurs fichiers en un seul appel
+    
+    Le budget total est réparti dans l'ordre des fichiers: chacun reçoit au plus
+    max_bytes_per_file octets, dans la limite de ce qui reste. Les erreurs sont
+    signalées fichier par fichier, sans faire échouer le lot.
+    
+    Args:
+        paths: Liste de chemins
+        pattern: Ou bien un motif glob (ex: 'src/**/*.py')
+        max_files: Nombre maximum de fichiers
+        max_bytes_per_file: Taille maximale lue par fichier
+        max_total_bytes: Taille maximale lue pour l'ensemble des fichiers
+    """
+    if max_bytes_per_file < 1 or max_total_bytes < 1:
+        raise ValueError("Les budgets d'octets doivent être supérieurs à 0")
+    paths, total = resolve_paths(paths, pattern, max_files)
+    
+    def size_of(path: str) -> Any:
+        try:
+            # La taille décompressée n'est pas connue: tout le budget par fichier est réservé
+            return max_bytes_per_file if detect_compression(path) else os.stat(path).st_size
+        except OSError as e:
+            return e
+    
+    # Les tailles sont connues avant la lecture: la répartition du budget ne dépend
+    # pas de l'ordre d'exécution des threads
+    budgets = []
+    remaining = max_total_bytes
+    for size in run_in_pool(size_of, paths):
+        if isinstance(size, OSError):
+            budgets.append(size)
+            continue
+        budget = min(size, max_bytes_per_file, remaining)
+        # Un fichier non vide sans budget n'est pas lu du tout
+        budgets.append(budget if budget or not size else None)
+        remaining -= budget
+    
+    def read(item: Tuple[str, Any]) -> Dict[str, Any]:
+        path, budget = item
+        if isinstance(budget, OSError):
+            return {"path": path, "error": budget.strerror or str(budget)}
+        if budget is None:
+            return {"path": path, "error": "Budget total d'octets épuisé"}
+        try:
+            return read_prefix(path, budget)
+        except UnicodeDecodeError:
+            return {"path": path, "error": "Contenu non UTF-8 (fichier binaire ?)"}
+        except (OSError, ValueError) as e:
+            return {"path": path, "error": getattr(e, "strerror", None) or str(e)}
+    
+    files = run_in_pool(read, list(zip(paths, budgets)))
+    result = {
+        "total": total,
+        "bytes_read": sum(len(entry["content"].encode('utf-8')) for entry in files if "content" in entry),
+        "files": files
+    }
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
 @mcp.tool()
 def create_directory(path: str) -> str:
     """Crée un répertoire"""
     try:
         os.makedirs(path, exist_ok=True)
+        _metadata_cache.invalidate(path, ancestors=True)
         return f"Répertoire '{path}' créé avec succès"
     except Exception as e:
         raise ValueError(f"Erreur lors de la création: {str(e)}")
 
+@mcp.tool()
+def get_cache_stats() -> str:
+    """Obtient les statistiques du cache des métadonnées (listes de répertoires et stat)"""
+    return json.dumps(_metadata_cache.stats(), indent=2)
+
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Générateur de jeux de données d'employés réalistes pour les tests de montée en charge
+"""
+
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+PRENOMS = [
+    "Alice", "Bob", "Carol", "David", "Émilie", "François", "Gabriel", "Hélène", "Inès", "Jules",
+    "Karim", "Léa", "Manon", "Nicolas", "Océane", "Pierre", "Quentin", "Raphaël", "Sophie", "Thomas",
+    "Ugo", "Valérie", "William", "Yasmine", "Zoé", "Amine", "Camille", "Chloé", "Enzo", "Fatima",
+    "Hugo", "Jade", "Lucas", "Louise", "Mathis", "Nathalie", "Olivier", "Sarah", "Théo", "Yanis"
+]
+
+NOMS = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Simon", "Laurent", "Lefèvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier",
+    "Morel", "Girard", "André", "Lefebvre", "Mercier", "Dupont", "Lambert", "Bonnet", "François", "Martinez",
+    "Legrand", "Garnier", "Faure", "Rousseau", "Blanc", "Guérin", "Muller", "Henry", "Roussel", "Nicolas"
+]
+
+# Départements, postes et salaire médian annuel
+DEPARTEMENTS = {
+    "IT": (["Développeur", "Développeuse Senior", "Architecte", "Chef de Projet", "DevOps"], 55000),
+    "Finance": (["Comptable", "Contrôleur de Gestion", "Analyste Financier", "Trésorier"], 50000),
+    "Ventes": (["Commercial", "Responsable Grands Comptes", "Assistant Commercial"], 42000),
+    "Marketing": (["Chargé de Marketing", "Community Manager", "Responsable Produit"], 45000),
+    "RH": (["Chargée de Recrutement", "Gestionnaire Paie", "Responsable RH"], 44000),
+    "Support": (["Technicien Support", "Responsable Support"], 36000),
+    "QA": (["Testeur", "Ingénieur Qualité"], 46000),
+    "Juridique": (["Juriste", "Directeur Juridique"], 60000),
+    "Logistique": (["Magasinier", "Responsable Logistique", "Planificateur"], 34000),
+    "Direction": (["Directeur Général", "Assistante de Direction"], 90000),
+}
+
+def department_weights(skew: float) -> List[float]:
+    """Poids des départements selon une loi de Zipf (skew = 0: répartition uniforme)"""
+    return [1 / (rank ** skew) for rank in range(1, len(DEPARTEMENTS) + 1)]
+
+def generate_employees(
+    count: int,
+    seed: int = 42,
+    skew: float = 1.0,
+    active_ratio: float = 0.9,
+    years: int = 20
+) -> List[Dict[str, Any]]:
+    """Génère une liste d'employés déterministe pour une graine donnée
+
+    Args:
+        count: Nombre d'employés
+        seed: Graine du générateur aléatoire
+        skew: Exposant de Zipf de la taille des départements
+        active_ratio: Proportion d'employés actifs (entre 0 et 1)
+        years: Ancienneté maximale des dates d'embauche, en années
+    """
+    if not 0 <= active_ratio <= 1:
+        raise ValueError("La proportion d'actifs doit être comprise entre 0 et 1")
+
+    rng = random.Random(seed)
+    departements = list(DEPARTEMENTS)
+    weights = department_weights(skew)
+    today = date.today()
+    first_day = today - timedelta(days=365 * years)
+    now = datetime.now().isoformat()
+
+    employees = []
+    for emp_id in range(1, count + 1):
+        prenom = rng.choice(PRENOMS)
+        nom = rng.choice(NOMS)
+        departement = rng.choices(departements, weights)[0]
+        postes, salaire_median = DEPARTEMENTS[departement]
+
+        employees.append({
+            "id": emp_id,
+            "prenom": prenom,
+            "nom": nom,
+            "email": f"{prenom}.{nom}.{emp_id}@entreprise.fr".lower(),
+            "poste": rng.choice(postes),
+            "departement": departement,
+            "salaire": round(salaire_median * rng.lognormvariate(0, 0.25), -2),
+            "date_embauche": (first_day + timedelta(days=rng.randrange((today - first_day).days))).isoformat(),
+            "telephone": "0" + "".join(str(rng.randrange(10)) for _ in range(9)),
+            "adresse": "",
+            "date_creation": now,
+            "date_modification": now,
+            "actif": rng.random() < active_ratio,
+            "version": 1
+        })
+
+    return employees
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un fichier d'employés synthétiques")
+    parser.add_argument("count", type=int, help="Nombre d'employés")
+    parser.add_argument("--output", default="employees.json", help="Fichier de sortie")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire")
+    parser.add_argument("--skew", type=float, default=1.0, help="Déséquilibre des départements (Zipf)")
+    parser.add_argument("--active-ratio", type=float, default=0.9, help="Proportion d'employés actifs")
+    args = parser.parse_args()
+
+    employees = generate_employees(args.count, args.seed, args.skew, args.active_ratio)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(employees, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ {len(employees)} employés générés dans '{args.output}'")
+
+if __name__ == "__main__":
+    main()
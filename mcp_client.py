@@ -5,15 +5,47 @@ Client MCP utilisant le protocole JSON-RPC
 
 import asyncio
 import json
+import re
 import subprocess
 import sys
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import uuid
+from urllib.parse import quote
+from profiling import span
+
+# Taille maximale d'un message JSON-RPC, et taille du tampon de lecture du flux
+DEFAULT_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+READ_BUFFER_SIZE = 1024 * 1024
+
+# L'ID d'une réponse est sérialisé avant son résultat: il suffit de lire le début du message
+RESPONSE_ID_PATTERN = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+# Marqueurs de continuation des outils paginés: (motif, argument de la page suivante, conversion)
+PAGINATION_MARKERS = [
+    (re.compile(r'\A# total=\d+ returned=\d+ next_cursor=(\S+)'), "cursor", str),
+    (re.compile(r'Page suivante: cursor="([^"]+)"\s*\Z'), "cursor", str),
+    (re.compile(r'reprenez avec offset=(\d+)(?: length=(\d+))? \.\.\.\]\Z'), "offset", int),
+]
+
+class MessageTooLarge(Exception):
+    """Message JSON-RPC dépassant la taille maximale autorisée"""
+    def __init__(self, size: int, head: bytes):
+        super().__init__(f"Message JSON-RPC trop volumineux (plus de {size} octets)")
+        self.head = head
 
 class MCPClient:
-    def __init__(self):
+    def __init__(self, max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE):
+        # Les messages plus gros sont ignorés et la requête concernée échoue
+        self.max_message_size = max_message_size
         self.servers: Dict[str, subprocess.Popen] = {}
         self.tools: Dict[str, Dict[str, Any]] = {}
+        # Requêtes en attente de réponse, par ID JSON-RPC: (serveur, future)
+        self.pending: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.readers: Dict[str, asyncio.Task] = {}
+        # Ressources abonnées et cache de leur contenu, invalidé par notification
+        self.subscriptions: Dict[str, set] = {}
+        self.resource_cache: Dict[str, str] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
     
     async def connect_to_server(self, server_name: str, script_path: str) -> bool:
         """Connecte à un serveur FastMCP avec protocole JSON-RPC"""
@@ -25,7 +57,8 @@ class MCPClient:
                 sys.executable, script_path,
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                limit=READ_BUFFER_SIZE
             )
             
             # Teste si le processus démarre
@@ -35,8 +68,9 @@ class MCPClient:
                 print(f"❌ Le serveur '{server_name}' s'est arrêté: {stderr_output.decode()}")
                 return False
             
-            # Stocke le processus
+            # Stocke le processus et lance la lecture de ses messages
             self.servers[server_name] = process
+            self.readers[server_name] = asyncio.create_task(self._read_messages(server_name, process))
             
             # Effectue le handshake MCP avec initialize
             success = await self._initialize_server(server_name, process)
@@ -53,11 +87,102 @@ class MCPClient:
             print(f"❌ Erreur de connexion JSON-RPC au serveur '{server_name}': {e}")
             return False
     
+    async def _read_frame(self, stream: asyncio.StreamReader) -> bytes:
+        """Lit un message terminé par un saut de ligne, quelle que soit sa taille
+        
+        Le tampon du flux reste borné: les morceaux sont accumulés dans une liste
+        et assemblés une seule fois. Au-delà de max_message_size, le reste du
+        message est lu et ignoré, puis MessageTooLarge est levée.
+        """
+        parts = []
+        size = 0
+        while True:
+            try:
+                part = await stream.readuntil(b"\n")
+            except asyncio.LimitOverrunError as e:
+                part = await stream.readexactly(e.consumed)
+            except asyncio.IncompleteReadError as e:
+                # Fin du flux: le dernier message n'a pas de saut de ligne
+                part = e.partial
+                if not part:
+                    return b"".join(parts)
+            
+            size += len(part)
+            if size > self.max_message_size:
+                head = parts[0] if parts else part
+                while not part.endswith(b"\n") and part:
+                    try:
+                        part = await stream.readuntil(b"\n")
+                    except asyncio.LimitOverrunError as e:
+                        part = await stream.readexactly(e.consumed)
+                    except asyncio.IncompleteReadError:
+                        break
+                raise MessageTooLarge(self.max_message_size, head)
+            
+            parts.append(part)
+            if part.endswith(b"\n"):
+                return parts[0] if len(parts) == 1 else b"".join(parts)
+    
+    async def _read_messages(self, server_name: str, process: subprocess.Popen) -> None:
+        """Lit en continu les messages d'un serveur: réponses et notifications"""
+        try:
+            while True:
+                try:
+                    line = await self._read_frame(process.stdout)
+                except MessageTooLarge as e:
+                    # La requête concernée échoue au lieu d'attendre indéfiniment
+                    match = RESPONSE_ID_PATTERN.search(e.head[:4096])
+                    request_id = match.group(1).decode() if match else None
+                    _, future = self.pending.pop(request_id, (None, None))
+                    print(f"⚠️ {e} reçu de '{server_name}'")
+                    if future is not None and not future.done():
+                        future.set_result({"id": request_id, "error": {"code": -32000, "message": str(e)}})
+                    continue
+                if not line:
+                    break
+                
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Message JSON-RPC illisible de '{server_name}'")
+                    continue
+                
+                if "id" in message and "method" not in message:
+                    _, future = self.pending.pop(message["id"], (None, None))
+                    if future is not None and not future.done():
+                        future.set_result(message)
+                    else:
+                        print(f"⚠️ Réponse inattendue de '{server_name}': ID {message.get('id')}")
+                elif "method" in message:
+                    self._handle_notification(server_name, message)
+        except Exception as e:
+            print(f"❌ Erreur de lecture JSON-RPC ('{server_name}'): {e}")
+        finally:
+            # Le serveur est fermé: les requêtes en attente n'auront pas de réponse
+            for request_id, (name, future) in list(self.pending.items()):
+                if name == server_name:
+                    self.pending.pop(request_id, None)
+                    if not future.done():
+                        future.set_result(None)
+
+    def _handle_notification(self, server_name: str, message: Dict[str, Any]) -> None:
+        """Traite une notification du serveur (invalidation du cache des ressources)"""
+        method = message.get("method")
+        params = message.get("params") or {}
+        
+        if method == "notifications/resources/updated":
+            if self.resource_cache.pop(params.get("uri", ""), None) is not None:
+                self.cache_stats["invalidations"] += 1
+        elif method == "notifications/resources/list_changed":
+            for uri in self.subscriptions.get(server_name, ()):
+                if self.resource_cache.pop(uri, None) is not None:
+                    self.cache_stats["invalidations"] += 1
+
     async def _send_jsonrpc_request(self, process: subprocess.Popen, method: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """Envoie une requête JSON-RPC et attend la réponse"""
+        request_id = str(uuid.uuid4())
         try:
             # Prépare la requête JSON-RPC 2.0
-            request_id = str(uuid.uuid4())
             request = {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -67,26 +192,24 @@ class MCPClient:
             if params:
                 request["params"] = params
             
-            # Sérialise et envoie
-            request_json = json.dumps(request) + "\n"
-            process.stdin.write(request_json.encode())
-            await process.stdin.drain()
+            # La réponse sera délivrée par la tâche de lecture du serveur
+            server_name = next((name for name, proc in self.servers.items() if proc is process), None)
+            future = asyncio.get_running_loop().create_future()
+            self.pending[request_id] = (server_name, future)
             
-            # Lit la réponse
-            response_line = await process.stdout.readline()
-            if not response_line:
-                return None
-            
-            response = json.loads(response_line.decode().strip())
+            # Sérialise et envoie
+            with span("mcp.send", method=method) as send_span:
+                request_bytes = (json.dumps(request) + "\n").encode()
+                process.stdin.write(request_bytes)
+                await process.stdin.drain()
+                if send_span:
+                    send_span.set(bytes=len(request_bytes))
             
-            # Vérifie si c'est une réponse valide
-            if response.get("id") == request_id:
-                return response
-            else:
-                print(f"⚠️ ID de réponse incorrect: attendu {request_id}, reçu {response.get('id')}")
-                return None
+            with span("mcp.wait_response", method=method):
+                return await future
                 
         except Exception as e:
+            self.pending.pop(request_id, None)
             print(f"❌ Erreur JSON-RPC: {e}")
             return None
     
@@ -163,8 +286,18 @@ class MCPClient:
             print(f"❌ Erreur de listing des outils: {e}")
             return False
     
-    async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> str:
-        """Appelle un outil via JSON-RPC"""
+    async def call_tool(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        raise_on_error: bool = False
+    ) -> str:
+        """Appelle un outil via JSON-RPC
+        
+        Une erreur de l'outil est renvoyée comme texte du résultat, ou levée
+        comme exception avec raise_on_error.
+        """
         if server_name not in self.servers:
             raise ValueError(f"Serveur '{server_name}' non connecté")
         
@@ -178,13 +311,21 @@ class MCPClient:
             }
             
             # Envoie la requête tools/call
-            response = await self._send_jsonrpc_request(process, "tools/call", params)
+            with span("mcp.call_tool", server=server_name, tool=tool_name) as call_span:
+                response = await self._send_jsonrpc_request(process, "tools/call", params)
+                if call_span and response:
+                    call_span.set(error="error" in response or bool(response.get("result", {}).get("isError")))
             
             if response and "result" in response:
                 # Extrait le contenu de la réponse
                 content = response["result"].get("content", [])
                 if content and len(content) > 0:
-                    return content[0].get("text", "Pas de résultat")
+                    # Un résultat peut être découpé en plusieurs blocs de texte
+                    texts = [item.get("text", "") for item in content if item.get("type", "text") == "text"]
+                    text = "".join(texts) if any(texts) else "Pas de résultat"
+                    if raise_on_error and response["result"].get("isError"):
+                        raise Exception(f"Erreur de l'outil: {text}")
+                    return text
                 else:
                     return "Réponse vide"
             elif response and "error" in response:
@@ -196,6 +337,100 @@ class MCPClient:
         except Exception as e:
             raise Exception(f"Erreur lors de l'appel JSON-RPC de l'outil '{tool_name}': {e}")
     
+    async def iter_tool_pages(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        max_pages: int = 100
+    ) -> AsyncIterator[str]:
+        """Appelle un outil paginé et produit ses pages une à une
+        
+        La page suivante est demandée tant que le résultat contient un marqueur
+        de continuation (next_cursor de list_employees, offset de read_file
+        quel que soit le mode de lecture). Une erreur de l'outil arrête
+        l'itération par une exception. Seule la page en cours est gardée en
+        mémoire.
+        """
+        arguments = dict(arguments)
+        for _ in range(max_pages):
+            page = await self.call_tool(server_name, tool_name, arguments, raise_on_error=True)
+            yield page
+            
+            for pattern, argument, convert in PAGINATION_MARKERS:
+                match = pattern.search(page)
+                if match:
+                    if argument == "offset":
+                        # read_file reprend toujours par octets: la plage restante
+                        # (length) remplace les lignes ou tail_lines de la demande
+                        for key in ("start_line", "end_line", "tail_lines", "length"):
+                            arguments.pop(key, None)
+                        if match.group(2) is not None:
+                            arguments["length"] = int(match.group(2))
+                    arguments[argument] = convert(match.group(1))
+                    break
+            else:
+                return
+    
+    @staticmethod
+    def _normalize_uri(uri: str) -> str:
+        """Encode une URI de ressource comme le fait le serveur (espaces, accents)"""
+        return quote(uri, safe=":/%@&=+$,;~?#")
+    
+    async def subscribe_resource(self, server_name: str, uri: str) -> bool:
+        """S'abonne aux modifications d'une ressource; son contenu pourra être mis en cache"""
+        if server_name not in self.servers:
+            raise ValueError(f"Serveur '{server_name}' non connecté")
+        
+        uri = self._normalize_uri(uri)
+        response = await self._send_jsonrpc_request(self.servers[server_name], "resources/subscribe", {"uri": uri})
+        if response and "result" in response:
+            self.subscriptions.setdefault(server_name, set()).add(uri)
+            return True
+        
+        print(f"❌ Abonnement impossible à '{uri}': {response}")
+        return False
+    
+    async def unsubscribe_resource(self, server_name: str, uri: str) -> bool:
+        """Se désabonne d'une ressource et retire son contenu du cache"""
+        if server_name not in self.servers:
+            raise ValueError(f"Serveur '{server_name}' non connecté")
+        
+        uri = self._normalize_uri(uri)
+        self.subscriptions.get(server_name, set()).discard(uri)
+        self.resource_cache.pop(uri, None)
+        response = await self._send_jsonrpc_request(self.servers[server_name], "resources/unsubscribe", {"uri": uri})
+        return bool(response and "result" in response)
+    
+    async def read_resource(self, server_name: str, uri: str, use_cache: bool = True) -> str:
+        """Lit une ressource via JSON-RPC
+        
+        Le contenu d'une ressource abonnée est mis en cache jusqu'à la
+        notification resources/updated correspondante.
+        """
+        if server_name not in self.servers:
+            raise ValueError(f"Serveur '{server_name}' non connecté")
+        
+        uri = self._normalize_uri(uri)
+        subscribed = uri in self.subscriptions.get(server_name, ())
+        if use_cache and subscribed and uri in self.resource_cache:
+            self.cache_stats["hits"] += 1
+            return self.resource_cache[uri]
+        
+        self.cache_stats["misses"] += 1
+        response = await self._send_jsonrpc_request(self.servers[server_name], "resources/read", {"uri": uri})
+        
+        if response and "result" in response:
+            contents = response["result"].get("contents", [])
+            text = contents[0].get("text", "") if contents else ""
+            if subscribed:
+                self.resource_cache[uri] = text
+            return text
+        elif response and "error" in response:
+            raise Exception(f"Erreur serveur: {response['error'].get('message', 'Erreur inconnue')}")
+        else:
+            raise Exception("Réponse invalide du serveur")
+    
     def get_available_tools(self) -> Dict[str, Dict[str, Any]]:
         """Retourne la liste des outils disponibles"""
         return self.tools
@@ -247,10 +482,16 @@ class MCPClient:
                         process.kill()
                         await process.wait()
                 
+                reader = self.readers.pop(server_name, None)
+                if reader is not None:
+                    reader.cancel()
+                
                 print(f"🔌 Déconnecté JSON-RPC du serveur '{server_name}'")
                 
             except Exception as e:
                 print(f"⚠️ Erreur lors de la fermeture JSON-RPC du serveur '{server_name}': {e}")
         
         self.servers.clear()
-        self.tools.clear()
\ No newline at end of file
+        self.tools.clear()
+        self.subscriptions.clear()
+        self.resource_cache.clear()
\ No newline at end of file
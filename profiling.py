@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Profilage par spans des tours de conversation
+
+Un tour échantillonné ouvre une trace; les spans imbriqués (appels au modèle,
+extraction des appels d'outils, appels JSON-RPC...) s'y rattachent via une
+variable de contexte, sans avoir à faire circuler d'objet. Hors d'un tour
+échantillonné, span() ne fait rien: l'instrumentation peut rester en place en
+production. Chaque trace terminée est ajoutée à un fichier au format Chrome
+trace (chrome://tracing, Perfetto) ou OTLP-JSON (une ligne par trace).
+"""
+
+import os
+import json
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+EXPORT_FORMATS = ("chrome", "otlp")
+
+class Trace:
+    """Spans d'un tour de conversation"""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+        self.root: Optional["Span"] = None
+        # Décalage entre l'horloge monotone et l'heure Unix, fixé pour toute la trace
+        self.epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+class Span:
+    """Intervalle de temps nommé, avec ses attributs"""
+
+    __slots__ = ("name", "trace", "parent", "span_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace: Trace, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.end_ns = 0
+        self.start_ns = time.perf_counter_ns()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value: float) -> None:
+        """Cumule une valeur numérique (tokens d'un tour par exemple)"""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def unix_ns(self, perf_ns: int) -> int:
+        return perf_ns + self.trace.epoch_offset_ns
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def _run_span(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.perf_counter_ns()
+        _current_span.reset(token)
+        span.trace.spans.append(span)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Mesure un bloc comme enfant du span courant; sans trace active, ne fait rien"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _run_span(Span(name, parent.trace, parent, attributes)) as child:
+        yield child
+
+class Profiler:
+    """Échantillonne les tours et exporte leurs traces dans un fichier
+
+    Sans fichier, ou pour un tour non échantillonné, trace() ne crée aucun span.
+    """
+
+    def __init__(self, path: Optional[str] = None, format: str = "chrome",
+                 sample_rate: float = 1.0, service_name: str = "chatbot"):
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Format de trace inconnu: '{format}'. Disponibles: {', '.join(EXPORT_FORMATS)}")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Le taux d'échantillonnage doit être compris entre 0 et 1")
+        self.path = path
+        self.format = format
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.sampled = 0
+        self.skipped = 0
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Ouvre la trace d'un tour si le tour est échantillonné"""
+        if not self.path or _current_span.get() is not None or random.random() >= self.sample_rate:
+            self.skipped += 1
+            yield None
+            return
+
+        self.sampled += 1
+        trace = Trace()
+        trace.root = Span(name, trace, None, attributes)
+        try:
+            with _run_span(trace.root) as root:
+                yield root
+        finally:
+            try:
+                self.export(trace)
+            except OSError as e:
+                print(f"⚠️  Export de la trace impossible: {e}")
+
+    def export(self, trace: Trace) -> None:
+        if self.format == "chrome":
+            self._export_chrome(trace)
+        else:
+            self._export_otlp(trace)
+
+    def _export_chrome(self, trace: Trace) -> None:
+        """Événements complets ("X") ajoutés à un tableau JSON laissé ouvert
+
+        Le format Chrome trace accepte un tableau sans crochet fermant, ce qui
+        permet d'ajouter les tours au fil de l'eau.
+        """
+        pid = os.getpid()
+        lines = []
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            lines.append("[")
+            lines.append(json.dumps({"name": "process_name", "ph": "M", "pid": pid, "tid": 1,
+                                     "args": {"name": self.service_name}}) + ",")
+        for span in sorted(trace.spans, key=lambda s: s.start_ns):
+            args = dict(span.attributes)
+            if span.error:
+                args["error"] = span.error
+            lines.append(json.dumps({
+                "name": span.name,
+                "cat": span.name.split(".")[0],
+                "ph": "X",
+                "ts": span.unix_ns(span.start_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": 1,
+                "args": args,
+            }, ensure_ascii=False, default=str) + ",")
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _export_otlp(self, trace: Trace) -> None:
+        """Une ligne OTLP-JSON (ExportTraceServiceRequest) par trace"""
+        spans = []
+        for span in sorted(trace.spans, key=lambda s: s.start_ns):
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.unix_ns(span.start_ns)),
+                "endTimeUnixNano": str(span.unix_ns(span.end_ns)),
+                "attributes": [otlp_attribute(key, value) for key, value in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {},
+            }
+            if span.parent is not None:
+                otlp_span["parentSpanId"] = span.parent.span_id
+            spans.append(otlp_span)
+
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "chatbot.profiling"}, "spans": spans}],
+        }]}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+def otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Attribut OTLP typé (les entiers 64 bits sont encodés en texte)"""
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
@@ -4,14 +4,14 @@ Tests pour les serveurs MCP FastMCP
 """
 
 import asyncio
-from real_mcp_client import RealMCPClient
+from mcp_client import MCPClient
 
 async def test_calculator():
     """Test du serveur calculator"""
     print("🧪 Test du serveur Calculator JSON-RPC")
     print("=" * 40)
     
-    client = RealMCPClient()
+    client = MCPClient()
     
     try:
         # Test de connexion
@@ -44,7 +44,7 @@ async def test_employees():
     print("🧪 Test du serveur Employees JSON-RPC")
     print("=" * 40)
     
-    client = RealMCPClient()
+    client = MCPClient()
     
     try:
         # Test de connexion
@@ -93,7 +93,7 @@ async def test_filesystem():
     print("🧪 Test du serveur Filesystem JSON-RPC")
     print("=" * 40)
     
-    client = RealMCPClient()
+    client = MCPClient()
     
     try:
         # Test de connexion
@@ -0,0 +1,10 @@
+"""
+Configuration commune des tests: les modules du projet sont à la racine du dépôt
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
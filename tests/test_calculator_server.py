@@ -0,0 +1,144 @@
+"""
+Tests des calculs coûteux exécutés dans les processus de calcul
+"""
+
+import asyncio
+import json
+import math
+import time
+
+import pytest
+
+import calculator_server
+from calculator_server import run_heavy
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    # Chaque test a sa propre boucle d'événements, donc son propre sémaphore
+    monkeypatch.setattr(calculator_server, "_worker_slots", None)
+    monkeypatch.setattr(calculator_server, "_result_cache", calculator_server.OrderedDict())
+
+def test_timeout_only_stops_its_own_worker(monkeypatch):
+    monkeypatch.setattr(calculator_server, "COMPUTE_TIMEOUT", 1.0)
+
+    async def scenario():
+        async def other():
+            await asyncio.sleep(0.6)
+            return await run_heavy(("autre",), time.sleep, 0.8)
+
+        slow = asyncio.create_task(run_heavy(("lent",), time.sleep, 5))
+        other_task = asyncio.create_task(other())
+        with pytest.raises(ValueError, match="interrompu"):
+            await slow
+        assert await other_task is None
+        assert await run_heavy(("après",), math.factorial, 20) == math.factorial(20)
+
+    asyncio.run(scenario())
+
+def test_worker_errors_are_raised_and_worker_reused():
+    async def scenario():
+        with pytest.raises(ValueError):
+            await run_heavy(("erreur",), math.factorial, -1)
+        return await run_heavy(("ok",), calculator_server._factorial_worker, 30, "digits")
+
+    assert asyncio.run(scenario()) is not None
+
+def test_array_response_rejects_negative_max_values():
+    with pytest.raises(ValueError, match="max_values"):
+        calculator_server.array_cumulative("cumsum", values=[1, 2, 3], max_values=-1)
+
+    response = json.loads(calculator_server.array_cumulative("cumsum", values=[1, 2, 3], max_values=0))
+    assert response["values"] == [] and response["truncated"] is True
+
+def test_server_keeps_the_int_str_guard_and_workers_lift_it():
+    import sys
+    assert sys.get_int_max_str_digits() == calculator_server.INT_STR_DIGITS != 0
+
+    result = asyncio.run(calculator_server.power(10, 9999, "full"))
+    assert result == "1" + "0" * 9999
+
+def test_power_keeps_float_semantics_for_float_arguments():
+    async def call(arguments):
+        _, structured = await calculator_server.mcp.call_tool("power", arguments)
+        return structured["result"]
+
+    # Les arguments JSON gardent leur type: 2.0 reste un nombre à virgule
+    assert asyncio.run(call({"base": 2.0, "exponent": 3.0})) == 8.0
+    assert isinstance(asyncio.run(call({"base": 2.0, "exponent": 3.0})), float)
+    assert isinstance(asyncio.run(call({"base": 2, "exponent": 3})), int)
+    assert asyncio.run(calculator_server.power(2, 3)) == 8
+    assert asyncio.run(calculator_server.power(2.0, 3.0)) == 8.0
+    assert isinstance(asyncio.run(calculator_server.power(2.0, 3.0)), float)
+    assert asyncio.run(calculator_server.power(2, -1)) == 0.5
+    with pytest.raises(ValueError, match="virgule flottante"):
+        asyncio.run(calculator_server.power(1e300, 2))
+
+@pytest.mark.parametrize("arguments", [{"other": [1, 2, 3]}, {"operand": 1.5}])
+def test_round_requires_an_integer_number_of_decimals(arguments):
+    with pytest.raises(ValueError, match="nombre entier de décimales"):
+        calculator_server.array_operation("round", values=[1.234, 2.345, 3.456], **arguments)
+
+    response = json.loads(calculator_server.array_operation("round", values=[1.234, 2.345, 3.456], operand=1))
+    assert response["values"] == [1.2, 2.3, 3.5]
+
+def test_output_path_stays_in_the_output_directory(tmp_path, monkeypatch):
+    output_dir = tmp_path / "sorties"
+    monkeypatch.setattr(calculator_server, "ARRAY_OUTPUT_DIR", str(output_dir))
+
+    for escaping in ("../dehors.txt", str(tmp_path / "absolu.txt"), "."):
+        with pytest.raises(ValueError, match="répertoire de sortie"):
+            calculator_server.array_cumulative("cumsum", values=[1, 2, 3], output_path=escaping)
+    assert not (tmp_path / "dehors.txt").exists() and not (tmp_path / "absolu.txt").exists()
+
+    response = json.loads(calculator_server.array_cumulative("cumsum", values=[1, 2, 3], output_path="bilan/cumul.txt"))
+    assert response["output_path"] == str(output_dir / "bilan" / "cumul.txt")
+    assert (output_dir / "bilan" / "cumul.txt").read_text(encoding="utf-8") == "1.0\n3.0\n6.0\n"
+
+def evaluate(expression, variables=None):
+    return asyncio.run(calculator_server.evaluate(expression, variables))
+
+@pytest.mark.parametrize("expression, message", [
+    ("(1).real", "non autorisé"),
+    ("().__class__.__bases__", "non autorisé"),
+    ("sqrt.__call__(4)", "non autorisé"),
+    ("x[0]", "non autorisé"),
+    ("'a' * 3", "non autorisé"),
+    ("True + 1", "non autorisé"),
+    ("[1, 2]", "non autorisé"),
+    ("lambda: 1", "non autorisé"),
+    ("1 if x else 2", "non autorisé"),
+    ("round(2.5, ndigits=1)", "non autorisé"),
+    ("__import__('os')", "Fonction inconnue"),
+    ("eval('1')", "Fonction inconnue"),
+    ("getattr(1, 'real')", "Fonction inconnue"),
+    ("import os", "Expression invalide"),
+    ("(x := 1)", "non autorisé"),
+])
+def test_evaluate_rejects_attributes_calls_and_imports(expression, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate(expression, {"x": 1})
+
+def test_evaluate_enforces_length_and_node_limits():
+    import ast
+    limit = calculator_server.MAX_EXPRESSION_NODES
+
+    def terms(count):
+        return "+".join(["1"] * count)
+
+    def nodes(expression):
+        return sum(1 for _ in ast.walk(ast.parse(expression, mode="eval")))
+
+    accepted = max(count for count in range(1, limit) if nodes(terms(count)) <= limit)
+    assert evaluate(terms(accepted)) == accepted
+    with pytest.raises(ValueError, match="trop complexe"):
+        evaluate(terms(accepted + 1))
+
+    length = calculator_server.MAX_EXPRESSION_LENGTH
+    assert evaluate("1" * length) == int("1" * length)
+    with pytest.raises(ValueError, match="trop longue"):
+        evaluate("1" * (length + 1))
+
+    for name in ("pi", "sqrt", "1x", "a-b"):
+        with pytest.raises(ValueError, match="Nom de variable invalide"):
+            evaluate("1", {name: 2})
+    assert evaluate("prix * (1 + tva)", {"prix": 100, "tva": 0.2}) == pytest.approx(120)
@@ -0,0 +1,417 @@
+"""
+Tests des index et de la pagination du serveur d'employés
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+import employee_server
+from employee_server import (DepartmentAggregate, EmployeeCache, EmployeeIndexes, get_headcount_history,
+                             list_employees, update_employee)
+
+DEPARTEMENTS = ["Informatique", "Ventes", "Marketing", "RH"]
+PRENOMS = ["Émile", "Zoé", "alice", "Bruno", "Chloé", "Élodie", "Denis"]
+
+def make_employee(emp_id: int, rng: random.Random) -> dict:
+    return {
+        "id": emp_id,
+        "prenom": rng.choice(PRENOMS),
+        "nom": f"Nom{rng.randint(1, 40)}",
+        "email": f"employe{emp_id}@example.com",
+        "poste": rng.choice(["Développeur", "Commercial", "Chef de projet"]),
+        "departement": rng.choice(DEPARTEMENTS),
+        "salaire": float(rng.randint(30, 90) * 1000),
+        "date_embauche": f"20{rng.randint(10, 23)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "actif": rng.random() > 0.2,
+    }
+
+@pytest.fixture
+def employees(tmp_path, monkeypatch):
+    rng = random.Random(42)
+    data = [make_employee(emp_id, rng) for emp_id in range(1, 201)]
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "employees.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(employee_server, "_cache", EmployeeCache())
+    return data
+
+def read_pages(**arguments):
+    """Parcourt toutes les pages en suivant les curseurs"""
+    rows, cursor, total = [], "", None
+    while True:
+        lines = list_employees(format="jsonl", cursor=cursor, **arguments).split("\n")
+        header = dict(item.split("=", 1) for item in lines[0][2:].split(" "))
+        total = int(header["total"])
+        rows.extend(json.loads(line) for line in lines[1:])
+        cursor = header["next_cursor"]
+        if not cursor:
+            return rows, total
+
+def expected_ids(data, sort_by, descending, departement="", actif_seulement=True):
+    selected = [emp for emp in data
+                if (not departement or emp["departement"].lower() == departement.lower())
+                and (not actif_seulement or emp["actif"])]
+    selected.sort(key=lambda emp: (employee_server._sort_value(emp, sort_by), emp["id"]), reverse=descending)
+    return [emp["id"] for emp in selected]
+
+@pytest.mark.parametrize("sort_by", employee_server.LIST_SORT_KEYS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_cursor_round_trip_covers_every_row_once(employees, sort_by, descending):
+    rows, total = read_pages(sort_by=sort_by, descending=descending, limit=7)
+
+    ids = expected_ids(employees, sort_by, descending)
+    assert [row["id"] for row in rows] == ids
+    assert total == len(ids)
+
+def test_cursor_round_trip_with_filters(employees):
+    rows, total = read_pages(departement="ventes", actif_seulement=False, sort_by="nom", limit=5)
+
+    ids = expected_ids(employees, "nom", False, departement="ventes", actif_seulement=False)
+    assert [row["id"] for row in rows] == ids
+    assert total == len(ids)
+
+def test_cursor_survives_updates_between_pages(employees):
+    first = list_employees(format="jsonl", sort_by="salaire", limit=10).split("\n")
+    cursor = first[0].split("next_cursor=")[1]
+    seen = [json.loads(line)["id"] for line in first[1:]]
+
+    # Un employé déjà lu passe en fin de tri, un autre non lu passe avant le curseur
+    update_employee(seen[0], salaire=1_000_000)
+    unseen = expected_ids(employees, "salaire", False)[-1]
+    update_employee(unseen, salaire=1)
+
+    remaining = []
+    while cursor:
+        lines = list_employees(format="jsonl", sort_by="salaire", limit=10, cursor=cursor).split("\n")
+        remaining.extend(json.loads(line)["id"] for line in lines[1:])
+        cursor = lines[0].split("next_cursor=")[1]
+
+    assert not set(remaining) & set(seen[1:])
+    assert seen[0] in remaining
+    assert unseen not in remaining
+
+def test_cursor_rejects_other_sort_and_garbage(employees):
+    cursor = list_employees(format="jsonl", sort_by="nom", limit=1).split("\n")[0].split("next_cursor=")[1]
+
+    with pytest.raises(ValueError):
+        list_employees(sort_by="prenom", cursor=cursor)
+    with pytest.raises(ValueError):
+        list_employees(sort_by="nom", descending=True, cursor=cursor)
+    with pytest.raises(ValueError):
+        list_employees(cursor="pas-un-curseur")
+    with pytest.raises(ValueError):
+        list_employees(sort_by="salaire", cursor=employee_server.encode_cursor("salaire", False, "texte", 1))
+
+def test_unknown_department_lists_nothing(employees):
+    assert list_employees(format="jsonl", departement="Inexistant").split("\n") == ["# total=0 returned=0 next_cursor="]
+
+def aggregate_state(aggregate: DepartmentAggregate) -> tuple:
+    return (aggregate.total, aggregate.actifs, aggregate.salary_cents, aggregate.ids,
+            aggregate.salaries, aggregate.hire_dates, aggregate.active_hire_dates)
+
+def test_department_aggregates_follow_mutations():
+    rng = random.Random(7)
+    data = {emp_id: make_employee(emp_id, rng) for emp_id in range(1, 101)}
+    indexes = EmployeeIndexes(list(data.values()))
+
+    for step in range(300):
+        emp_id = rng.randint(1, 120)
+        before = data.get(emp_id)
+        after = make_employee(emp_id, rng) if step % 5 else None
+        if before is not None:
+            indexes.remove(before)
+        if after is not None:
+            indexes.add(after)
+            data[emp_id] = after
+        else:
+            data.pop(emp_id, None)
+
+    rebuilt = EmployeeIndexes(list(data.values())).departments
+    departments = indexes.departments
+    assert departments.departments.keys() == rebuilt.departments.keys()
+    for name, aggregate in departments.departments.items():
+        assert aggregate_state(aggregate) == aggregate_state(rebuilt.departments[name])
+    assert aggregate_state(departments.company()) == aggregate_state(rebuilt.company())
+    assert departments.company().total == len(data)
+
+def test_department_aggregate_removes_empty_department_and_merges_case():
+    rng = random.Random(3)
+    first, second = make_employee(1, rng), make_employee(2, rng)
+    first["departement"], second["departement"] = "Ventes", "ventes"
+    indexes = EmployeeIndexes([first, second])
+
+    merged = indexes.departments.find("VENTES")
+    assert merged.total == 2 and merged.ids == {1, 2}
+    assert merged.salaries == sorted(merged.salaries)
+
+    indexes.remove(first)
+    assert "Ventes" not in indexes.departments.departments
+    assert indexes.departments.find("ventes").ids == {2}
+    assert indexes.departments.company().ids == {2}
+
+def test_headcount_history_ignores_invalid_dates(employees, tmp_path):
+    employees[0]["date_embauche"] = ""
+    employees[1]["date_embauche"] = "pas une date"
+    (tmp_path / "employees.json").write_text(json.dumps(employees, ensure_ascii=False), encoding="utf-8")
+
+    history = get_headcount_history(actif_seulement=False)
+
+    valid = sum(1 for emp in employees[2:])
+    assert history.rstrip().endswith(f": {valid} employé(s)")
+
+def test_headcount_history_is_bounded(employees, monkeypatch):
+    monkeypatch.setattr(employee_server, "HEADCOUNT_MAX_PERIODS", 24)
+
+    lines = get_headcount_history(periode="month").split("\n")
+    assert "omise(s)" in lines[2]
+    assert sum(1 for line in lines if "employé(s)" in line) == 24
+
+    since = get_headcount_history(periode="month", depuis="2026-01").split("\n")
+    assert since[2].startswith("   2026-01:")
+
+    with pytest.raises(ValueError):
+        get_headcount_history(depuis="juin 2023")
+
+def test_employee_updates_normalize_non_string_values():
+    employee = {"id": 1, "email": "alice@example.com", "telephone": "01"}
+    emails = {"alice@example.com", "bruno@example.com"}
+
+    modifications = employee_server.apply_employee_updates(employee, {"email": "  Alice2@Example.COM ", "telephone": 612345678}, emails)
+
+    assert employee["email"] == "alice2@example.com"
+    assert employee["telephone"] == "612345678"
+    assert emails == {"alice2@example.com", "bruno@example.com"}
+    assert len(modifications) == 2
+
+    with pytest.raises(ValueError, match="existe déjà"):
+        employee_server.apply_employee_updates(employee, {"email": " BRUNO@example.com"}, emails)
+    with pytest.raises(ValueError, match="vide"):
+        employee_server.apply_employee_updates(employee, {"email": "  "}, emails)
+    with pytest.raises(ValueError, match="existe déjà"):
+        employee_server.apply_employee_updates({"id": 2, "email": "x@example.com"}, {"email": 12}, emails | {"12"})
+
+def test_pending_updates_only_track_subscribed_resources(employees, monkeypatch):
+    monkeypatch.setattr(employee_server.mcp, "subscriptions", set())
+    monkeypatch.setattr(employee_server.mcp, "pending_updates", set())
+
+    update_employee(1, salaire=12345)
+    assert employee_server.mcp.pending_updates == set()
+
+    employee_server.mcp.subscriptions.add(employee_server.employee_resource_uri(2))
+    update_employee(1, salaire=23456)
+    update_employee(2, salaire=34567)
+    assert employee_server.mcp.pending_updates == {employee_server.employee_resource_uri(2)}
+
+def brute_force_search(data, needle):
+    normalized = employee_server.normalize_text(needle)
+    return {emp["id"] for emp in data
+            if any(normalized in employee_server.normalize_text(str(emp.get(field) or ""))
+                   for field in employee_server.SEARCH_FIELD_WEIGHTS)}
+
+@pytest.mark.parametrize("term", ["rh", "RH", "zo", "Zoé", "nom1", "ventes", "@example", "xq"])
+def test_trigram_search_matches_substring_scan(term):
+    rng = random.Random(11)
+    data = [make_employee(emp_id, rng) for emp_id in range(1, 151)]
+    indexes = EmployeeIndexes(data)
+
+    # Mutations: l'index ne garde que des IDs et doit suivre les remplacements
+    for emp_id in range(1, 151, 7):
+        before = indexes.by_id[emp_id]
+        after = make_employee(emp_id, rng)
+        indexes.remove(before)
+        indexes.add(after)
+        data[emp_id - 1] = after
+
+    found, total = indexes.search.search(term, limit=1000)
+    assert {emp["id"] for emp in found} == brute_force_search(data, term)
+    assert total == len(found)
+
+def test_concurrent_writers_lose_no_update(employees):
+    import threading
+    ids = [emp["id"] for emp in employees[:40]]
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def writer(worker):
+        barrier.wait()
+        try:
+            for emp_id in ids[worker::8]:
+                update_employee(emp_id, salaire=100_000 + emp_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    saved = {emp["id"]: emp for emp in employee_server.load_employees()}
+    assert all(saved[emp_id]["salaire"] == 100_000 + emp_id for emp_id in ids)
+    assert all(saved[emp_id]["version"] == 2 for emp_id in ids)
+
+def test_stale_version_is_rejected(employees):
+    version = json.loads(employee_server.get_employee(1)).get("version", 1)
+
+    update_employee(1, salaire=51_000, expected_version=version)
+    with pytest.raises(ValueError, match="Conflit de version"):
+        update_employee(1, salaire=52_000, expected_version=version)
+
+    saved = next(emp for emp in employee_server.load_employees() if emp["id"] == 1)
+    assert saved["salaire"] == 51_000 and saved["version"] == version + 1
+
+def test_interrupted_save_keeps_previous_file(employees, tmp_path, monkeypatch):
+    before = (tmp_path / "employees.json").read_bytes()
+
+    def interrupted_dump(data, f, **kwargs):
+        f.write('[{"id": 1, "nom": "à moit')
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(employee_server.json, "dump", interrupted_dump)
+    with pytest.raises(KeyboardInterrupt):
+        update_employee(1, salaire=99_000)
+
+    assert (tmp_path / "employees.json").read_bytes() == before
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_cache_reloads_after_external_edit(employees, tmp_path, monkeypatch):
+    notified = []
+    cache = EmployeeCache(on_external_change=lambda: notified.append(True))
+    monkeypatch.setattr(employee_server, "_cache", cache)
+
+    assert json.loads(employee_server.get_employee(1))["nom"] == employees[0]["nom"]
+    employee_server.get_employee(2)
+    assert (cache.reloads, cache.hits) == (1, 1) and not notified
+
+    # Un autre processus remplace le fichier
+    employees[0]["nom"] = "Modifié ailleurs"
+    (tmp_path / "employees.json").write_text(json.dumps(employees, ensure_ascii=False), encoding="utf-8")
+
+    assert json.loads(employee_server.get_employee(1))["nom"] == "Modifié ailleurs"
+    assert cache.reloads == 2 and notified == [True]
+
+def test_write_after_external_edit_does_not_reuse_stale_cache(employees, tmp_path, monkeypatch):
+    monkeypatch.setattr(employee_server, "_cache", EmployeeCache())
+    employee_server.get_indexes()
+
+    del employees[1]
+    (tmp_path / "employees.json").write_text(json.dumps(employees, ensure_ascii=False), encoding="utf-8")
+    update_employee(1, salaire=77_000)
+
+    saved = {emp["id"]: emp for emp in employee_server.load_employees()}
+    assert 2 not in saved and saved[1]["salaire"] == 77_000
+    with pytest.raises(ValueError, match="Aucun employé"):
+        employee_server.get_employee(2)
+
+def reference_analytics(data, group_by, departement, actif_seulement, pcts, bins, buckets):
+    """Agrégation en Python pur, sans numpy"""
+    import statistics
+    from datetime import date
+
+    selected = [emp for emp in data
+                if (not actif_seulement or emp["actif"])
+                and (not departement or emp["departement"].lower() == departement.lower())]
+    salaries = [emp["salaire"] for emp in selected]
+    low, high = min(salaries), max(salaries)
+    groups = {}
+    for emp in selected:
+        groups.setdefault(emp[group_by] if group_by else "Tous", []).append(emp)
+
+    result = {}
+    for name, members in groups.items():
+        values = sorted(emp["salaire"] for emp in members)
+        positions = {pct: (len(values) - 1) * pct / 100 for pct in pcts}
+        tenures = [(date.today() - date.fromisoformat(emp["date_embauche"])).days / 365.25 for emp in members]
+        histogram = [0] * bins
+        for value in values:
+            histogram[min(int((value - low) / (high - low) * bins), bins - 1)] += 1
+        result[name] = {
+            "effectif": len(values),
+            "salaire_moyen": round(statistics.fmean(values), 2),
+            "ecart_type": round(statistics.pstdev(values), 2),
+            "salaire_min": values[0],
+            "salaire_max": values[-1],
+            "percentiles": {f"P{pct:g}": round(values[int(pos)] + (values[min(int(pos) + 1, len(values) - 1)] - values[int(pos)]) * (pos - int(pos)), 2)
+                            for pct, pos in positions.items()},
+            "masse_salariale": round(sum(values), 2),
+            "histogramme": histogram,
+            "anciennete_moyenne": round(sum(tenures) / len(tenures), 2),
+            "anciennete": [sum(1 for t in tenures if sum(1 for b in buckets if b <= t) == i) for i in range(len(buckets) + 1)],
+        }
+    return result
+
+@pytest.mark.parametrize("group_by, departement, actif_seulement", [
+    ("departement", "", True), ("poste", "", False), ("", "ventes", True), ("poste", "RH", False),
+])
+def test_salary_analytics_matches_plain_python(employees, group_by, departement, actif_seulement):
+    # Quelques modifications pour passer par la mise à jour incrémentale de la vue colonnaire
+    employee_server.get_indexes()
+    for emp_id in range(1, 200, 9):
+        update_employee(emp_id, salaire=31_500 + emp_id * 100, departement="Ventes" if emp_id % 2 else None)
+    data = employee_server.load_employees()
+    pcts, bins, buckets = [0, 10, 50, 90, 100], 6, [1, 3, 5, 10]
+
+    result = json.loads(employee_server.salary_analytics(
+        group_by=group_by, departement=departement, actif_seulement=actif_seulement,
+        percentiles=pcts, histogram_bins=bins, tenure_buckets=buckets))
+    expected = reference_analytics(data, group_by, departement, actif_seulement, pcts, bins, buckets)
+
+    assert result["employes"] == sum(group["effectif"] for group in expected.values())
+    assert {group["groupe"] for group in result["groupes"]} == set(expected)
+    for group in result["groupes"]:
+        reference = expected[group["groupe"]]
+        for key in ("effectif", "salaire_moyen", "ecart_type", "salaire_min", "salaire_max", "percentiles",
+                    "masse_salariale", "histogramme", "anciennete_moyenne"):
+            assert group[key] == pytest.approx(reference[key], abs=0.011), key
+        assert list(group["anciennete"].values()) == reference["anciennete"]
+
+def plain_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def brute_force_fuzzy(data, term, max_distance):
+    queries = dict.fromkeys(employee_server.NameIndex.tokens(term.split("@")[0]))
+    found = {}
+    for emp in data:
+        words = employee_server.NameIndex.keys(emp)
+        total = sum(min(plain_levenshtein(query, word) for word in words) for query in queries)
+        if total <= max_distance:
+            found[emp["id"]] = total
+    return found
+
+def misspell(word, rng, edits):
+    for _ in range(edits):
+        position = rng.randrange(len(word) + 1)
+        action = rng.choice(["insert", "delete", "replace"]) if word else "insert"
+        if action == "insert":
+            word = word[:position] + rng.choice("aeiourstxz") + word[position:]
+        elif position < len(word):
+            word = word[:position] + (rng.choice("aeiourstxz") if action == "replace" else "") + word[position + 1:]
+    return word
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+def test_fuzzy_search_matches_brute_force_levenshtein(max_distance):
+    rng = random.Random(23)
+    data = [make_employee(emp_id, rng) for emp_id in range(1, 121)]
+    for emp in data[::3]:
+        emp["nom"] = rng.choice(["Montgomery", "Bartholomew", "Delacroix-Vasseur", "Ng", "Lefèvre"])
+    indexes = EmployeeIndexes(data)
+
+    words = sorted({word for emp in data for word in employee_server.NameIndex.keys(emp)})
+    queries = [misspell(rng.choice(words), rng, rng.randint(0, 3)) for _ in range(60)]
+    queries += [f"{misspell(emp['prenom'], rng, 1)} {emp['nom']}" for emp in rng.sample(data, 10)]
+    queries += ["montgomrey", "bartholomeww", "delacroix vaseur", "employe7@example.com"]
+
+    for query in queries:
+        if not employee_server.NameIndex.tokens(query.split("@")[0]):
+            continue
+        found = {emp["id"]: distance for emp, distance, _ in employee_server.fuzzy_matches(indexes, query, max_distance, limit=1000)}
+        assert found == brute_force_fuzzy(data, query, max_distance), query
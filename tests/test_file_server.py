@@ -0,0 +1,339 @@
+"""
+Tests des outils du serveur de fichiers appelés directement
+"""
+
+import json
+import os
+
+import pytest
+
+import file_server
+from file_server import HashCache, find_duplicates, walk_files
+
+@pytest.fixture
+def hash_cache(tmp_path, monkeypatch):
+    cache = HashCache(str(tmp_path / "arbre" / "cache.json"))
+    monkeypatch.setattr(file_server, "_hash_cache", cache)
+    return cache
+
+def test_hash_cache_is_hidden_from_walks_and_pruned(tmp_path, hash_cache):
+    tree = tmp_path / "arbre"
+    tree.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tree / name).write_text("même contenu", encoding="utf-8")
+
+    assert "groups=1 duplicates=2" in find_duplicates(str(tree))
+    assert os.path.exists(hash_cache.path)
+    assert "cache.json" not in walk_files(str(tree))
+    assert "cache.json" not in find_duplicates(str(tree), use_cache=False)
+
+    (tree / "c.txt").unlink()
+    (tree / "d.txt").write_text("autre", encoding="utf-8")
+    (tree / "e.txt").write_text("autre", encoding="utf-8")
+    find_duplicates(str(tree))
+
+    with open(hash_cache.path, encoding="utf-8") as f:
+        cached = json.load(f)
+    assert str(tree / "c.txt") not in cached
+    assert str(tree / "d.txt") in cached
+
+def test_hash_cache_prunes_only_under_the_scanned_root(tmp_path, hash_cache):
+    tree, other = tmp_path / "arbre", tmp_path / "autre"
+    tree.mkdir()
+    other.mkdir()
+    for directory in (tree, other):
+        (directory / "a.txt").write_text("contenu", encoding="utf-8")
+        (directory / "b.txt").write_text("contenu", encoding="utf-8")
+    find_duplicates(str(tree))
+    find_duplicates(str(other))
+
+    (other / "b.txt").unlink()
+    (tree / "b.txt").unlink()
+    file_server.hash_files(directory=str(tree))
+
+    with open(hash_cache.path, encoding="utf-8") as f:
+        cached = json.load(f)
+    # Hors de la racine parcourue, une entrée n'est pas vérifiée
+    assert str(other / "b.txt") in cached
+    assert str(tree / "b.txt") not in cached
+
+    # Un parcours filtré ne voit pas tout: rien n'est élagué
+    file_server.hash_files(directory=str(other), include=["a.txt"])
+    with open(hash_cache.path, encoding="utf-8") as f:
+        assert str(other / "b.txt") in json.load(f)
+
+    # Un fichier disparu est oublié quand sa lecture échoue
+    file_server.hash_files(paths=[str(other / "b.txt")])
+    with open(hash_cache.path, encoding="utf-8") as f:
+        assert str(other / "b.txt") not in json.load(f)
+
+def test_atomic_write_keeps_symlink_and_hard_links(tmp_path):
+    target = tmp_path / "cible.txt"
+    target.write_text("avant\n", encoding="utf-8")
+    os.chmod(target, 0o640)
+    link = tmp_path / "lien.txt"
+    link.symlink_to(target)
+
+    file_server.write_file(str(link), "après\n")
+
+    assert link.is_symlink()
+    assert target.read_text(encoding="utf-8") == "après\n"
+    assert target.stat().st_mode & 0o777 == 0o640
+
+    other = tmp_path / "autre.txt"
+    os.link(target, other)
+    inode = target.stat().st_ino
+    file_server.patch_file(str(target), start_line=1, content="en place\n")
+
+    assert target.stat().st_ino == inode
+    assert other.read_text(encoding="utf-8") == "en place\n"
+
+@pytest.mark.parametrize("diff, message", [
+    ("pas de bloc", "Aucun bloc"),
+    ("@@ -1,2 +1,2 @@\n ligne 1\n", "incomplet"),
+    ("@@ -1 +1 @@\n*ligne 1\n+autre\n", "invalide"),
+])
+def test_parse_unified_diff_rejects_malformed_diffs(diff, message):
+    with pytest.raises(ValueError, match=message):
+        file_server.parse_unified_diff(diff)
+
+@pytest.fixture
+def lines_file(tmp_path):
+    path = tmp_path / "lignes.txt"
+    path.write_text("ligne 1\nligne 2\nligne 3\n", encoding="utf-8")
+    return path
+
+@pytest.mark.parametrize("arguments, message", [
+    ({"diff": "@@ -2 +2 @@\n-ligne deux\n+autre\n"}, "ne correspond pas"),
+    ({"diff": "@@ -3 +3 @@\n-ligne 3\n+c\n@@ -1 +1 @@\n-ligne 1\n+a\n"}, "dans l'ordre"),
+    ({"diff": "@@ -8 +8 @@\n-ligne 8\n+h\n"}, "fin du fichier"),
+    ({"diff": "@@ -9,0 +10 @@\n+nouvelle\n"}, "dépasse la fin"),
+    ({"start_line": 0, "content": "x\n"}, "Plage de lignes invalide"),
+    ({}, "Indiquez soit diff"),
+    ({"diff": "@@ -1 +1 @@\n-ligne 1\n+a\n", "start_line": 1}, "Indiquez soit diff"),
+])
+def test_patch_file_rejections_leave_file_unchanged(lines_file, arguments, message):
+    before = lines_file.read_bytes()
+
+    with pytest.raises(ValueError, match=message):
+        file_server.patch_file(str(lines_file), **arguments)
+
+    assert lines_file.read_bytes() == before
+    assert not [name for name in os.listdir(lines_file.parent) if name.endswith(".tmp")]
+
+def test_patch_file_rejects_compressed_and_missing_files(tmp_path):
+    import gzip
+    compressed = tmp_path / "lignes.txt.gz"
+    compressed.write_bytes(gzip.compress(b"ligne 1\n"))
+
+    with pytest.raises(ValueError, match="compressés"):
+        file_server.patch_file(str(compressed), start_line=1, content="x\n")
+    with pytest.raises(ValueError, match="non trouvé"):
+        file_server.patch_file(str(tmp_path / "absent.txt"), start_line=1, content="x\n")
+
+@pytest.mark.parametrize("sort_by", file_server.WALK_SORT_KEYS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_walk_files_cursor_round_trip(tmp_path, sort_by, descending):
+    for number in range(40):
+        directory = tmp_path / f"dossier{number % 4}"
+        directory.mkdir(exist_ok=True)
+        path = directory / f"fichier{number % 10}-{number}.txt"
+        path.write_bytes(b"x" * (number % 7))
+        os.utime(path, (1_700_000_000 + number % 5, 1_700_000_000 + number % 5))
+
+    paths, cursor = [], ""
+    while True:
+        lines = walk_files(str(tmp_path), sort_by=sort_by, descending=descending, limit=6, cursor=cursor).split("\n")
+        header = dict(item.split("=", 1) for item in lines[0][2:].split(" "))
+        assert header["total"] == "40"
+        paths.extend(lines[1:])
+        cursor = header["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(paths) == len(set(paths)) == 40
+    full = walk_files(str(tmp_path), sort_by=sort_by, descending=descending, limit=1000).split("\n")[1:]
+    assert paths == full
+    with pytest.raises(ValueError):
+        walk_files(str(tmp_path), sort_by=sort_by, descending=not descending, cursor=file_server.encode_walk_cursor(sort_by, descending, 0, ""))
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_byte_pages_never_overlap_inside_multibyte_characters(tmp_path, compressed):
+    import gzip
+    text = "".join(f"é{n}€ " for n in range(300))
+    path = tmp_path / ("texte.txt.gz" if compressed else "texte.txt")
+    if compressed:
+        path.write_bytes(gzip.compress(text.encode("utf-8")))
+    else:
+        path.write_text(text, encoding="utf-8")
+    size = len(text.encode("utf-8"))
+
+    # Pages à des positions arbitraires, souvent au milieu d'un caractère
+    pages = [file_server.read_file(str(path), offset=offset, length=7).split("\n[...")[0]
+             for offset in range(0, size, 7)]
+    assert "".join(pages) == text
+
+def test_atomic_write_never_touches_the_process_umask(tmp_path, monkeypatch):
+    def forbidden(mask):
+        raise AssertionError("os.umask appelé pendant une écriture")
+    monkeypatch.setattr(os, "umask", forbidden)
+
+    path = tmp_path / "nouveau.txt"
+    file_server.write_file(str(path), "contenu\n")
+
+    assert path.stat().st_mode & 0o777 == 0o666 & ~file_server.PROCESS_UMASK
+
+def reference_grep(files, needle, context_lines, max_matches):
+    """grep -n -C en Python pur: (sortie, nombre de correspondances)"""
+    output, total = [], 0
+    for name in sorted(files):
+        lines = files[name].split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        matches = [number for number, line in enumerate(lines) if needle in line][:max_matches - total]
+        if not matches:
+            continue
+        # Le contexte final s'arrête avant la première correspondance non renvoyée
+        limit = next((number for number, line in enumerate(lines) if needle in line and number > matches[-1]), len(lines))
+        shown = sorted({shown for number in matches
+                        for shown in range(max(0, number - context_lines), min(limit, number + context_lines + 1))})
+        for position, number in enumerate(shown):
+            if context_lines and (output and position == 0 or position and number != shown[position - 1] + 1):
+                output.append("--")
+            output.append(f"{name}{':' if number in matches else '-'}{number + 1}{':' if number in matches else '-'}{lines[number]}")
+        total += len(matches)
+        if total >= max_matches:
+            break
+    return output, total
+
+@pytest.mark.parametrize("context_lines", [0, 1, 2, 4])
+@pytest.mark.parametrize("max_matches", [1, 3, 7, 1000])
+def test_search_files_context_and_max_matches(tmp_path, context_lines, max_matches):
+    import gzip
+    import random
+    rng = random.Random(context_lines * 100 + max_matches)
+    files = {}
+    for number in range(6):
+        lines = [f"ligne {n} " + ("trouvé" if rng.random() < 0.15 else "rien") for n in range(rng.randint(0, 40))]
+        files[f"f{number}.txt"] = "\n".join(lines) + ("\n" if number % 2 else "")
+    for name, text in files.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    for number in (0, 1):
+        (tmp_path / f"z{number}.txt.gz").write_bytes(gzip.compress(files[f"f{number}.txt"].encode("utf-8")))
+        files[f"z{number}.txt.gz"] = files[f"f{number}.txt"]
+
+    lines = file_server.search_files("trouvé", str(tmp_path), context_lines=context_lines, max_matches=max_matches).split("\n")
+
+    expected, total = reference_grep(files, "trouvé", context_lines, max_matches)
+    header = dict(item.split("=", 1) for item in lines[0][2:].split(" "))
+    assert int(header["matches"]) == total
+    assert lines[1:] == expected
+    all_matches = sum(text.count("trouvé") for text in files.values())
+    assert ("truncated" in header) == (all_matches >= max_matches)
+
+def test_read_many_splits_budget_in_file_order(tmp_path):
+    import gzip
+    sizes = {"a.txt": 30, "b.txt": 5, "c.txt": 30, "d.txt": 30, "e.txt": 0}
+    for name, size in sizes.items():
+        (tmp_path / name).write_text("x" * size, encoding="utf-8")
+    (tmp_path / "f.txt.gz").write_bytes(gzip.compress(b"y" * 100))
+    names = sorted(sizes) + ["absent.txt", "f.txt.gz"]
+
+    result = json.loads(file_server.read_many(paths=[str(tmp_path / name) for name in names],
+                                              max_bytes_per_file=20, max_total_bytes=50))
+    files = {os.path.basename(entry["path"]): entry for entry in result["files"]}
+
+    assert [os.path.basename(entry["path"]) for entry in result["files"]] == names
+    assert files["a.txt"]["content"] == "x" * 20 and files["a.txt"]["truncated"]
+    assert files["b.txt"]["content"] == "x" * 5 and not files["b.txt"]["truncated"]
+    # Reste 25 octets: c.txt plafonné par fichier, d.txt par le budget total
+    assert len(files["c.txt"]["content"]) == 20
+    assert files["d.txt"]["content"] == "x" * 5 and files["d.txt"]["truncated"]
+    assert files["e.txt"]["content"] == "" and not files["e.txt"]["truncated"]
+    assert "error" in files["absent.txt"]
+    assert files["f.txt.gz"]["error"] == "Budget total d'octets épuisé"
+    assert result["bytes_read"] == 50 == sum(len(entry.get("content", "")) for entry in result["files"])
+
+def test_read_many_limits_files_and_never_cuts_characters(tmp_path):
+    for number in range(5):
+        (tmp_path / f"{number}.txt").write_text("é" * 10, encoding="utf-8")
+    (tmp_path / "binaire.txt").write_bytes(b"\xff\xfe\x00")
+
+    result = json.loads(file_server.read_many(pattern=str(tmp_path / "*.txt"), max_files=3, max_bytes_per_file=7))
+    assert result["total"] == 6 and len(result["files"]) == 3
+    assert [entry["content"] for entry in result["files"]] == ["é" * 3] * 3
+
+    result = json.loads(file_server.read_many(paths=[str(tmp_path / "binaire.txt"), str(tmp_path / "0.txt")]))
+    assert "error" in result["files"][0] and result["files"][1]["content"] == "é" * 10
+
+    for arguments in ({}, {"paths": ["a"], "pattern": "*"}, {"paths": ["a"], "max_files": 0},
+                      {"paths": ["a"], "max_total_bytes": 0}):
+        with pytest.raises(ValueError):
+            file_server.read_many(**arguments)
+
+def test_stat_many_reports_errors_per_file(tmp_path):
+    for number in range(4):
+        (tmp_path / f"{number}.txt").write_text("x" * number, encoding="utf-8")
+    paths = [str(tmp_path / "0.txt"), str(tmp_path / "absent.txt"), str(tmp_path / "3.txt"), str(tmp_path)]
+
+    result = json.loads(file_server.stat_many(paths=paths))
+    assert result["total"] == 4
+    assert [entry["path"] for entry in result["files"]] == paths
+    assert "error" in result["files"][1]
+    for entry in (result["files"][0], result["files"][2], result["files"][3]):
+        assert entry == json.loads(file_server.get_file_info(entry["path"]))
+
+    result = json.loads(file_server.stat_many(pattern=str(tmp_path / "*.txt"), max_files=2))
+    assert result["total"] == 4 and len(result["files"]) == 2
+
+@pytest.fixture
+def metadata_cache(monkeypatch):
+    cache = file_server.MetadataCache()
+    monkeypatch.setattr(file_server, "_metadata_cache", cache)
+    return cache
+
+def backdate(path, seconds=60):
+    """Recule le mtime d'un répertoire hors de la fenêtre où le cache refuse de stocker"""
+    stamp = path.stat().st_mtime - seconds
+    os.utime(path, (stamp, stamp))
+    return stamp
+
+def test_metadata_cache_is_invalidated_by_server_writes(tmp_path, metadata_cache):
+    target = tmp_path / "a.txt"
+    target.write_text("court", encoding="utf-8")
+    stamp = backdate(tmp_path)
+
+    assert "📄 a.txt" in file_server.list_files(str(tmp_path))
+    assert json.loads(file_server.get_file_info(str(target)))["size_bytes"] == 5
+    assert json.loads(file_server.get_file_info(str(target)))["size_bytes"] == 5
+    assert metadata_cache.stats()["hits"] == 1
+
+    # Écriture en place: le mtime du répertoire ne change pas, seule l'invalidation rafraîchit
+    file_server.write_file(str(target), "beaucoup plus long", atomic=False)
+    assert json.loads(file_server.get_file_info(str(target)))["size_bytes"] == 18
+
+    # Nouveau fichier, avec un mtime de répertoire inchangé (granularité grossière du système de fichiers)
+    file_server.list_files(str(tmp_path))
+    file_server.write_file(str(tmp_path / "b.txt"), "b")
+    os.utime(tmp_path, (stamp, stamp))
+    assert "📄 b.txt" in file_server.list_files(str(tmp_path))
+
+    file_server.patch_file(str(target), start_line=1, content="x\n")
+    os.utime(tmp_path, (stamp, stamp))
+    assert json.loads(file_server.get_file_info(str(target)))["size_bytes"] == 2
+
+def test_metadata_cache_is_invalidated_by_create_directory(tmp_path, metadata_cache):
+    parent = tmp_path / "parent"
+    parent.mkdir()
+    stamps = {path: backdate(path) for path in (parent, tmp_path)}
+    assert file_server.list_files(str(parent)) == "Aucun fichier trouvé"
+    file_server.list_files(str(tmp_path))
+
+    # Création en cascade: chaque répertoire parent est oublié
+    file_server.create_directory(str(parent / "enfant" / "petit-enfant"))
+    for path, stamp in stamps.items():
+        os.utime(path, (stamp, stamp))
+
+    assert file_server.list_files(str(parent)) == "📁 enfant/"
+    assert "📁 parent/" in file_server.list_files(str(tmp_path))
+    assert metadata_cache.stats()["invalidations"] >= 1
@@ -0,0 +1,67 @@
+"""
+Tests du client JSON-RPC contre le vrai serveur de fichiers (stdio)
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+
+import pytest
+
+from conftest import ROOT
+from mcp_client import MCPClient
+
+FILE_SERVER = os.path.join(ROOT, "file_server.py")
+
+async def collect_pages(arguments, max_pages=100):
+    client = MCPClient()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert await client.connect_to_server("filesystem", FILE_SERVER)
+        return [page async for page in client.iter_tool_pages("filesystem", "read_file", arguments, max_pages)]
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.close()
+
+def strip_marker(page: str) -> str:
+    return page.rsplit("\n[... tronqué:", 1)[0]
+
+@pytest.fixture
+def numbered_file(tmp_path):
+    path = tmp_path / "lignes.txt"
+    path.write_text("".join(f"ligne numéro {n}\n" for n in range(1, 501)), encoding="utf-8")
+    return path
+
+def test_line_range_pages_stop_at_end_line(numbered_file):
+    pages = asyncio.run(collect_pages({"path": str(numbered_file), "start_line": 10, "end_line": 200, "max_bytes": 200}))
+    
+    assert len(pages) > 1
+    content = "".join(strip_marker(page) for page in pages)
+    assert content == "".join(f"ligne numéro {n}\n" for n in range(10, 201))
+
+def test_byte_range_pages_respect_length(numbered_file):
+    pages = asyncio.run(collect_pages({"path": str(numbered_file), "offset": 100, "length": 1000, "max_bytes": 300}))
+    
+    content = "".join(strip_marker(page) for page in pages)
+    assert content.encode("utf-8") == numbered_file.read_bytes()[100:1100]
+
+def test_tail_pages_read_to_end_of_file(numbered_file):
+    pages = asyncio.run(collect_pages({"path": str(numbered_file), "tail_lines": 50, "max_bytes": 256}))
+    
+    content = "".join(strip_marker(page) for page in pages)
+    assert content == "".join(f"ligne numéro {n}\n" for n in range(451, 501))
+
+def test_compressed_line_range_pages(tmp_path):
+    import gzip
+    path = tmp_path / "lignes.txt.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("".join(f"ligne numéro {n}\n" for n in range(1, 501)))
+    
+    pages = asyncio.run(collect_pages({"path": str(path), "start_line": 10, "end_line": 200, "max_bytes": 200}))
+    content = "".join(strip_marker(page) for page in pages)
+    assert content == "".join(f"ligne numéro {n}\n" for n in range(10, 201))
+
+def test_tool_error_stops_iteration(tmp_path):
+    with pytest.raises(Exception, match="non trouvé"):
+        asyncio.run(collect_pages({"path": str(tmp_path / "absent.txt")}))